@@ -7,6 +7,8 @@ import h5py
 from pyscf.ao2mo import incore
 from pyscf.ao2mo import outcore
 from pyscf.ao2mo import r_outcore
+from pyscf.ao2mo import direct
+from pyscf.ao2mo import symm_blocks
 
 from pyscf.ao2mo.addons import load, restore
 
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+'''
+Integral-direct AO->MO transformation.  The AO integrals are generated for a
+block of kl AO pairs at a time, the ij indices are transformed in the C
+kernel and the kl indices are contracted to the MO integrals which are held in
+memory.  No intermediate file is created.  It is meant for small MO subspaces,
+e.g. the (pa|aa) integrals of CASSCF or the (ov|ov) integrals of MP2 with few
+occupied orbitals.
+'''
+
+import time
+import numpy
+import pyscf.lib
+from pyscf.lib import logger
+from pyscf.ao2mo import _ao2mo
+from pyscf.ao2mo import outcore
+
+# Integrals which satisfy (ij|kl) = (kl|ij)
+SYMMETRIC_INTOR = ('cint2e_sph', 'cint2e_cart')
+# Max number of kl MO pairs for which the kl indices are contracted with the
+# dense kl coefficients (AO pairs x kl MO pairs) when the half-transformed
+# integrals do not fit in memory
+DENSE_KL_MAX = 64
+
+def full(mol, mo_coeff, intor='cint2e_sph', aosym='s4', comp=1,
+         max_memory=2000, verbose=logger.WARN, compact=True):
+    r'''Integral-direct transformation of (ij|kl) with the same set of
+    orbitals.  See :func:`general` for the arguments.
+
+    Examples:
+
+    >>> from pyscf import gto
+    >>> from pyscf import ao2mo
+    >>> mol = gto.M(atom='O 0 0 0; H 0 1 0; H 0 0 1', basis='sto3g')
+    >>> mo1 = numpy.random.random((mol.nao_nr(), 4))
+    >>> eri1 = ao2mo.direct.full(mol, mo1)
+    >>> print(eri1.shape)
+    (10, 10)
+    '''
+    return general(mol, (mo_coeff,)*4, intor, aosym, comp, max_memory,
+                   verbose, compact)
+
+def general(mol, mo_coeffs, intor='cint2e_sph', aosym='s4', comp=1,
+            max_memory=2000, verbose=logger.WARN, compact=True):
+    r'''For the given four sets of orbitals, transfer arbitrary spherical AO
+    integrals to MO integrals in memory.  The AO integrals are regenerated
+    on the fly with Schwarz screening.  Nothing is written to disk.
+
+    Args:
+        mol : :class:`Mole` object
+            AO integrals will be generated in terms of mol._atm, mol._bas, mol._env
+        mo_coeffs : 4-item list of ndarray
+            Four sets of orbital coefficients, corresponding to the four
+            indices of (ij|kl)
+
+    Kwargs
+        intor : str
+            Name of the 2-electron integral.  Ref to :func:`getints_by_shell`
+            for the complete list of available 2-electron integral names
+        aosym : int or str
+            Permutation symmetry for the AO integrals
+
+            | 4 or '4' or 's4': 4-fold symmetry (default)
+            | '2ij' or 's2ij' : symmetry between i, j in (ij|kl)
+            | '2kl' or 's2kl' : symmetry between k, l in (ij|kl)
+            | 1 or '1' or 's1': no symmetry
+
+        comp : int
+            Components of the integrals, e.g. cint2e_ip_sph has 3 components.
+        max_memory : float or int
+            The maximum memory (in MB) for the AO integral buffer and the MO
+            integrals.
+        verbose : int
+            Print level
+        compact : bool
+            When compact is True, depending on the four oribital sets, the
+            returned MO integrals has (up to 4-fold) permutation symmetry.
+            If it's False, the function will abandon any permutation symmetry,
+            and return the "plain" MO integrals
+
+    Returns:
+        2D/3D MO-integral array, in the same layout as the one returned by
+        :func:`outcore.general_iofree`.
+
+    Examples:
+
+    >>> from pyscf import gto
+    >>> from pyscf import ao2mo
+    >>> mol = gto.M(atom='O 0 0 0; H 0 1 0; H 0 0 1', basis='sto3g')
+    >>> mo1 = numpy.random.random((mol.nao_nr(), 7))
+    >>> mo2 = numpy.random.random((mol.nao_nr(), 2))
+    >>> eri1 = ao2mo.direct.general(mol, (mo1,mo2,mo2,mo2))
+    >>> print(eri1.shape)
+    (14, 3)
+    '''
+    time0 = (time.clock(), time.time())
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(mol.stdout, verbose)
+
+    aosym = outcore._stand_sym_code(aosym)
+    assert(aosym in ('s4', 's2ij', 's2kl', 's1'))
+    mo_coeffs, aosym, ijsame, klsame, swap = \
+            _sort_mo_pairs(mo_coeffs, intor, aosym, comp, compact)
+    if swap:
+        log.debug('transform (kl|ij) then transpose')
+    nij_pair = _mo_pair_count(mo_coeffs[0], mo_coeffs[1], ijsame)
+    nkl_pair = _mo_pair_count(mo_coeffs[2], mo_coeffs[3], klsame)
+
+    nmoi = mo_coeffs[0].shape[1]
+    nmoj = mo_coeffs[1].shape[1]
+    nmok = mo_coeffs[2].shape[1]
+    nmol = mo_coeffs[3].shape[1]
+    nao = mo_coeffs[0].shape[0]
+    eri = numpy.zeros((comp,nij_pair,nkl_pair))
+    if nij_pair == 0 or nkl_pair == 0:
+        return _finalize(eri, comp, swap)
+
+    if ijsame:
+        ijmosym = 's2'
+        moij = numpy.asarray(mo_coeffs[0], order='F')
+        ijshape = (0, nmoi, 0, nmoi)
+    else:
+        ijmosym = 's1'
+        moij = numpy.asarray(numpy.hstack((mo_coeffs[0],mo_coeffs[1])), order='F')
+        ijshape = (0, nmoi, nmoi, nmoj)
+    if klsame:
+        klmosym = 's2'
+        mokl = numpy.asarray(mo_coeffs[2], order='F')
+        klshape = (0, nmok, 0, nmok)
+    else:
+        klmosym = 's1'
+        mokl = numpy.asarray(numpy.hstack((mo_coeffs[2],mo_coeffs[3])), order='F')
+        klshape = (0, nmok, nmok, nmol)
+    if aosym in ('s4', 's2kl'):
+        klaosym = 's2kl'
+        nao_kl = nao * (nao+1) // 2
+    else:
+        klaosym = 's1'
+        nao_kl = nao * nao
+    nao_pair = _ao_pair_count(nao, aosym)
+
+    mem_now = pyscf.lib.current_memory()[0]
+    mem_words = (max_memory - mem_now) * 1e6 / 8 - eri.size
+    e2incore = _e2_incore(nij_pair, nao_kl, comp, mem_words)
+    if e2incore:
+# The half-transformed integrals of all AO kl pairs are held in memory and
+# the kl indices are transformed in the C kernel (nr_e2_).  Per AO kl pair:
+# the AO integrals and the half-transformed integrals
+        halfbuf = numpy.zeros((comp,nij_pair,nao_kl))
+        mem_words -= halfbuf.size
+        blksize = int(mem_words // (comp*(nao_pair+nij_pair)))
+    else:
+# The kl indices are contracted with the dense kl coefficients of each AO
+# block.  It is efficient for small kl MO spaces only.  Per AO kl pair: the AO
+# integrals, the half-transformed integrals and the kl coefficients
+        blksize = int(mem_words // (comp*(nao_pair+nij_pair) + nmok*nmol))
+    blksize = max(blksize, 1)
+    log.debug('direct ao2mo (ij,kl) = (%d,%d), mem %.8g MB, AO block %d, '
+              'e2 incore %s', nij_pair, nkl_pair, eri.nbytes/1e6, blksize,
+              e2incore)
+
+    for kidx, lidx, half in half_e1(mol, moij, ijshape, ijmosym, intor,
+                                    aosym, comp, blksize, log):
+        if e2incore:
+            if klaosym == 's2kl':
+                klpos = kidx*(kidx+1)//2 + lidx
+            else:
+                klpos = kidx*nao + lidx
+            for icomp in range(comp):
+                halfbuf[icomp][:,klpos] = half[icomp].T
+        else:
+            ckl = _kl_coeff(mo_coeffs[2], mo_coeffs[3], kidx, lidx, aosym, klsame)
+            for icomp in range(comp):
+                pyscf.lib.dot(half[icomp].T, ckl, 1, eri[icomp], 1)
+
+    if e2incore:
+        for icomp in range(comp):
+            _ao2mo.nr_e2_(halfbuf[icomp], mokl, klshape, klaosym, klmosym,
+                          out=eri[icomp])
+        halfbuf = None
+    log.timer('AO->MO direct transformation for %s'%intor, *time0)
+    return _finalize(eri, comp, swap)
+
+def incore_efficient(mo_coeffs, intor='cint2e_sph', aosym='s4', comp=1,
+                     max_memory=2000, compact=True):
+    '''Whether :func:`general` transforms the kl indices in the C kernel
+    within max_memory, or the kl MO space is small enough for the dense kl
+    contraction.  Otherwise the disk-based :func:`outcore.general` is
+    cheaper.
+    '''
+    aosym = outcore._stand_sym_code(aosym)
+    mo_coeffs, aosym, ijsame, klsame, swap = \
+            _sort_mo_pairs(mo_coeffs, intor, aosym, comp, compact)
+    nao = mo_coeffs[0].shape[0]
+    nij_pair = _mo_pair_count(mo_coeffs[0], mo_coeffs[1], ijsame)
+    nkl_pair = _mo_pair_count(mo_coeffs[2], mo_coeffs[3], klsame)
+    if aosym in ('s4', 's2kl'):
+        nao_kl = nao * (nao+1) // 2
+    else:
+        nao_kl = nao * nao
+    mem_words = ((max_memory - pyscf.lib.current_memory()[0]) * 1e6 / 8 -
+                 comp*nij_pair*nkl_pair)
+    return (_e2_incore(nij_pair, nao_kl, comp, mem_words) or
+            nkl_pair <= DENSE_KL_MAX)
+
+def half_e1(mol, moij, ijshape, ijmosym, intor='cint2e_sph', aosym='s4',
+            comp=1, blksize=None, verbose=logger.WARN):
+    '''Generate the AO integrals for blocks of kl AO pairs and transform the
+    ij indices.  For each block, it yields the AO indices (k, l) of the rows
+    and the half-transformed integrals of shape (comp,nrow,nij_pair).  The
+    buffer of the half-transformed integrals is reused by the next block.
+    '''
+    nao = moij.shape[0]
+    if aosym in ('s4', 's2ij'):
+        nao_pair = nao * (nao+1) // 2
+    else:
+        nao_pair = nao * nao
+    i0, icount, j0, jcount = ijshape
+    if ijmosym == 's2':
+        nij_pair = icount * (icount+1) // 2
+    else:
+        nij_pair = icount * jcount
+    if blksize is None:
+        blksize = nao_pair
+
+    ao_loc = mol.ao_loc_nr()
+    buf1 = None
+    for klsh0, klsh1, aobuf in ao_e1(mol, intor, aosym, comp, blksize, verbose):
+        nrow = aobuf.shape[1]
+        if buf1 is None or buf1.size < comp*nrow*nij_pair:
+            buf1 = numpy.empty(comp*max(nrow,blksize)*nij_pair)
+        half = _ao2mo.nr_e1_(aobuf.reshape(comp*nrow,nao_pair), moij, ijshape,
+                             aosym, ijmosym, out=buf1)
+        kidx, lidx = _kl_ao_index(ao_loc, mol.nbas, klsh0, klsh1, aosym)
+        yield kidx, lidx, half.reshape(comp,nrow,nij_pair)
+
+def ao_e1(mol, intor='cint2e_sph', aosym='s4', comp=1, blksize=None,
+          verbose=logger.WARN):
+    '''Generate the AO integrals (ij|kl) for blocks of kl shell pairs with
+    Schwarz screening.  For each block, it yields the kl shell-pair range
+    [klsh0:klsh1] and the AO integrals of shape (comp,nrow,nao_pair).  The
+    rows are ordered as in :func:`_kl_ao_index`.  The buffer is reused by
+    the next block.
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(mol.stdout, verbose)
+    nao = mol.ao_loc_nr('_cart' in intor)[-1]
+    if aosym in ('s4', 's2ij'):
+        nao_pair = nao * (nao+1) // 2
+    else:
+        nao_pair = nao * nao
+    if blksize is None:
+        blksize = nao_pair
+    shranges = outcore.guess_shell_ranges(mol, blksize, blksize, aosym)
+    maxbuflen = max([x[2] for x in shranges])
+
+    if intor == 'cint2e_sph':
+        ao2mopt = _ao2mo.AO2MOpt(mol, intor, 'CVHFnr_schwarz_cond',
+                                 'CVHFsetnr_direct_scf')
+    else:
+        ao2mopt = _ao2mo.AO2MOpt(mol, intor)
+
+    buf = numpy.empty(comp*maxbuflen*nao_pair)
+    ti0 = (time.clock(), time.time())
+    for istep, sh_range in enumerate(shranges):
+        klsh0, klsh1, nrow = sh_range[:3]
+        aobuf = _ao2mo.nr_e1fill_(intor, sh_range[:3], mol._atm, mol._bas,
+                                  mol._env, aosym, comp, ao2mopt, out=buf)
+        yield klsh0, klsh1, aobuf.reshape(comp,nrow,nao_pair)
+        ti0 = log.timer_debug1('direct AO integrals [%d/%d]'%(istep+1,len(shranges)),
+                               *ti0)
+
+def _sort_mo_pairs(mo_coeffs, intor, aosym, comp, compact):
+    '''Put the smaller MO pair on the ij side if (ij|kl) = (kl|ij).  The ij
+    indices are transformed for every AO kl pair, the cost and the buffer of
+    the half-transformed integrals grow with the ij MO pairs.
+    '''
+    ijsame = (compact and aosym in ('s4', 's2ij') and
+              outcore.iden_coeffs(mo_coeffs[0], mo_coeffs[1]))
+    klsame = (compact and aosym in ('s4', 's2kl') and
+              outcore.iden_coeffs(mo_coeffs[2], mo_coeffs[3]))
+    nij_pair = _mo_pair_count(mo_coeffs[0], mo_coeffs[1], ijsame)
+    nkl_pair = _mo_pair_count(mo_coeffs[2], mo_coeffs[3], klsame)
+    swap = (intor in SYMMETRIC_INTOR and comp == 1 and nij_pair > nkl_pair)
+    if swap:
+        mo_coeffs = (mo_coeffs[2], mo_coeffs[3], mo_coeffs[0], mo_coeffs[1])
+        ijsame, klsame = klsame, ijsame
+        aosym = {'s2ij': 's2kl', 's2kl': 's2ij'}.get(aosym, aosym)
+    return mo_coeffs, aosym, ijsame, klsame, swap
+
+def _ao_pair_count(nao, aosym):
+    if aosym in ('s4', 's2ij'):
+        return nao * (nao+1) // 2
+    else:
+        return nao * nao
+
+def _e2_incore(nij_pair, nao_pair, comp, mem_words):
+# Half of the memory for the half-transformed integrals of all AO kl pairs,
+# the other half for the AO integral blocks
+    return comp*nij_pair*nao_pair < mem_words * .5
+
+def _mo_pair_count(mo1, mo2, same):
+    if same:
+        return mo1.shape[1] * (mo1.shape[1]+1) // 2
+    else:
+        return mo1.shape[1] * mo2.shape[1]
+
+def _finalize(eri, comp, swap):
+    if swap:
+        return pyscf.lib.transpose(eri[0])
+    elif comp == 1:
+        return eri[0]
+    else:
+        return eri
+
+def _kl_ao_index(ao_loc, nbas, klsh0, klsh1, aosym):
+    '''AO indices (k, l) of the rows generated by nr_e1fill_ for the shell
+    pairs [klsh0:klsh1]
+    '''
+    kidx = []
+    lidx = []
+    for kl in range(klsh0, klsh1):
+        if aosym in ('s4', 's2kl'):
+            ksh, lsh = _ao2mo._extract_pair(kl)
+        else:
+            ksh, lsh = divmod(kl, nbas)
+        dk = ao_loc[ksh+1] - ao_loc[ksh]
+        dl = ao_loc[lsh+1] - ao_loc[lsh]
+        if ksh == lsh and aosym in ('s4', 's2kl'):
+            k, l = numpy.tril_indices(dk)
+        else:
+            k, l = numpy.indices((dk,dl)).reshape(2,-1)
+        kidx.append(k + ao_loc[ksh])
+        lidx.append(l + ao_loc[lsh])
+    return numpy.hstack(kidx), numpy.hstack(lidx)
+
+def _kl_coeff(mo_k, mo_l, kidx, lidx, aosym, klsame):
+    '''Coefficients to transform the AO pairs (kidx, lidx) to the MO pairs.
+    For the packed AO pairs, the (l,k) contribution is added to the (k,l)
+    row.
+    '''
+    ckl = numpy.einsum('pk,pl->pkl', mo_k[kidx], mo_l[lidx])
+    if aosym in ('s4', 's2kl'):
+        mask = kidx != lidx
+        ckl[mask] += numpy.einsum('pk,pl->pkl', mo_k[lidx[mask]],
+                                  mo_l[kidx[mask]])
+    if klsame:
+        idx = numpy.tril_indices(mo_k.shape[1])
+        return numpy.asarray(ckl[:,idx[0],idx[1]], order='C')
+    else:
+        return ckl.reshape(len(kidx),-1)
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+    from pyscf import ao2mo
+    mol = gto.M(
+        verbose = 0,
+        atom = [
+            ["O" , (0. , 0.     , 0.)],
+            [1   , (0. , -0.757 , 0.587)],
+            [1   , (0. , 0.757  , 0.587)]],
+        basis = 'ccpvdz')
+    mf = scf.RHF(mol)
+    mf.scf()
+    mo = mf.mo_coeff
+    eri0 = ao2mo.incore.general(mf._eri, (mo,mo[:,:4],mo[:,2:6],mo[:,2:6]))
+    eri1 = general(mol, (mo,mo[:,:4],mo[:,2:6],mo[:,2:6]), max_memory=10)
+    print(numpy.allclose(eri0, eri1))
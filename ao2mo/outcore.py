@@ -8,16 +8,29 @@ import numpy
 import h5py
 import pyscf.lib
 from pyscf.lib import logger
+from pyscf.lib import scratch
 from pyscf.ao2mo import _ao2mo
 
 # default ioblk_size is 256 MB
 
 IOBUF_WORDS_PREFER = 1e8
 IOBUF_ROW_MIN = 160
+# Upper limit of the chunk size of the MO integral dataset.  The chunk should
+# fit in the HDF5 chunk cache (1 MB by default).
+H5_CHUNK_BYTES = 1e6
+# Default compression filter ('lzf' or 'gzip') for the MO integrals and the
+# swap file.  The shuffle filter is applied together with the compression.
+H5_COMPRESSION = None
+# Number of the threads in half_e1 to compute the shell ranges concurrently.
+# The integral and transformation kernels are OpenMP parallel.  More workers
+# help when the OpenMP threads are not fully loaded (e.g. small shell ranges).
+# The transpose and the disk writes are always done in a background thread.
+HALF_E1_NWORKERS = 1
 
 def full(mol, mo_coeff, erifile, dataname='eri_mo', tmpdir=None,
          intor='cint2e_sph', aosym='s4', comp=1,
-         max_memory=2000, ioblk_size=256, verbose=logger.WARN, compact=True):
+         max_memory=2000, ioblk_size=256, verbose=logger.WARN, compact=True,
+         chunks=None, compression=None):
     r'''Transfer arbitrary spherical AO integrals to MO integrals for given orbitals
 
     Args:
@@ -69,6 +82,15 @@ def full(mol, mo_coeff, erifile, dataname='eri_mo', tmpdir=None,
             returned MO integrals has (up to 4-fold) permutation symmetry.
             If it's False, the function will abandon any permutation symmetry,
             and return the "plain" MO integrals
+        chunks : tuple
+            Chunk shape of the MO integral dataset (without the comp
+            dimension).  By default, a chunk holds the nmoj rows of one
+            i-orbital, so that the readers which load the integrals of an
+            i-orbital (or a range of i-orbitals) read whole chunks.  The
+            chunk is extended along the columns up to H5_CHUNK_BYTES.
+        compression : str
+            HDF5 compression filter ('lzf' or 'gzip') of the MO integrals and
+            the swap file.  Default is H5_COMPRESSION.
 
     Returns:
         None
@@ -98,12 +120,14 @@ def full(mol, mo_coeff, erifile, dataname='eri_mo', tmpdir=None,
     dataset ['eri_mo', 'new'], shape (3, 100, 55)
     '''
     general(mol, (mo_coeff,)*4, erifile, dataname, tmpdir,
-            intor, aosym, comp, max_memory, ioblk_size, verbose, compact)
+            intor, aosym, comp, max_memory, ioblk_size, verbose, compact,
+            chunks, compression)
     return erifile
 
 def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             intor='cint2e_sph', aosym='s4', comp=1,
-            max_memory=2000, ioblk_size=256, verbose=logger.WARN, compact=True):
+            max_memory=2000, ioblk_size=256, verbose=logger.WARN, compact=True,
+            chunks=None, compression=None):
     r'''For the given four sets of orbitals, transfer arbitrary spherical AO
     integrals to MO integrals on the fly.
 
@@ -157,6 +181,15 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             returned MO integrals has (up to 4-fold) permutation symmetry.
             If it's False, the function will abandon any permutation symmetry,
             and return the "plain" MO integrals
+        chunks : tuple
+            Chunk shape of the MO integral dataset (without the comp
+            dimension).  By default, a chunk holds the nmoj rows of one
+            i-orbital, so that the readers which load the integrals of an
+            i-orbital (or a range of i-orbitals) read whole chunks.  The
+            chunk is extended along the columns up to H5_CHUNK_BYTES.
+        compression : str
+            HDF5 compression filter ('lzf' or 'gzip') of the MO integrals and
+            the swap file.  Default is H5_COMPRESSION.
 
     Returns:
         None
@@ -245,16 +278,17 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
         else:
             feri = h5py.File(erifile, 'w')
     else:
-        assert(isinstance(erifile, h5py.Group))
+        assert(isinstance(erifile, (h5py.Group, scratch.RawGroup)))
         feri = erifile
+    if chunks is None:
+        chunks = _guess_chunks(nij_pair, nkl_pair, nmoj, nmol)
+    h5opts = _h5_filters(compression)
     if comp == 1:
-        chunks = (nmoj,nmol)
         h5d_eri = feri.create_dataset(dataname, (nij_pair,nkl_pair),
-                                      'f8', chunks=chunks)
+                                      'f8', chunks=chunks, **h5opts)
     else:
-        chunks = (1,nmoj,nmol)
         h5d_eri = feri.create_dataset(dataname, (comp,nij_pair,nkl_pair),
-                                      'f8', chunks=chunks)
+                                      'f8', chunks=(1,)+tuple(chunks), **h5opts)
 
     if nij_pair == 0 or nkl_pair == 0:
         if isinstance(erifile, str):
@@ -265,10 +299,9 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
               float(nij_pair)*nkl_pair*comp, nij_pair*nkl_pair*comp*8/1e6)
 
 # transform e1
-    swapfile = tempfile.NamedTemporaryFile(dir=tmpdir)
-    fswap = h5py.File(swapfile.name, 'w')
+    fswap = scratch.open_scratch(dir=tmpdir)
     half_e1(mol, mo_coeffs, fswap, intor, aosym, comp, max_memory, ioblk_size,
-            log, compact)
+            log, compact, compression=compression)
 
     time_1pass = log.timer('AO->MO transformation for %s 1 pass'%intor,
                            *time_0pass)
@@ -285,7 +318,15 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
     ao_loc = numpy.asarray(mol.ao_loc_nr(), dtype=numpy.int32)
     ti0 = time_1pass
     bufs1 = numpy.empty((iobuflen,nkl_pair))
-    buf = numpy.empty((iobuflen, nao_pair))
+# The next block of the half-transformed integrals is read in the background
+# while the current block is transformed.
+    def load_requests():
+        for row0, row1 in prange(0, nij_pair, iobuflen):
+            for icomp in range(comp):
+                h5g = fswap['%d'%icomp]
+                yield [(h5g[str(key)], numpy.s_[row0:row1])
+                       for key in range(len(h5g))]
+    bufs = pyscf.lib.prefetch_h5(load_requests())
     istep = 0
     for row0, row1 in prange(0, nij_pair, iobuflen):
         nrow = row1 - row0
@@ -296,11 +337,11 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
             log.debug('step 2 [%d/%d], [%d,%d:%d], row = %d', \
                       istep, ijmoblks, icomp, row0, row1, nrow)
 
-            buf = _load_from_h5g(fswap['%d'%icomp], row0, row1, buf)
+            buf = next(bufs)
             ti2 = log.timer('step 2 [%d/%d], load buf'%(istep,ijmoblks), *ti0)
             tioi += ti2[1]-ti0[1]
             pbuf = bufs1[:nrow]
-            _ao2mo.nr_e2_(buf[:nrow], mokl, klshape, aosym, klmosym,
+            _ao2mo.nr_e2_(buf, mokl, klshape, aosym, klmosym,
                           ao_loc=ao_loc, out=pbuf)
 
             tw1 = time.time()
@@ -327,7 +368,7 @@ def general(mol, mo_coeffs, erifile, dataname='eri_mo', tmpdir=None,
 def half_e1(mol, mo_coeffs, swapfile,
             intor='cint2e_sph', aosym='s4', comp=1,
             max_memory=2000, ioblk_size=256, verbose=logger.WARN, compact=True,
-            ao2mopt=None):
+            ao2mopt=None, compression=None, nworkers=None):
     r'''Half transform arbitrary spherical AO integrals to MO integrals
     for the given two sets of orbitals
 
@@ -374,6 +415,13 @@ def half_e1(mol, mo_coeffs, swapfile,
             and return the "plain" MO integrals
         ao2mopt : :class:`AO2MOpt` object
             Precomputed data to improve perfomance
+        compression : str
+            HDF5 compression filter ('lzf' or 'gzip') of the swap file.
+            Default is H5_COMPRESSION.
+        nworkers : int
+            Number of the threads to compute the shell ranges.  Each thread
+            has its own integral buffer.  The results are written to the swap
+            file by one background thread.  Default is HALF_E1_NWORKERS.
 
     Returns:
         None
@@ -408,8 +456,14 @@ def half_e1(mol, mo_coeffs, swapfile,
         moij = numpy.asarray(numpy.hstack((mo_coeffs[0],mo_coeffs[1])), order='F')
         ijshape = (0, nmoi, nmoi, nmoj)
 
+    if nworkers is None:
+        nworkers = HALF_E1_NWORKERS
+    nworkers = max(1, nworkers)
+# Each worker holds one AO buffer and one iobuf.  Two more iobufs are held by
+# the writer (being written and pending).
     e1buflen, mem_words, iobuf_words, ioblk_words = \
-            guess_e1bufsize(max_memory, ioblk_size, nij_pair, nao_pair, comp)
+            guess_e1bufsize(max_memory/(nworkers+1), ioblk_size, nij_pair,
+                            nao_pair, comp)
 # The buffer to hold AO integrals in C code, see line (@)
     aobuflen = int((mem_words - iobuf_words) // (nao_pair*comp))
     shranges = guess_shell_ranges(mol, e1buflen, aobuflen, aosym)
@@ -435,32 +489,48 @@ def half_e1(mol, mo_coeffs, swapfile,
     ti0 = log.timer('Initializing ao2mo.outcore.half_e1', *time0)
     nstep = len(shranges)
     maxbuflen = max([x[2] for x in shranges])
-    bufs1 = numpy.empty((comp*maxbuflen,nao_pair))
-    bufs2 = numpy.empty((comp*maxbuflen,nij_pair))
-    for istep,sh_range in enumerate(shranges):
-        log.debug('step 1 [%d/%d], AO [%d:%d], len(buf) = %d', \
-                  istep+1, nstep, *(sh_range[:3]))
-        buflen = sh_range[2]
-        iobuf = bufs2[:comp*buflen].reshape(comp,buflen,nij_pair)
-        nmic = len(sh_range[3])
-        p0 = 0
-        for imic, aoshs in enumerate(sh_range[3]):
-            log.debug1('      fill iobuf micro [%d/%d], AO [%d:%d], len(aobuf) = %d', \
-                       imic+1, nmic, *aoshs)
-            buf = bufs1[:comp*aoshs[2]] # (@)
-            _ao2mo.nr_e1fill_(intor, aoshs, mol._atm, mol._bas, mol._env,
-                              aosym, comp, ao2mopt, out=buf)
-            buf = _ao2mo.nr_e1_(buf, moij, ijshape, aosym, ijmosym)
-            iobuf[:,p0:p0+aoshs[2]] = buf.reshape(comp,aoshs[2],-1)
-            p0 += aoshs[2]
-        ti2 = log.timer('gen AO/transform MO [%d/%d]'%(istep+1,nstep), *ti0)
 
+    def save(istep, iobuf):
+        buflen = iobuf.shape[1]
         e2buflen, chunks = guess_e2bufsize(ioblk_size, nij_pair, buflen)
+        if not _h5_filters(compression):
+# The contiguous layout is the best for the row blocks read in step 2
+            chunks = None
         for icomp in range(comp):
             _transpose_to_h5g(fswap, '%d/%d'%(icomp,istep), iobuf[icomp],
-                              e2buflen, None)
-        ti0 = log.timer('transposing to disk', *ti2)
-    bufs1 = bufs2 = None
+                              e2buflen, chunks, compression)
+
+    def run(steps, writer):
+        bufs1 = numpy.empty((comp*maxbuflen,nao_pair))
+        for istep in steps:
+            ti1 = (time.clock(), time.time())
+            sh_range = shranges[istep]
+            log.debug('step 1 [%d/%d], AO [%d:%d], len(buf) = %d', \
+                      istep+1, nstep, *(sh_range[:3]))
+            buflen = sh_range[2]
+# A new iobuf for each step, the previous one is held by the writer
+            iobuf = numpy.empty((comp,buflen,nij_pair))
+            nmic = len(sh_range[3])
+            p0 = 0
+            for imic, aoshs in enumerate(sh_range[3]):
+                log.debug1('      fill iobuf micro [%d/%d], AO [%d:%d], len(aobuf) = %d', \
+                           imic+1, nmic, *aoshs)
+                buf = bufs1[:comp*aoshs[2]] # (@)
+                _ao2mo.nr_e1fill_(intor, aoshs, mol._atm, mol._bas, mol._env,
+                                  aosym, comp, ao2mopt, out=buf)
+                buf = _ao2mo.nr_e1_(buf, moij, ijshape, aosym, ijmosym)
+                iobuf[:,p0:p0+aoshs[2]] = buf.reshape(comp,aoshs[2],-1)
+                p0 += aoshs[2]
+            log.timer('gen AO/transform MO [%d/%d]'%(istep+1,nstep), *ti1)
+            writer.submit(save, istep, iobuf)
+
+    with pyscf.lib.background_writer() as writer:
+        if nworkers == 1:
+            run(range(nstep), writer)
+        else:
+            pyscf.lib.run_threads(run, [(range(i, nstep, nworkers), writer)
+                                        for i in range(nworkers)])
+    log.timer('AO->MO transformation and transposing to disk', *ti0)
     if isinstance(swapfile, str):
         fswap.close()
     return swapfile
@@ -475,18 +545,22 @@ def _load_from_h5g(h5group, row0, row1, out):
         col0 = col1
     return out
 
-def _transpose_to_h5g(h5group, key, dat, blksize, chunks=None):
+def _transpose_to_h5g(h5group, key, dat, blksize, chunks=None,
+                      compression=None):
     nrow, ncol = dat.shape
-    dset = h5group.create_dataset(key, (ncol,nrow), 'f8', chunks=chunks)
+    if chunks is not None:
+        chunks = (min(chunks[0], ncol), min(chunks[1], nrow))
+    dset = h5group.create_dataset(key, (ncol,nrow), 'f8', chunks=chunks,
+                                  **_h5_filters(compression))
     for col0, col1 in prange(0, ncol, blksize):
         dset[col0:col1] = pyscf.lib.transpose(dat[:,col0:col1])
 
 def full_iofree(mol, mo_coeff, intor='cint2e_sph', aosym='s4', comp=1,
                 verbose=logger.WARN, compact=True):
     r'''Transfer arbitrary spherical AO integrals to MO integrals for given orbitals
-    This function is a wrap for :func:`ao2mo.outcore.general`.  It's not really
-    IO free.  The returned MO integrals are held in memory.  For backward compatibility,
-    it is used to replace the non-existed function direct.full_iofree.
+    This function is a wrap for :func:`ao2mo.direct.general` or
+    :func:`ao2mo.outcore.general`, see :func:`general_iofree`.  The returned
+    MO integrals are held in memory.
 
     Args:
         mol : :class:`Mole` object
@@ -565,23 +639,18 @@ def full_iofree(mol, mo_coeff, intor='cint2e_sph', aosym='s4', comp=1,
     >>> print(eri1.shape)
     (3, 100, 55)
     '''
-    erifile = tempfile.NamedTemporaryFile()
-    with h5py.File(erifile.name, 'w') as feri:
-        general(mol, (mo_coeff,)*4, feri, dataname='eri_mo',
-                intor=intor, aosym=aosym, comp=comp,
-                verbose=verbose, compact=compact)
-        eri = numpy.asarray(feri['eri_mo'])
-        for key in feri.keys():
-            del(feri[key])
-        return eri
+    return general_iofree(mol, (mo_coeff,)*4, intor, aosym, comp,
+                          verbose, compact)
 
 def general_iofree(mol, mo_coeffs, intor='cint2e_sph', aosym='s4', comp=1,
                    verbose=logger.WARN, compact=True):
     r'''For the given four sets of orbitals, transfer arbitrary spherical AO
-    integrals to MO integrals on the fly.  This function is a wrap for
-    :func:`ao2mo.outcore.general`.  It's not really IO free.  The returned MO
-    integrals are held in memory.  For backward compatibility, it is used to
-    replace the non-existed function direct.general_iofree.
+    integrals to MO integrals.  This function is a wrap for
+    :func:`ao2mo.direct.general`, which does not create any intermediate file,
+    if the half-transformed integrals fit in mol.max_memory or the kl MO space
+    is small.  Otherwise it is a wrap for :func:`ao2mo.outcore.general`, and
+    the half-transformed integrals are stored in a temporary file.  The
+    returned MO integrals are held in memory.
 
     Args:
         mol : :class:`Mole` object
@@ -652,6 +721,12 @@ def general_iofree(mol, mo_coeffs, intor='cint2e_sph', aosym='s4', comp=1,
     >>> print(eri1.shape)
     (3, 100, 55)
     '''
+    from pyscf.ao2mo import direct
+    if direct.incore_efficient(mo_coeffs, intor, aosym, comp,
+                               mol.max_memory, compact):
+        return direct.general(mol, mo_coeffs, intor, aosym, comp,
+                              mol.max_memory, verbose, compact)
+
     erifile = tempfile.NamedTemporaryFile()
     with h5py.File(erifile.name, 'w') as feri:
         general(mol, mo_coeffs, feri, dataname='eri_mo',
@@ -692,6 +767,24 @@ def guess_e2bufsize(ioblk_size, nrows, ncols):
     chunks = (IOBUF_ROW_MIN, ncols)
     return e2buflen, chunks
 
+def _guess_chunks(nrows, ncols, row_blk, col_blk):
+    '''Chunks of row_blk rows.  The columns are extended in multiples of
+    col_blk up to H5_CHUNK_BYTES.
+    '''
+    row_blk = max(1, min(row_blk, nrows))
+    col_blk = max(1, min(col_blk, ncols))
+    ncol_chunk = int(H5_CHUNK_BYTES/8/row_blk) // col_blk * col_blk
+    return (row_blk, max(1, min(max(col_blk, ncol_chunk), ncols)))
+
+def _h5_filters(compression=None):
+    '''Keyword arguments of h5py create_dataset for the compression'''
+    if compression is None:
+        compression = H5_COMPRESSION
+    if compression:
+        return {'compression': compression, 'shuffle': True}
+    else:
+        return {}
+
 # based on the size of buffer, dynamic range of AO-shells for each buffer
 def guess_shell_ranges(mol, max_iobuf, max_aobuf, aosym):
     max_iobuf = max(1, max_iobuf)
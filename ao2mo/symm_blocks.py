@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+
+'''
+Point-group symmetry blocked AO->MO transformation.
+
+For the orbitals labelled by the irreps of D2h or its subgroups (the XOR
+irrep IDs of :func:`symm.label_orb_symm`), (ij|kl) is nonzero only if
+irrep(i)^irrep(j) == irrep(k)^irrep(l).  The 4-fold MO integrals are stored
+as a list of square blocks.  Block g holds the integrals between the pairs
+ij (i >= j) of pair-irrep g, in the order given by :func:`pair_index`.  Only
+these blocks are computed.
+
+The half-transformed integrals of all MO pairs are kept in memory, so this
+module is meant for active spaces (CASCI/CASSCF).  For full MO spaces, use
+:func:`ao2mo.outcore.full_iofree`.
+'''
+
+import time
+import numpy
+import pyscf.lib
+from pyscf.lib import logger
+from pyscf.ao2mo import _ao2mo
+from pyscf.ao2mo import direct
+from pyscf.ao2mo import addons
+
+def pair_irrep(orbsym):
+    '''Irreps of the pairs ij (i >= j) in the lower triangular order'''
+    orbsym = numpy.asarray(orbsym) % 10  # Dooh/Coov -> D2h/C2v
+    return (orbsym[:,None] ^ orbsym)[numpy.tril_indices(len(orbsym))]
+
+def pair_index(orbsym):
+    '''Indices of the lower triangular pairs for each pair-irrep.  The pairs
+    of the same irrep are kept in the lower triangular order.
+    '''
+    trilirrep = pair_irrep(orbsym)
+    nirrep = numpy.bincount(trilirrep).size
+    return [numpy.where(trilirrep == ir)[0] for ir in range(nirrep)]
+
+def full(eri_or_mol, mo_coeff, orbsym, max_memory=2000, verbose=logger.WARN):
+    r'''MO integrals (ij|kl) of the symmetry-allowed blocks.
+
+    Args:
+        eri_or_mol : ndarray or Mole object
+            AO integrals (4-fold or 8-fold symmetry) or the Mole object to
+            generate the AO integrals on the fly (see :mod:`ao2mo.direct`).
+        mo_coeff : ndarray
+            Orbital coefficients in 2D array
+        orbsym : list of int
+            Irrep IDs of the orbitals
+
+    Kwargs:
+        max_memory : float or int
+            The maximum memory (in MB) for the AO integral buffer.
+        verbose : int
+            Print level
+
+    Returns:
+        A list of 2D arrays.  The g-th array is the block of the MO pairs
+        with pair-irrep g, see :func:`pair_index`.  Use :func:`unpack` to
+        get the 4-fold MO integrals.
+
+    Examples:
+
+    >>> from pyscf import gto, scf, ao2mo, symm
+    >>> mol = gto.M(atom='O 0 0 0; H 0 -.757 .587; H 0 .757 .587',
+    ...             basis='ccpvdz', symmetry=True)
+    >>> mf = scf.RHF(mol)
+    >>> mf.scf()
+    >>> orbsym = symm.label_orb_symm(mol, mol.irrep_id, mol.symm_orb, mf.mo_coeff)
+    >>> eri = ao2mo.symm_blocks.full(mol, mf.mo_coeff, orbsym)
+    >>> len(eri)  # A1, A2, B1, B2 of C2v
+    4
+    '''
+    time0 = (time.clock(), time.time())
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    elif isinstance(eri_or_mol, numpy.ndarray):
+        log = logger.Logger(verbose=verbose)
+    else:
+        log = logger.Logger(eri_or_mol.stdout, verbose)
+
+    nao, nmo = mo_coeff.shape
+    npair = nmo * (nmo+1) // 2
+    idx = pair_index(orbsym)
+    log.debug('pair-irreps dims %s', [len(x) for x in idx])
+    eri = [numpy.zeros((len(x),len(x))) for x in idx]
+# The MO pairs are sorted by irrep once, so that each irrep is a contiguous
+# range [offsets[ir]:offsets[ir+1]] of the sorted pairs
+    order = numpy.hstack(idx)
+    offsets = numpy.append(0, numpy.cumsum([len(x) for x in idx]))
+
+    mo = numpy.asarray(mo_coeff, order='F')
+    ijshape = (0, nmo, 0, nmo)
+    nao_pair = nao * (nao+1) // 2
+    mem_now = pyscf.lib.current_memory()[0]
+    mem_words = (max_memory - mem_now) * 1e6 / 8 - npair**2 / len(idx)
+    e2incore = npair * nao_pair < mem_words * .5
+    if e2incore:
+# The half-transformed integrals of all AO kl pairs are held in memory, the
+# kl indices are transformed by nr_e2_ for the rows of each irrep.  Per AO
+# kl pair: the AO integrals and the half-transformed integrals
+        halfbuf = numpy.zeros((npair,nao_pair))
+        mem_words -= halfbuf.size + max([len(x) for x in idx]) * npair
+        blksize = max(1, int(mem_words // (nao_pair+npair)))
+    else:
+# Per AO kl pair: the AO integrals, the half-transformed integrals and the
+# kl coefficients
+        blksize = max(1, int(mem_words // (nao_pair+npair+nmo**2)))
+    log.debug('AO block %d, e2 incore %s', blksize, e2incore)
+
+    if isinstance(eri_or_mol, numpy.ndarray):
+        eri_ao = addons.restore(4, eri_or_mol, nao)
+        kltril = numpy.tril_indices(nao)
+        def gen_half():
+            for p0, p1 in pyscf.lib.prange(0, nao_pair, blksize):
+                half = _ao2mo.nr_e1_(eri_ao[p0:p1], mo, ijshape, 's4', 's2')
+                yield kltril[0][p0:p1], kltril[1][p0:p1], half[None]
+        blocks = gen_half()
+    else:
+        blocks = direct.half_e1(eri_or_mol, mo, ijshape, 's2', 'cint2e_sph',
+                                's4', 1, blksize, log)
+
+    for kidx, lidx, half in blocks:
+        half = half[0][:,order]
+        if e2incore:
+            halfbuf[:,kidx*(kidx+1)//2+lidx] = half.T
+        else:
+            ckl = direct._kl_coeff(mo, mo, kidx, lidx, 's4', True)[:,order]
+            for ir in range(len(idx)):
+                p0, p1 = offsets[ir], offsets[ir+1]
+                if p1 > p0:
+                    pyscf.lib.dot(half[:,p0:p1].T, ckl[:,p0:p1], 1, eri[ir], 1)
+        half = ckl = None
+
+    if e2incore:
+        for ir in range(len(idx)):
+            p0, p1 = offsets[ir], offsets[ir+1]
+            if p1 > p0:
+                buf = _ao2mo.nr_e2_(halfbuf[p0:p1], mo, ijshape, 's2kl', 's2')
+                eri[ir][:] = buf[:,idx[ir]]
+        halfbuf = buf = None
+    log.timer('symmetry blocked AO->MO transformation', *time0)
+    return eri
+
+def unpack(eri_blocks, orbsym):
+    '''Symmetry blocks to the 4-fold MO integrals'''
+    nmo = len(orbsym)
+    npair = nmo * (nmo+1) // 2
+    eri = numpy.zeros((npair,npair))
+    for pidx, blk in zip(pair_index(orbsym), eri_blocks):
+        eri[pidx[:,None],pidx] = blk
+    return eri
+
+def pack(eri, orbsym):
+    '''Symmetry blocks of the MO integrals (with 1-, 4- or 8-fold symmetry)'''
+    nmo = len(orbsym)
+    eri = addons.restore(4, eri, nmo)
+    return [eri[pidx[:,None],pidx] for pidx in pair_index(orbsym)]
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+    from pyscf import symm
+    from pyscf import ao2mo
+    mol = gto.M(
+        verbose = 0,
+        atom = [
+            ["O" , (0. , 0.     , 0.)],
+            [1   , (0. , -0.757 , 0.587)],
+            [1   , (0. , 0.757  , 0.587)]],
+        basis = 'ccpvdz',
+        symmetry = True)
+    mf = scf.RHF(mol)
+    mf.scf()
+    orbsym = symm.label_orb_symm(mol, mol.irrep_id, mol.symm_orb, mf.mo_coeff)
+    eri0 = ao2mo.incore.full(mf._eri, mf.mo_coeff)
+    eri1 = full(mol, mf.mo_coeff, orbsym)
+    print(numpy.allclose(eri0, unpack(eri1, orbsym)))
+    eri1 = full(mf._eri, mf.mo_coeff, orbsym)
+    print(numpy.allclose(eri0, unpack(eri1, orbsym)))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy
+from pyscf import gto
+from pyscf import ao2mo
+from pyscf.scf import _vhf
+
+mol = gto.Mole()
+mol.verbose = 0
+mol.output = None
+mol.atom = '''
+      o     0    0.       0
+      h     0    -0.757   0.587
+      h     0    0.757    0.587'''
+mol.basis = 'cc-pvdz'
+mol.build()
+nao = mol.nao_nr()
+eri = _vhf.int2e_sph(mol._atm, mol._bas, mol._env)
+numpy.random.seed(1)
+mo = numpy.random.random((nao,nao))
+
+class KnowValues(unittest.TestCase):
+    def test_full(self):
+        eri0 = ao2mo.incore.full(eri, mo[:,:6])
+        eri1 = ao2mo.direct.full(mol, mo[:,:6], max_memory=1)
+        self.assertTrue(numpy.allclose(eri0, eri1))
+        eri0 = ao2mo.incore.full(eri, mo[:,:6], compact=False)
+        eri1 = ao2mo.direct.full(mol, mo[:,:6], compact=False)
+        self.assertTrue(numpy.allclose(eri0, eri1))
+
+    def test_general(self):
+        mos = (mo[:,:9], mo[:,2:4], mo[:,4:7], mo[:,4:7])
+        eri0 = ao2mo.incore.general(eri, mos)
+        eri1 = ao2mo.direct.general(mol, mos, max_memory=1)
+        self.assertTrue(numpy.allclose(eri0, eri1))
+        mos = (mo[:,4:7], mo[:,4:7], mo[:,:9], mo[:,2:4])
+        eri0 = ao2mo.incore.general(eri, mos)
+        eri1 = ao2mo.direct.general(mol, mos)
+        self.assertTrue(numpy.allclose(eri0, eri1))
+        eri0 = ao2mo.incore.general(eri, mos, compact=False)
+        for aosym in ('s1', 's2ij', 's2kl'):
+            eri1 = ao2mo.direct.general(mol, mos, aosym=aosym, compact=False)
+            self.assertTrue(numpy.allclose(eri0, eri1))
+
+    def test_full_mo_space(self):
+        eri0 = ao2mo.incore.full(eri, mo)
+        eri1 = ao2mo.direct.full(mol, mo)
+        self.assertTrue(numpy.allclose(eri0, eri1))
+        self.assertTrue(ao2mo.direct.incore_efficient((mo,)*4, max_memory=2000))
+        self.assertFalse(ao2mo.direct.incore_efficient((mo,)*4, max_memory=1))
+        self.assertTrue(ao2mo.direct.incore_efficient((mo[:,:6],)*4, max_memory=1))
+
+    def test_iofree_outcore(self):
+        eri0 = ao2mo.incore.full(eri, mo)
+        mol.max_memory, max_memory = 1, mol.max_memory
+        try:
+            eri1 = ao2mo.outcore.full_iofree(mol, mo)
+        finally:
+            mol.max_memory = max_memory
+        self.assertTrue(numpy.allclose(eri0, eri1))
+
+    def test_ip1(self):
+        mos = (mo[:,:5], mo[:,:3], mo[:,:4], mo[:,:4])
+        eri0 = ao2mo.outcore.general_iofree(mol, mos, intor='cint2e_ip1_sph',
+                                            aosym='s2kl', comp=3)
+        eri1 = ao2mo.direct.general(mol, mos, intor='cint2e_ip1_sph',
+                                    aosym='s1', comp=3)
+        self.assertEqual(eri0.shape, (3,15,10))
+        self.assertEqual(eri1.shape, (3,15,16))
+        idx = numpy.tril_indices(4)
+        eri1 = eri1.reshape(3,15,4,4)[:,:,idx[0],idx[1]]
+        self.assertTrue(numpy.allclose(eri0, eri1))
+
+
+if __name__ == '__main__':
+    print('Full Tests for ao2mo.direct')
+    unittest.main()
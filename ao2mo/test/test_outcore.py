@@ -116,6 +116,28 @@ class KnowValues(unittest.TestCase):
         eri1 = eri1.reshape(nao,nao,nao,nao)
         self.assertTrue(numpy.allclose(eri1, eriref))
 
+    def test_compression(self):
+        ftmp = tempfile.NamedTemporaryFile()
+        eri0 = ao2mo.outcore.full_iofree(mol, mo, compact=False)
+        ao2mo.outcore.full(mol, mo, ftmp.name, max_memory=10, ioblk_size=5,
+                           compact=False, compression='lzf')
+        with h5py.File(ftmp.name, 'r') as feri:
+            self.assertEqual(feri['eri_mo'].compression, 'lzf')
+            self.assertEqual(feri['eri_mo'].chunks[0], nao)
+            self.assertTrue(numpy.allclose(feri['eri_mo'], eri0))
+
+    def test_half_e1_nworkers(self):
+        ftmp = tempfile.NamedTemporaryFile()
+        with h5py.File(ftmp.name, 'w') as f:
+            ao2mo.outcore.half_e1(mol, (mo,mo), f.create_group('a'),
+                                  max_memory=.4, nworkers=1)
+            ao2mo.outcore.half_e1(mol, (mo,mo), f.create_group('b'),
+                                  max_memory=.8, nworkers=3)
+            self.assertTrue(len(f['a/0']) > 3)
+            self.assertEqual(len(f['a/0']), len(f['b/0']))
+            for key in f['a/0']:
+                self.assertTrue(numpy.allclose(f['a/0'][key], f['b/0'][key]))
+
 def s2ij_s1(symmetry, eri, norb):
     idx = numpy.tril_indices(norb)
     eri1 = numpy.empty((norb,norb,norb,norb))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy
+from pyscf import gto
+from pyscf import scf
+from pyscf import symm
+from pyscf import ao2mo
+
+mol = gto.Mole()
+mol.verbose = 0
+mol.output = None
+mol.atom = '''
+      o     0    0.       0
+      h     0    -0.757   0.587
+      h     0    0.757    0.587'''
+mol.basis = 'cc-pvdz'
+mol.symmetry = True
+mol.build()
+mf = scf.RHF(mol)
+mf.scf()
+orbsym = symm.label_orb_symm(mol, mol.irrep_id, mol.symm_orb, mf.mo_coeff)
+
+class KnowValues(unittest.TestCase):
+    def test_pair_index(self):
+        idx = ao2mo.symm_blocks.pair_index(orbsym)
+        self.assertEqual(len(idx), 4)
+        self.assertEqual(sum([len(x) for x in idx]), 24*25//2)
+
+    def test_full(self):
+        eri0 = ao2mo.incore.full(mf._eri, mf.mo_coeff)
+        eri1 = ao2mo.symm_blocks.full(mol, mf.mo_coeff, orbsym, max_memory=1)
+        self.assertTrue(numpy.allclose(ao2mo.symm_blocks.unpack(eri1, orbsym), eri0))
+        eri1 = ao2mo.symm_blocks.full(mf._eri, mf.mo_coeff, orbsym)
+        self.assertTrue(numpy.allclose(ao2mo.symm_blocks.unpack(eri1, orbsym), eri0))
+        for b0, b1 in zip(ao2mo.symm_blocks.pack(eri0, orbsym), eri1):
+            self.assertTrue(numpy.allclose(b0, b1))
+
+
+if __name__ == '__main__':
+    print('Full Tests for ao2mo.symm_blocks')
+    unittest.main()
@@ -3,8 +3,8 @@
 # Author: Qiming Sun <osirpt.sun@gmail.com>
 #
 
+import os
 import time
-import tempfile
 from functools import reduce
 import numpy
 import h5py
@@ -12,6 +12,7 @@ from pyscf import lib
 from pyscf.lib import logger
 import pyscf.ao2mo
 from pyscf.cc import _ccsd
+from pyscf.cc import chkfile
 
 BLKMIN = 4
 
@@ -25,7 +26,16 @@ def kernel(cc, eris, t1=None, t2=None, max_cycle=50, tol=1e-8, tolnormt=1e-6,
     else:
         log = logger.Logger(cc.stdout, verbose)
 
-    if t1 is None and t2 is None:
+    snapshot = None
+    if cc.restart and cc.chkfile:
+        snapshot = chkfile.load_amps(cc.chkfile, 'ccsd', eris.mo_coeff)
+        if snapshot is None:
+            log.warn('CCSD snapshot for the orbitals is not found in %s',
+                     cc.chkfile)
+    if snapshot is not None:
+        t1 = snapshot['t1']
+        t2 = snapshot['t2']
+    elif t1 is None and t2 is None:
         t1, t2 = cc.init_amps(eris)[1:]
     elif t1 is None:
         t1 = numpy.zeros((nocc,nvir))
@@ -42,8 +52,16 @@ def kernel(cc, eris, t1=None, t2=None, max_cycle=50, tol=1e-8, tolnormt=1e-6,
     else:
         adiis = lambda t1,t2,*args: (t1,t2)
 
+    istep0 = 0
+    if snapshot is not None:
+        istep0 = snapshot['istep'] + 1
+        eccsd = snapshot['e_corr']
+        chkfile.restore_diis(adiis, cc.chkfile, 'ccsd')
+        log.info('Restart CCSD from the snapshot of istep %d in %s',
+                 istep0-1, cc.chkfile)
+
     conv = False
-    for istep in range(max_cycle):
+    for istep in range(istep0, max_cycle):
         t1new, t2new = cc.update_amps(t1, t2, eris, max_memory)
         normt = numpy.linalg.norm(t1new-t1) + numpy.linalg.norm(t2new-t2)
         t1, t2 = t1new, t2new
@@ -53,6 +71,9 @@ def kernel(cc, eris, t1=None, t2=None, max_cycle=50, tol=1e-8, tolnormt=1e-6,
         eold, eccsd = eccsd, energy(cc, t1, t2, eris)
         log.info('istep = %d  E(CCSD) = %.15g  dE = %.9g  norm(t1,t2) = %.6g',
                  istep, eccsd, eccsd - eold, normt)
+        if cc.chkfile and cc.chk_cycle > 0 and (istep+1) % cc.chk_cycle == 0:
+            chkfile.dump_amps(cc, 'ccsd', {'t1': t1, 't2': t2}, istep,
+                              eccsd, adiis, eris.mo_coeff)
         cput1 = log.timer('CCSD iter', *cput1)
         if abs(eccsd-eold) < tol and normt < tolnormt:
             conv = True
@@ -409,6 +430,19 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         self.diis_start_energy_diff = 1e9
 
         self.frozen = frozen
+# If direct is True, the vvvv integrals are not transformed.  The ladder term
+# is evaluated with the AO integrals generated on the fly.
+        self.direct = False
+# If chkfile is given, the amplitudes and DIIS vectors are saved in chkfile
+# (the lambda amplitudes in chkfile.ccsd_lambda) every chk_cycle iterations.
+# The other data in chkfile (e.g. the SCF results) are kept.  If restart is
+# True, the CCSD and lambda iterations continue from the snapshots generated
+# for the same orbitals, and the integrals are loaded from erifile if the
+# file was generated for the same orbitals.
+        self.chkfile = None
+        self.chk_cycle = 1
+        self.restart = False
+        self.erifile = None
 
 ##################################################
 # don't modify the following attributes, they are not input options
@@ -452,6 +486,11 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         log.info('CAS nocc = %d, nvir = %d', nocc, nvir)
         if self.frozen:
             log.info('frozen orbitals %s', str(self.frozen))
+        log.info('direct = %s', self.direct)
+        log.info('chkfile = %s', self.chkfile)
+        log.info('chk_cycle = %d', self.chk_cycle)
+        log.info('restart = %s', self.restart)
+        log.info('erifile = %s', self.erifile)
         log.info('max_cycle = %d', self.max_cycle)
         log.info('conv_tol = %g', self.conv_tol)
         log.info('conv_tol_normt = %s', self.conv_tol_normt)
@@ -520,6 +559,15 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
                                    verbose=self.verbose)
         return conv, self.l1, self.l2
 
+    def ccsd_t(self, t1=None, t2=None, mo_coeff=None, eris=None):
+        '''(T) energy correction'''
+        from pyscf.cc import ccsd_t
+        if t1 is None: t1 = self.t1
+        if t2 is None: t2 = self.t2
+        if eris is None: eris = self.ao2mo(mo_coeff)
+        return ccsd_t.kernel(self, eris, t1, t2, max_memory=self.max_memory,
+                             verbose=self.verbose)
+
     def make_rdm1(self, t1=None, t2=None, l1=None, l2=None):
         '''1-particle density matrix in MO space'''
         from pyscf.cc import ccsd_rdm
@@ -574,6 +622,9 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
             tau[p0:p0+i+1] += t2[i,:i+1]
             p0 += i + 1
         time0 = logger.timer_debug1(self, 'vvvv-tau', *time0)
+        if self.direct:
+            orbv = eris.mo_coeff[:,nocc:]
+            return _add_vvvv_direct_(self, tau, orbv, t2new_tril, max_memory)
 
         p0 = 0
         outbuf = numpy.empty((nvir,nvir,nvir))
@@ -621,32 +672,112 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
 
 CC = CCSD
 
+def _add_vvvv_direct_(mycc, tau, orbv, t2new_tril, max_memory=2000):
+    '''Ladder term with the AO integrals.  tau is transformed to AO basis,
+    contracted with the AO integrals of each block of shell pairs (with
+    Schwarz screening), then transformed back to MO basis.
+    '''
+    #: t2new_tril[x] += numpy.einsum('cd,acbd->ab', tau[x], vvvv)
+    #:               += C[p,a] (pq|rs) C[q,c] tau[x,c,d] C[s,d] C[r,b]
+    time0 = time.clock(), time.time()
+    log = logger.Logger(mycc.stdout, mycc.verbose)
+    mol = mycc.mol
+    nao, nvir = orbv.shape
+    ntau = tau.shape[0]
+    orbv = numpy.asarray(orbv, order='C')
+
+# tauT[s,q,x] = tau_AO[x,q,s],  xT[r,p,x] = X[x,p,r]
+    tmp = lib.dot(tau.reshape(-1,nvir), orbv.T).reshape(ntau,nvir,nao)
+    tmp = numpy.asarray(tmp.transpose(1,0,2), order='C').reshape(nvir,-1)
+    tmp = lib.dot(orbv, tmp).reshape(nao,ntau,nao)
+    tauT = numpy.asarray(tmp.transpose(2,0,1), order='C')
+    tmp = None
+    xT = numpy.zeros_like(tauT)
+    time0 = log.timer_debug1('vvvv-tau AO', *time0)
+
+    mem_now = lib.current_memory()[0]
+    max_memory = max(0, max_memory - mem_now)
+    nao_pair = nao * (nao+1) // 2
+    blksize = int(max_memory*1e6/8 / (nao_pair+nao**2*2))
+    blksize = max(BLKMIN**2, blksize)
+    log.debug1('AO-direct vvvv, AO pair block %d', blksize)
+
+    ao_loc = mol.ao_loc_nr()
+    for klsh0, klsh1, aobuf in pyscf.ao2mo.direct.ao_e1(mol, 'cint2e_sph', 's4',
+                                                         1, blksize, log):
+        eri = _ccsd.unpack_tril(aobuf[0])
+        row0 = 0
+        for kl in range(klsh0, klsh1):
+            ksh, lsh = pyscf.ao2mo._ao2mo._extract_pair(kl)
+            k0, k1 = ao_loc[ksh], ao_loc[ksh+1]
+            l0, l1 = ao_loc[lsh], ao_loc[lsh+1]
+            dk = k1 - k0
+            dl = l1 - l0
+            if ksh == lsh:
+                nrow = dk * (dk+1) // 2
+                idx = numpy.tril_indices(dk)
+                g = numpy.empty((dk,dk,nao,nao))
+                g[idx[0],idx[1]] = eri[row0:row0+nrow]
+                g[idx[1],idx[0]] = eri[row0:row0+nrow]
+                #: xT[r,p] += numpy.einsum('rspq,sqx->px', g, tauT)
+                g = numpy.asarray(g.transpose(0,2,1,3), order='C')
+                lib.dot(g.reshape(dk*nao,-1), tauT[k0:k1].reshape(dk*nao,-1),
+                        1, xT[k0:k1].reshape(dk*nao,-1), 1)
+            else:
+                nrow = dk * dl
+                g = eri[row0:row0+nrow].reshape(dk,dl,nao,nao)
+                g1 = numpy.asarray(g.transpose(0,2,1,3), order='C')
+                lib.dot(g1.reshape(dk*nao,-1), tauT[l0:l1].reshape(dl*nao,-1),
+                        1, xT[k0:k1].reshape(dk*nao,-1), 1)
+                # (pq|rs) = (pq|sr)
+                g1 = numpy.asarray(g.transpose(1,2,0,3), order='C')
+                lib.dot(g1.reshape(dl*nao,-1), tauT[k0:k1].reshape(dk*nao,-1),
+                        1, xT[l0:l1].reshape(dl*nao,-1), 1)
+            row0 += nrow
+        eri = g = g1 = None
+    tauT = None
+    time0 = log.timer_debug1('vvvv-AO contraction', *time0)
+
+    tmp = lib.dot(orbv.T, xT.reshape(nao,-1)).reshape(nvir,nao,ntau)
+    xT = None
+    tmp = numpy.asarray(tmp.transpose(1,0,2), order='C').reshape(nao,-1)
+    tmp = lib.dot(orbv.T, tmp).reshape(nvir,nvir,ntau)
+    t2new_tril += tmp.transpose(2,0,1)
+    return t2new_tril
+
 class _ERIS:
     def __init__(self, cc, mo_coeff=None, method='incore'):
         cput0 = (time.clock(), time.time())
-        moidx = numpy.ones(cc.mo_energy.size, dtype=numpy.bool)
-        if isinstance(cc.frozen, (int, numpy.integer)):
-            moidx[:cc.frozen] = False
-        elif len(cc.frozen) > 0:
-            moidx[numpy.asarray(cc.frozen)] = False
-        if mo_coeff is None:
-            self.mo_coeff = mo_coeff = cc.mo_coeff[:,moidx]
-            self.fock = numpy.diag(cc.mo_energy[moidx])
-        else:  # If mo_coeff is not canonical orbital
-            self.mo_coeff = mo_coeff = mo_coeff[:,moidx]
-            dm = cc._scf.make_rdm1(cc.mo_coeff, cc.mo_occ)
-            fockao = cc._scf.get_hcore() + cc._scf.get_veff(cc.mol, dm)
-            self.fock = reduce(numpy.dot, (mo_coeff.T, fockao, mo_coeff))
+        mo_coeff = self._common_init_(cc, mo_coeff)
 
         nocc = cc.nocc()
         nmo = cc.nmo()
         nvir = nmo - nocc
         mem_incore, mem_outcore, mem_basic = _mem_usage(nocc, nvir)
+        if cc.direct:
+            mem_incore -= nvir**4/4*8/1e6
         mem_now = pyscf.lib.current_memory()[0]
 
         log = logger.Logger(cc.stdout, cc.verbose)
-        if (method == 'incore' and cc._scf._eri is not None and
-            (mem_incore+mem_now < cc.max_memory) or cc.mol.incore_anyway):
+        if (cc.restart and cc.erifile and
+            _erifile_matches(cc.erifile, mo_coeff, cc.direct)):
+            log.info('Load CCSD integrals from %s', cc.erifile)
+            self._erifile = cc.erifile
+            self.feri1 = h5py.File(cc.erifile, 'r')
+            self.fock = self.feri1['fock'].value
+            self.oooo = self.feri1['oooo']
+            self.ooov = self.feri1['ooov']
+            self.ovoo = self.feri1['ovoo']
+            self.oovv = self.feri1['oovv']
+            self.ovov = self.feri1['ovov']
+            self.ovvv = self.feri1['ovvv']
+            if cc.direct:
+                self.vvvv = None
+            else:
+                self.vvvv = self.feri1['vvvv']
+        elif (not cc.erifile and
+              (method == 'incore' and cc._scf._eri is not None and
+               (mem_incore+mem_now < cc.max_memory) or cc.mol.incore_anyway)):
             eri1 = pyscf.ao2mo.incore.full(cc._scf._eri, mo_coeff)
             #:eri1 = pyscf.ao2mo.restore(1, eri1, nmo)
             #:self.oooo = eri1[:nocc,:nocc,:nocc,:nocc].copy()
@@ -667,7 +798,10 @@ class _ERIS:
             self.oovv = numpy.empty((nocc,nocc,nvir,nvir))
             self.ovov = numpy.empty((nocc,nvir,nocc,nvir))
             self.ovvv = numpy.empty((nocc,nvir,nvir_pair))
-            self.vvvv = numpy.empty((nvir_pair,nvir_pair))
+            if cc.direct:
+                self.vvvv = None
+            else:
+                self.vvvv = numpy.empty((nvir_pair,nvir_pair))
             ij = 0
             outbuf = numpy.empty((nmo,nmo,nmo))
             for i in range(nocc):
@@ -684,15 +818,19 @@ class _ERIS:
                 self.ovov[:,i-nocc] = buf[:nocc,:nocc,nocc:]
                 for j in range(nocc):
                     self.ovvv[j,i-nocc] = lib.pack_tril(_cp(buf[j,nocc:,nocc:]))
-                for j in range(nocc, i+1):
-                    self.vvvv[ij1] = lib.pack_tril(_cp(buf[j,nocc:,nocc:]))
-                    ij1 += 1
+                if self.vvvv is not None:
+                    for j in range(nocc, i+1):
+                        self.vvvv[ij1] = lib.pack_tril(_cp(buf[j,nocc:,nocc:]))
+                        ij1 += 1
                 ij += i + 1
         else:
             cput1 = time.clock(), time.time()
-            _tmpfile1 = tempfile.NamedTemporaryFile()
-            _tmpfile2 = tempfile.NamedTemporaryFile()
-            self.feri1 = h5py.File(_tmpfile1.name)
+# The integrals are kept in erifile for restart
+            if cc.erifile:
+                self._erifile = cc.erifile
+                self.feri1 = h5py.File(cc.erifile, 'w')
+            else:
+                self.feri1 = lib.scratch.open_scratch()
             orbo = mo_coeff[:,:nocc]
             orbv = mo_coeff[:,nocc:]
             nvpair = nvir * (nvir+1) // 2
@@ -703,22 +841,32 @@ class _ERIS:
             self.ovov = self.feri1.create_dataset('ovov', (nocc,nvir,nocc,nvir), 'f8')
             self.ovvv = self.feri1.create_dataset('ovvv', (nocc,nvir,nvpair), 'f8')
 
-            max_memory = max(2000,cc.max_memory-pyscf.lib.current_memory()[0])
-            self.feri2 = h5py.File(_tmpfile2.name, 'w')
-            pyscf.ao2mo.full(cc.mol, orbv, self.feri2, max_memory=max_memory, verbose=log)
-            self.vvvv = self.feri2['eri_mo']
-            cput1 = log.timer_debug1('transforming vvvv', *cput1)
+            if cc.direct:
+                self.vvvv = None
+            elif cc.erifile:
+                max_memory = max(2000,cc.max_memory-pyscf.lib.current_memory()[0])
+                pyscf.ao2mo.full(cc.mol, orbv, self.feri1, dataname='vvvv',
+                                 max_memory=max_memory, verbose=log)
+                self.vvvv = self.feri1['vvvv']
+                cput1 = log.timer_debug1('transforming vvvv', *cput1)
+            else:
+                max_memory = max(2000,cc.max_memory-pyscf.lib.current_memory()[0])
+                self.feri2 = lib.scratch.open_scratch()
+                pyscf.ao2mo.full(cc.mol, orbv, self.feri2, max_memory=max_memory, verbose=log)
+                self.vvvv = self.feri2['eri_mo']
+                cput1 = log.timer_debug1('transforming vvvv', *cput1)
 
-            tmpfile3 = tempfile.NamedTemporaryFile()
-            with h5py.File(tmpfile3.name, 'w') as feri:
+            with lib.scratch.open_scratch() as feri:
                 max_memory = max(2000, cc.max_memory-pyscf.lib.current_memory()[0])
                 pyscf.ao2mo.general(cc.mol, (orbo,mo_coeff,mo_coeff,mo_coeff),
                                     feri, max_memory=max_memory, verbose=log)
                 cput1 = log.timer_debug1('transforming oppp', *cput1)
                 eri1 = feri['eri_mo']
                 outbuf = numpy.empty((nmo,nmo,nmo))
+                bufs = lib.prefetch_h5((eri1, numpy.s_[i*nmo:(i+1)*nmo])
+                                       for i in range(nocc))
                 for i in range(nocc):
-                    buf = _ccsd.unpack_tril(_cp(eri1[i*nmo:(i+1)*nmo]), out=outbuf)
+                    buf = _ccsd.unpack_tril(next(bufs), out=outbuf)
                     self.oooo[i] = buf[:nocc,:nocc,:nocc]
                     self.ooov[i] = buf[:nocc,:nocc,nocc:]
                     self.ovoo[i] = buf[nocc:,:nocc,:nocc]
@@ -728,15 +876,49 @@ class _ERIS:
                     cput1 = log.timer_debug1('sorting %d'%i, *cput1)
                 for key in feri.keys():
                     del(feri[key])
+            if cc.erifile:
+# mo_coeff is written last.  It marks a complete erifile.
+                self.feri1['fock'] = self.fock
+                self.feri1['mo_coeff'] = mo_coeff
+                self.feri1.flush()
         log.timer('CCSD integral transformation', *cput0)
 
+    def _common_init_(self, cc, mo_coeff=None):
+        '''Set the orbitals (without the frozen orbitals) and the Fock matrix'''
+        self._erifile = None
+        moidx = numpy.ones(cc.mo_energy.size, dtype=numpy.bool)
+        if isinstance(cc.frozen, (int, numpy.integer)):
+            moidx[:cc.frozen] = False
+        elif len(cc.frozen) > 0:
+            moidx[numpy.asarray(cc.frozen)] = False
+        if mo_coeff is None:
+            self.mo_coeff = mo_coeff = cc.mo_coeff[:,moidx]
+            self.fock = numpy.diag(cc.mo_energy[moidx])
+        else:  # If mo_coeff is not canonical orbital
+            self.mo_coeff = mo_coeff = mo_coeff[:,moidx]
+            dm = cc._scf.make_rdm1(cc.mo_coeff, cc.mo_occ)
+            fockao = cc._scf.get_hcore() + cc._scf.get_veff(cc.mol, dm)
+            self.fock = reduce(numpy.dot, (mo_coeff.T, fockao, mo_coeff))
+        return mo_coeff
+
     def __del__(self):
         if hasattr(self, 'feri1'):
-            for key in self.feri1.keys(): del(self.feri1[key])
-            for key in self.feri2.keys(): del(self.feri2[key])
+            if self._erifile is None:
+                for key in self.feri1.keys(): del(self.feri1[key])
             self.feri1.close()
+        if hasattr(self, 'feri2'):
+            for key in self.feri2.keys(): del(self.feri2[key])
             self.feri2.close()
 
+def _erifile_matches(erifile, mo_coeff, direct=False):
+    '''Whether erifile has the complete integrals of mo_coeff'''
+    if not (os.path.isfile(erifile) and h5py.is_hdf5(erifile)):
+        return False
+    with h5py.File(erifile, 'r') as f:
+        if 'mo_coeff' not in f or (not direct and 'vvvv' not in f):
+            return False
+        return chkfile.mo_coeff_matches(f['mo_coeff'].value, mo_coeff)
+
 
 # assume nvir > nocc, minimal requirements on memory in loop of update_amps
 def _memory_usage_inloop(nocc, nvir):
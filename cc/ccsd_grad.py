@@ -4,6 +4,7 @@
 #
 
 import time
+import copy
 import ctypes
 import _ctypes
 import tempfile
@@ -21,12 +22,26 @@ from pyscf.scf import cphf
 
 BLKSIZE = 192
 
+def _make_eris(mycc):
+    '''The gradients need the vvvv integrals.  When the CCSD object is
+    AO-direct (mycc.direct), the vvvv-bearing integrals are built for the
+    gradients.'''
+    if getattr(mycc, 'direct', False):
+        logger.info(mycc, 'CCSD.direct is set.  vvvv integrals are generated '
+                    'for the CCSD gradients')
+        mycc = copy.copy(mycc)
+        mycc.direct = False
+    return ccsd._ERIS(mycc)
+
 
 def IX_intermediates(mycc, t1, t2, l1, l2, eris=None, d1=None, d2=None,
                      max_memory=2000):
     if eris is None:
 # Note eris are in Chemist's notation
-        eris = ccsd._ERIS(mycc)
+        eris = _make_eris(mycc)
+    if eris.vvvv is None:
+        raise ValueError('CCSD gradients require the vvvv integrals.  The '
+                         'eris generated with CCSD.direct = True have no vvvv')
     if d1 is None:
         d1 = ccsd_rdm.gamma1_intermediates(mycc, t1, t2, l1, l2, max_memory)
     doo, dov, dvo, dvv = d1
@@ -239,7 +254,7 @@ def IX_intermediates(mycc, t1, t2, l1, l2, eris=None, d1=None, d2=None,
 def response_dm1(mycc, t1, t2, l1, l2, eris=None, IX=None, max_memory=2000):
     if eris is None:
 # Note eris are in Chemist's notation
-        eris = ccsd._ERIS(mycc)
+        eris = _make_eris(mycc)
     if IX is None:
         Ioo, Ivv, Ivo, Xvo = IX_intermediates(mycc, t1, t2, l1, l2, eris,
                                               max_memory=2000)
@@ -286,7 +301,7 @@ def kernel(mycc, t1=None, t2=None, l1=None, l2=None, eris=None, atmlst=None,
     if t2 is None: t2 = mycc.t2
     if l1 is None: l1 = mycc.l1
     if l2 is None: l2 = mycc.l2
-    if eris is None: eris = ccsd._ERIS(mycc)
+    if eris is None: eris = _make_eris(mycc)
     if mf_grad is None:
         mf_grad = rhf_grad.Gradients(mycc._scf)
 
@@ -14,6 +14,7 @@ from pyscf.lib import logger
 import pyscf.ao2mo
 from pyscf.cc import ccsd
 from pyscf.cc import _ccsd
+from pyscf.cc import chkfile
 
 # t2,l2 as ijab
 
@@ -32,6 +33,13 @@ def kernel(mycc, eris, t1=None, t2=None, l1=None, l2=None,
     if l2 is None: l2 = t2
 
     nocc, nvir = t1.shape
+    snapshot = None
+    if mycc.restart and mycc.chkfile:
+        snapshot = chkfile.load_amps(mycc.chkfile, 'ccsd_lambda',
+                                     eris.mo_coeff)
+        if snapshot is None:
+            log.warn('CCSD lambda snapshot for the orbitals is not found in %s',
+                     chkfile.snapshot_file(mycc.chkfile, 'ccsd_lambda'))
     saved = make_intermediates(mycc, t1, t2, eris, max_memory)
 
     if mycc.diis:
@@ -39,10 +47,19 @@ def kernel(mycc, eris, t1=None, t2=None, l1=None, l2=None,
         adiis.space = mycc.diis_space
     else:
         adiis = lambda t1,t2,*args: (t1, t2)
+
+    istep0 = 0
+    if snapshot is not None:
+        l1 = snapshot['l1']
+        l2 = snapshot['l2']
+        istep0 = snapshot['istep'] + 1
+        chkfile.restore_diis(adiis, mycc.chkfile, 'ccsd_lambda')
+        log.info('Restart CCSD lambda from the snapshot of istep %d in %s',
+                 istep0-1, mycc.chkfile)
     cput0 = log.timer('CCSD lambda initialization', *cput0)
 
     conv = False
-    for istep in range(max_cycle):
+    for istep in range(istep0, max_cycle):
         l1new, l2new = update_amps(mycc, t1, t2, l1, l2, eris, saved,
                                    max_memory)
         normt = numpy.linalg.norm(l1new-l1) + numpy.linalg.norm(l2new-l2)
@@ -51,6 +68,10 @@ def kernel(mycc, eris, t1=None, t2=None, l1=None, l2=None,
         if mycc.diis:
             l1, l2 = mycc.diis(l1, l2, istep, normt, 0, adiis)
         log.info('istep = %d  norm(lambda1,lambda2) = %.6g', istep, normt)
+        if (mycc.chkfile and mycc.chk_cycle > 0 and
+            (istep+1) % mycc.chk_cycle == 0):
+            chkfile.dump_amps(mycc, 'ccsd_lambda', {'l1': l1, 'l2': l2},
+                              istep, 0, adiis, eris.mo_coeff)
         cput0 = log.timer('CCSD iter', *cput0)
         if normt < tol:
             conv = True
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+RHF-CCSD(T)
+
+The triples are evaluated for the occupied triples i >= j >= k.  For each
+triple, the virtual indices are held in (nvir,nvir,nvir) arrays.  The
+occupied indices are divided into blocks.  The ovvv integrals of three
+blocks are held in memory at a time.  The triples of a block are
+distributed over threads.
+'''
+
+import time
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf.cc import _ccsd
+
+BLKMIN = 1
+# Number of the threads to evaluate the occupied triples.  The GEMMs release
+# the GIL.  The default is one thread, which leaves the parallelism to BLAS.
+NTHREADS = 1
+
+# JCP, 94, 442.  Error in Eq (1), should be [ia] >= [jb] >= [kc]
+def kernel(mycc, eris, t1=None, t2=None, max_memory=2000,
+           verbose=logger.INFO, nthreads=None):
+    '''(T) energy correction.  The same energy as ccsd_t_slow.kernel.
+    '''
+    cpu0 = (time.clock(), time.time())
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(mycc.stdout, verbose)
+    if t1 is None: t1 = mycc.t1
+    if t2 is None: t2 = mycc.t2
+    if nthreads is None: nthreads = NTHREADS
+    nthreads = max(1, nthreads)
+
+    nocc, nvir = t1.shape
+    mo_e = eris.fock.diagonal()
+    eia = mo_e[:nocc,None] - mo_e[None,nocc:]
+    t2 = numpy.asarray(t2)
+# t2T[k] = t2[:,k], ooov[i,j] = ovoo[i,:,j].T
+    t2T = numpy.asarray(t2.transpose(1,0,2,3), order='C')
+    eris_ooov = numpy.asarray(numpy.asarray(eris.ovoo).transpose(0,2,3,1), order='C')
+    eris_ovov = numpy.asarray(eris.ovov)
+
+# Three blocks of unpacked ovvv, and the work arrays of each thread
+    mem_now = lib.current_memory()[0]
+    max_memory = max(0, max_memory - mem_now)
+    blksize = int((max_memory*1e6/8 - nthreads*nvir**3*12) / (3*nvir**3))
+    blksize = min(nocc, max(BLKMIN, blksize))
+    log.debug('ccsd_t: occ block size %d, nthreads %d', blksize, nthreads)
+
+    ovvv_blocks = {}
+    def load_ovvv(p0, p1):
+        if (p0,p1) not in ovvv_blocks:
+            buf = _ccsd.unpack_tril(numpy.asarray(eris.ovvv[p0:p1]).reshape((p1-p0)*nvir,-1))
+            ovvv_blocks[(p0,p1)] = (p0, buf.reshape(p1-p0,nvir,nvir,nvir))
+        return ovvv_blocks[(p0,p1)]
+
+    def contract(ovvv, tasks, et_out):
+        def get_w(i, j, k):
+            #: w = numpy.einsum('abf,cf->abc', ovvv[i], t2[k,j])
+            #:   - numpy.einsum('am,mbc->abc', ovoo[i,:,j], t2[:,k])
+            w = lib.dot(ovvv(i).reshape(-1,nvir), t2[k,j].T)
+            lib.dot(eris_ooov[i,j].T, t2T[k].reshape(nocc,-1), -1,
+                    w.reshape(nvir,-1), 1)
+            return w.reshape(nvir,nvir,nvir)
+        def get_v(i, j, k):
+            return numpy.einsum('ab,c->abc', eris_ovov[i,:,j], t1[k])
+
+        et = 0
+        for i, j, k in tasks:
+            w = permute6(get_w, i, j, k)
+            v = permute6(get_v, i, j, k)
+            d3 = lib.direct_sum('a+b+c->abc', eia[i], eia[j], eia[k])
+            v *= .5
+            v += w
+            v /= d3
+            if i == j == k:
+                fac = 2./6
+            elif i == j or j == k:
+                fac = 2./2
+            else:
+                fac = 2.
+            et += fac * numpy.dot(v.ravel(), r6(w).ravel())
+        et_out.append(et)
+
+    et = 0
+    for i0, i1 in lib.prange(0, nocc, blksize):
+        for j0, j1 in lib.prange(0, i1, blksize):
+            for k0, k1 in lib.prange(0, j1, blksize):
+                for key in list(ovvv_blocks.keys()):
+                    if key not in ((i0,i1), (j0,j1), (k0,k1)):
+                        del(ovvv_blocks[key])
+                blocks = [load_ovvv(i0,i1), load_ovvv(j0,j1), load_ovvv(k0,k1)]
+                def ovvv(p):
+                    for q0, buf in blocks:
+                        if q0 <= p < q0+buf.shape[0]:
+                            return buf[p-q0]
+                tasks = [(i,j,k) for i in range(i0, i1)
+                         for j in range(j0, min(j1,i+1))
+                         for k in range(k0, min(k1,j+1))]
+                et_out = []
+                if nthreads == 1:
+                    contract(ovvv, tasks, et_out)
+                else:
+                    lib.run_threads(contract, [(ovvv, tasks[p::nthreads], et_out)
+                                               for p in range(nthreads)])
+                et += sum(et_out)
+            cpu0 = log.timer_debug1('ccsd_t occ block [%d:%d]'%(i0,i1), *cpu0)
+    log.info('CCSD(T) correction = %.15g', et)
+    return et
+
+def permute6(fn, i, j, k):
+    '''Sum of fn over the six permutations of (i,j,k) with the virtual
+    indices permuted accordingly'''
+    w = fn(i, j, k).copy()
+    w += fn(i, k, j).transpose(0,2,1)
+    w += fn(j, i, k).transpose(1,0,2)
+    w += fn(j, k, i).transpose(2,0,1)
+    w += fn(k, i, j).transpose(1,2,0)
+    w += fn(k, j, i).transpose(2,1,0)
+    return w
+
+def r6(w):
+    return (4 * w + w.transpose(1,2,0) + w.transpose(2,0,1)
+            - 2 * w.transpose(2,1,0) - 2 * w.transpose(0,2,1)
+            - 2 * w.transpose(1,0,2))
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+    from pyscf import cc
+    from pyscf.cc import ccsd_t_slow
+
+    mol = gto.Mole()
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -.957 , .587)],
+        [1 , (0.2,  .757 , .487)]]
+
+    mol.basis = 'ccpvdz'
+    mol.build()
+    rhf = scf.RHF(mol)
+    rhf.conv_tol = 1e-14
+    rhf.scf()
+    mcc = cc.CCSD(rhf)
+    mcc.conv_tol = 1e-14
+    mcc.ccsd()
+    eris = mcc.ao2mo()
+    e3a = ccsd_t_slow.kernel(mcc, eris)
+    e3b = kernel(mcc, eris, max_memory=1, nthreads=3)
+    print(e3a, e3b, mcc.ecc+e3b)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Snapshots of the CCSD and CCSD-lambda iterations.  A snapshot has the
+amplitudes, the iteration count, the correlation energy, the orbitals and
+the DIIS vectors under the group 'ccsd' or 'ccsd_lambda'.  Each snapshot
+has its own file (see :func:`snapshot_file`).  The snapshot is written to a
+temporary file then renamed, so a job killed in the middle of the writing
+leaves the previous snapshot intact.  The other groups of the file (e.g. the
+SCF results if the file is also the SCF chkfile) are copied to the temporary
+file.
+'''
+
+import os
+import numpy
+import h5py
+from pyscf import lib
+from pyscf.lib.chkfile import load
+from pyscf.lib.chkfile import dump, save
+
+
+def snapshot_file(chkfile, key):
+    '''The file of the snapshot key.  The CCSD amplitudes are saved in
+    chkfile, the others in chkfile.key'''
+    if key == 'ccsd':
+        return chkfile
+    else:
+        return '%s.%s' % (chkfile, key)
+
+def mo_coeff_matches(mo0, mo1):
+    return mo0.shape == mo1.shape and numpy.allclose(mo0, mo1)
+
+def dump_amps(mycc, key, amps, istep, e_corr=0, adiis=None, mo_coeff=None,
+              chkfile=None):
+    '''Save a snapshot of the amplitudes (a dict) in the snapshot file'''
+    if chkfile is None: chkfile = mycc.chkfile
+    filename = snapshot_file(chkfile, key)
+    tmpfile = filename + '.tmp'
+    with h5py.File(tmpfile, 'w') as fout:
+        if os.path.isfile(filename) and h5py.is_hdf5(filename):
+            with h5py.File(filename, 'r') as fin:
+                for k in fin:
+                    if k != key:
+                        fin.copy(k, fout)
+        grp = fout.create_group(key)
+        for k in amps:
+            grp[k] = amps[k]
+        grp['istep'] = istep
+        grp['e_corr'] = e_corr
+        if mo_coeff is not None:
+            grp['mo_coeff'] = mo_coeff
+        if isinstance(adiis, lib.diis.DIIS):
+            adiis.dump(grp.create_group('diis'))
+    os.rename(tmpfile, filename)
+
+def load_amps(chkfile, key, mo_coeff=None):
+    '''Load the snapshot saved by :func:`dump_amps`.  The DIIS vectors are
+    not loaded.  Return None if the snapshot is not found, or if mo_coeff is
+    given and the snapshot was generated for other orbitals.
+    '''
+    filename = snapshot_file(chkfile, key)
+    if not (os.path.isfile(filename) and h5py.is_hdf5(filename)):
+        return None
+    with h5py.File(filename, 'r') as fh5:
+        if key not in fh5:
+            return None
+        grp = fh5[key]
+        if mo_coeff is not None:
+            if ('mo_coeff' not in grp or
+                not mo_coeff_matches(grp['mo_coeff'].value, mo_coeff)):
+                return None
+        return dict([(k, grp[k].value) for k in grp if k != 'diis'])
+
+def restore_diis(adiis, chkfile, key):
+    '''Restore the DIIS vectors of the snapshot'''
+    if isinstance(adiis, lib.diis.DIIS):
+        with h5py.File(snapshot_file(chkfile, key), 'r') as fh5:
+            if key+'/diis' in fh5:
+                adiis.restore(fh5[key+'/diis'])
+    return adiis
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+r'''
+Density fitting RCCSD.  The CCSD integrals are built from the 3-center
+integrals (L|pq) in MO basis, (pq|rs) = \sum_L (L|pq) (L|rs).  The vvvv
+integrals are not stored.  The rows of vvvv are assembled from (L|ab) when
+the ladder term is evaluated.
+'''
+
+import time
+import tempfile
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf import df
+from pyscf.cc import ccsd
+from pyscf.cc import _ccsd
+
+
+class CCSD(ccsd.CCSD):
+    def __init__(self, mf, frozen=[], mo_energy=None, mo_coeff=None, mo_occ=None):
+        ccsd.CCSD.__init__(self, mf, frozen, mo_energy, mo_coeff, mo_occ)
+        if hasattr(mf, 'auxbasis'):
+            self.auxbasis = mf.auxbasis
+        else:
+            self.auxbasis = 'weigend+etb'
+        self._keys = self._keys.union(['auxbasis'])
+
+    def dump_flags(self):
+        ccsd.CCSD.dump_flags(self)
+        logger.info(self, 'auxbasis = %s', self.auxbasis)
+
+    def ao2mo(self, mo_coeff=None):
+        return _ERIS(self, mo_coeff)
+
+CC = CCSD
+
+
+class _ERIS(ccsd._ERIS):
+    def __init__(self, cc, mo_coeff=None):
+        cput0 = (time.clock(), time.time())
+        mo_coeff = self._common_init_(cc, mo_coeff)
+        log = logger.Logger(cc.stdout, cc.verbose)
+        nocc = cc.nocc()
+        nmo = cc.nmo()
+        nvir = nmo - nocc
+        nvpair = nvir * (nvir+1) // 2
+
+        cderi_file = tempfile.NamedTemporaryFile()
+        mem_now = lib.current_memory()[0]
+        df.outcore.general(cc.mol, (mo_coeff,mo_coeff), cderi_file.name,
+                           auxbasis=cc.auxbasis,
+                           max_memory=max(0, cc.max_memory-mem_now),
+                           verbose=log)
+        cput1 = log.timer_debug1('(L|pq)', *cput0)
+
+        with df.load(cderi_file) as Lpq:
+            naoaux = Lpq.shape[0]
+            Loo = numpy.empty((naoaux,nocc,nocc))
+            Lov = numpy.empty((naoaux,nocc,nvir))
+            self.Lvv = numpy.empty((naoaux,nvpair))
+            mem_now = lib.current_memory()[0]
+            max_memory = max(0, cc.max_memory - mem_now)
+            blksize = max(ccsd.BLKMIN, int(max_memory*.5e6/8/(nmo**2*2)))
+            for p0, p1 in ccsd.prange(0, naoaux, blksize):
+                buf = _ccsd.unpack_tril(numpy.asarray(Lpq[p0:p1], order='C'))
+                Loo[p0:p1] = buf[:,:nocc,:nocc]
+                Lov[p0:p1] = buf[:,:nocc,nocc:]
+                self.Lvv[p0:p1] = _ccsd.pack_tril(ccsd._cp(buf[:,nocc:,nocc:]))
+                buf = None
+        cput1 = log.timer_debug1('sorting (L|pq)', *cput1)
+
+        mem_incore = (nocc**4 + nocc**3*nvir*2 + nocc**2*nvir**2*2 +
+                      nocc*nvir*nvpair) * 8/1e6
+        mem_now = lib.current_memory()[0]
+        if mem_incore + mem_now < cc.max_memory or cc.mol.incore_anyway:
+            self.oooo = numpy.empty((nocc,nocc,nocc,nocc))
+            self.ooov = numpy.empty((nocc,nocc,nocc,nvir))
+            self.ovoo = numpy.empty((nocc,nvir,nocc,nocc))
+            self.oovv = numpy.empty((nocc,nocc,nvir,nvir))
+            self.ovov = numpy.empty((nocc,nvir,nocc,nvir))
+            self.ovvv = numpy.empty((nocc,nvir,nvpair))
+        else:
+            self.feri1 = lib.scratch.open_scratch()
+            self.oooo = self.feri1.create_dataset('oooo', (nocc,nocc,nocc,nocc), 'f8')
+            self.ooov = self.feri1.create_dataset('ooov', (nocc,nocc,nocc,nvir), 'f8')
+            self.ovoo = self.feri1.create_dataset('ovoo', (nocc,nvir,nocc,nocc), 'f8')
+            self.oovv = self.feri1.create_dataset('oovv', (nocc,nocc,nvir,nvir), 'f8')
+            self.ovov = self.feri1.create_dataset('ovov', (nocc,nvir,nocc,nvir), 'f8')
+            self.ovvv = self.feri1.create_dataset('ovvv', (nocc,nvir,nvpair), 'f8')
+
+        Loo2 = Loo.reshape(naoaux,-1)
+        Lov2 = Lov.reshape(naoaux,-1)
+        self.oooo[:] = lib.dot(Loo2.T, Loo2).reshape(nocc,nocc,nocc,nocc)
+
+        mem_now = lib.current_memory()[0]
+        max_memory = max(0, cc.max_memory - mem_now)
+        blksize = max(1, int(max_memory*1e6/8/(nocc*nvir**2*2 + nvir*nvpair +
+                                                naoaux*nmo)))
+        for i0, i1 in ccsd.prange(0, nocc, blksize):
+            #: ooov[i,j,k,a] = (L|ij) (L|ka)
+            #: ovoo[i,a,j,k] = (L|ia) (L|jk)
+            #: ovov[i,a,j,b] = (L|ia) (L|jb)
+            #: oovv[i,j,a,b] = (L|ij) (L|ab)
+            #: ovvv[i,a,bc] = (L|ia) (L|bc)
+            Loo_i = ccsd._cp(Loo[:,i0:i1]).reshape(naoaux,-1)
+            Lov_i = ccsd._cp(Lov[:,i0:i1]).reshape(naoaux,-1)
+            self.ooov[i0:i1] = lib.dot(Loo_i.T, Lov2).reshape(i1-i0,nocc,nocc,nvir)
+            self.ovoo[i0:i1] = lib.dot(Lov_i.T, Loo2).reshape(i1-i0,nvir,nocc,nocc)
+            self.ovov[i0:i1] = lib.dot(Lov_i.T, Lov2).reshape(i1-i0,nvir,nocc,nvir)
+            buf = lib.dot(Loo_i.T, self.Lvv)
+            self.oovv[i0:i1] = _ccsd.unpack_tril(buf).reshape(i1-i0,nocc,nvir,nvir)
+            buf = lib.dot(Lov_i.T, self.Lvv)
+            self.ovvv[i0:i1] = buf.reshape(i1-i0,nvir,nvpair)
+            buf = Loo_i = Lov_i = None
+            cput1 = log.timer_debug1('ooov, ovoo, ovov, oovv, ovvv [%d:%d]'%(i0,i1),
+                                     *cput1)
+        Loo2 = Lov2 = None
+        self.vvvv = _VVVV(self.Lvv)
+        log.timer('DF-CCSD integral transformation', *cput0)
+
+class _VVVV(object):
+    '''Rows of the packed vvvv integrals assembled from (L|ab) on demand'''
+    def __init__(self, Lvv):
+        self.Lvv = Lvv
+        nvpair = Lvv.shape[1]
+        self.shape = (nvpair, nvpair)
+
+    def __getitem__(self, s):
+        return lib.dot(ccsd._cp(self.Lvv[:,s]).T, self.Lvv)
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+
+    mol = gto.Mole()
+    mol.verbose = 0
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -0.757 , 0.587)],
+        [1 , (0. , 0.757  , 0.587)]]
+    mol.basis = 'cc-pvdz'
+    mol.build()
+    mf = scf.RHF(mol)
+    mf.scf()
+
+    mcc = CCSD(mf)
+    mcc.conv_tol = 1e-9
+    print(mcc.kernel()[0] - ccsd.CCSD(mf).kernel()[0])
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+import unittest
+import numpy
+from pyscf import gto, scf, ao2mo
+from pyscf import cc
+from pyscf.cc import ccsd_t
+from pyscf.cc import ccsd_t_slow
+
+
+def make_eris(nocc, nmo):
+    numpy.random.seed(12)
+    nvir = nmo - nocc
+    eri0 = numpy.random.random((nmo,nmo,nmo,nmo))
+    eri0 = ao2mo.restore(1, ao2mo.restore(8, eri0, nmo), nmo)
+    eris = lambda:None
+    eris.ovoo = eri0[:nocc,nocc:,:nocc,:nocc].copy()
+    eris.ovov = eri0[:nocc,nocc:,:nocc,nocc:].copy()
+    idx = numpy.tril_indices(nvir)
+    eris.ovvv = eri0[:nocc,nocc:,nocc:,nocc:][:,:,idx[0],idx[1]].copy()
+    eris.fock = numpy.diag(numpy.arange(nmo)*.5 - 2.)
+    t1 = numpy.random.random((nocc,nvir)) * .1
+    t2 = numpy.random.random((nocc,nocc,nvir,nvir)) * .1
+    t2 = t2 + t2.transpose(1,0,3,2)
+    return eris, t1, t2
+
+class KnowValues(unittest.TestCase):
+    def test_ccsd_t(self):
+        mol = gto.M()
+        mf = scf.RHF(mol)
+        mcc = cc.CCSD(mf)
+        mcc.verbose = 0
+        nocc, nmo = 5, 12
+        eris, t1, t2 = make_eris(nocc, nmo)
+        mf.mo_energy = eris.fock.diagonal()
+
+        e0 = ccsd_t_slow.kernel(mcc, eris, t1, t2, verbose=0)
+        e1 = ccsd_t.kernel(mcc, eris, t1, t2, verbose=0)
+        self.assertAlmostEqual(e1, e0, 9)
+        e1 = ccsd_t.kernel(mcc, eris, t1, t2, max_memory=1, verbose=0)
+        self.assertAlmostEqual(e1, e0, 9)
+        e1 = ccsd_t.kernel(mcc, eris, t1, t2, max_memory=1, verbose=0,
+                           nthreads=3)
+        self.assertAlmostEqual(e1, e0, 9)
+
+
+if __name__ == "__main__":
+    print("Full Tests for CCSD(T)")
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+import unittest
+import tempfile
+import numpy
+
+from pyscf import gto
+from pyscf import scf
+from pyscf import ao2mo
+from pyscf import df
+from pyscf.cc import dfccsd
+
+mol = gto.Mole()
+mol.verbose = 0
+mol.output = None
+mol.atom = [
+    [8 , (0. , 0.     , 0.)],
+    [1 , (0. , -0.757 , 0.587)],
+    [1 , (0. , 0.757  , 0.587)]]
+mol.basis = 'cc-pvdz'
+mol.build()
+mf = scf.RHF(mol)
+mf.conv_tol_grad = 1e-8
+ehf = mf.kernel()
+
+
+class KnowValues(unittest.TestCase):
+    def test_df_eris(self):
+        mcc = dfccsd.CCSD(mf, frozen=range(1))
+        eris = mcc.ao2mo()
+        mo = eris.mo_coeff
+        nmo = mo.shape[1]
+        nocc = mcc.nocc()
+        ftmp = tempfile.NamedTemporaryFile()
+        df.outcore.general(mol, (mo,mo), ftmp.name, auxbasis=mcc.auxbasis)
+        with df.load(ftmp) as Lpq:
+            eri0 = numpy.dot(numpy.asarray(Lpq).T, Lpq)
+        eri0 = ao2mo.restore(1, eri0, nmo)
+        o = slice(0, nocc)
+        v = slice(nocc, nmo)
+        nvir = nmo - nocc
+        idx = numpy.tril_indices(nvir)
+        vvvv = ao2mo.restore(4, eri0[v,v,v,v].copy(), nvir)
+        def check(eris):
+            self.assertTrue(numpy.allclose(eris.oooo, eri0[o,o,o,o]))
+            self.assertTrue(numpy.allclose(eris.ooov, eri0[o,o,o,v]))
+            self.assertTrue(numpy.allclose(eris.ovoo, eri0[o,v,o,o]))
+            self.assertTrue(numpy.allclose(eris.oovv, eri0[o,o,v,v]))
+            self.assertTrue(numpy.allclose(eris.ovov, eri0[o,v,o,v]))
+            self.assertTrue(numpy.allclose(eris.ovvv, eri0[o,v,v,v][:,:,idx[0],idx[1]]))
+            self.assertTrue(numpy.allclose(eris.vvvv[3:9], vvvv[3:9]))
+        check(eris)
+
+        mcc.max_memory = 1
+        eris = mcc.ao2mo()
+        self.assertTrue(hasattr(eris, 'feri1'))
+        check(eris)
+
+    def test_dfccsd(self):
+        mcc = dfccsd.CCSD(mf)
+        mcc.conv_tol = 1e-10
+        mcc.kernel()
+        self.assertTrue(mcc._conv)
+        self.assertAlmostEqual(mcc.ecc, -0.2136665828521, 8)
+
+    def test_dfccsd_outcore(self):
+        mcc = dfccsd.CCSD(mf)
+        mcc.conv_tol = 1e-10
+        mcc.max_memory = 1
+        mcc.kernel()
+        self.assertAlmostEqual(mcc.ecc, -0.2136665828521, 8)
+
+if __name__ == "__main__":
+    print("Full Tests for DF-CCSD")
+    unittest.main()
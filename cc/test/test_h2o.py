@@ -1,5 +1,8 @@
 #!/usr/bin/env python
+import os
+import shutil
 import unittest
+import tempfile
 import numpy
 
 from pyscf import gto
@@ -54,6 +57,74 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(mcc.ecc, -0.21124878189922872, 8)
         self.assertAlmostEqual(abs(mcc.t2).sum(), 5.4996425901189347, 6)
 
+    def test_ccsd_direct(self):
+        mcc = cc.ccsd.CC(mf, frozen=range(1))
+        eris = mcc.ao2mo()
+        numpy.random.seed(2)
+        nocc, nvir = eris.ovov.shape[:2]
+        t1 = numpy.random.random((nocc,nvir)) * .1
+        t2 = numpy.random.random((nocc,nocc,nvir,nvir)) * .1
+        t2 = t2 + t2.transpose(1,0,3,2)
+        ref = mcc.add_wvvVV(t1, t2, eris)
+
+        mcc.direct = True
+        eris = mcc.ao2mo()
+        self.assertTrue(eris.vvvv is None)
+        self.assertTrue(numpy.allclose(mcc.add_wvvVV(t1, t2, eris), ref))
+        mcc.conv_tol = 1e-10
+        mcc.kernel()
+        self.assertAlmostEqual(mcc.ecc, -0.21124878189922872, 8)
+
+    def test_ccsd_restart(self):
+        tmpdir = tempfile.mkdtemp()
+        chkfile = os.path.join(tmpdir, 'ccsd.chk')
+        ferifile = tempfile.NamedTemporaryFile()
+        mcc = cc.ccsd.CC(mf)
+        self.assertTrue(mcc.chkfile is None)
+        mcc.conv_tol = 1e-9
+        mcc.conv_tol_normt = 1e-7
+        mcc.chkfile = chkfile
+        mcc.erifile = ferifile.name
+        mcc.max_cycle = 4
+        mcc.kernel()
+        self.assertFalse(mcc._conv)
+
+        mcc = cc.ccsd.CC(mf)
+        mcc.conv_tol = 1e-9
+        mcc.conv_tol_normt = 1e-7
+        mcc.chkfile = chkfile
+        mcc.erifile = ferifile.name
+        mcc.restart = True
+        eris = mcc.ao2mo()
+        self.assertTrue(eris._erifile is not None)
+        mcc.kernel(eris=eris)
+        self.assertAlmostEqual(mcc.ecc, -0.2133432312951, 8)
+        self.assertTrue(cc.chkfile.load_amps(chkfile, 'ccsd', mf.mo_coeff)
+                        is not None)
+        self.assertTrue(cc.chkfile.load_amps(chkfile, 'ccsd', mf.mo_coeff[:,::-1])
+                        is None)
+
+        mcc.max_cycle = 3
+        mcc.solve_lambda(eris=eris)
+        mcc.max_cycle = 50
+        mcc.solve_lambda(eris=eris)
+        self.assertAlmostEqual(numpy.linalg.norm(mcc.l1), 0.01326267012100099, 7)
+        self.assertAlmostEqual(numpy.linalg.norm(mcc.l2), 0.21257559872380857, 7)
+        shutil.rmtree(tmpdir)
+
+    def test_ccsd_scf_chkfile(self):
+        ftmp = tempfile.NamedTemporaryFile()
+        scf.chkfile.dump_scf(mol, ftmp.name, mf.e_tot, mf.mo_energy,
+                             mf.mo_coeff, mf.mo_occ)
+        mcc = cc.ccsd.CC(mf)
+        mcc.chkfile = ftmp.name
+        mcc.max_cycle = 2
+        mcc.kernel()
+        self.assertAlmostEqual(scf.chkfile.load(ftmp.name, 'scf/e_tot'),
+                               mf.e_tot, 12)
+        self.assertTrue(cc.chkfile.load_amps(ftmp.name, 'ccsd', mf.mo_coeff)
+                        is not None)
+
     def test_h2o_non_hf_orbital(self):
         nmo = mf.mo_energy.size
         nocc = mol.nelectron // 2
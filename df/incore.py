@@ -107,7 +107,17 @@ def cholesky_eri(mol, auxbasis='weigend+etb', verbose=0):
     else:
         log = logger.Logger(mol.stdout, verbose)
     auxmol = format_aux_basis(mol, auxbasis)
+    def fbuild():
+        return _cholesky_eri(mol, auxmol, log, t0)
+    args = (mol._atm, mol._bas, mol._env, auxmol._atm, auxmol._bas, auxmol._env)
+    if pyscf.lib.intcache.get_shm_dir():
+# One copy of the Cholesky vectors for all processes on the node
+        return pyscf.lib.intcache.load_or_build_shared(fbuild, 'cholesky_eri',
+                                                       args)
+    else:
+        return pyscf.lib.intcache.load_or_build(fbuild, 'cholesky_eri', args)
 
+def _cholesky_eri(mol, auxmol, log, t0):
     j2c = fill_2c2e(mol, auxmol, intor='cint2c2e_sph')
     log.debug('size of aux basis %d', j2c.shape[0])
     t1 = log.timer('2c2e', *t0)
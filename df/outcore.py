@@ -158,42 +158,52 @@ def cholesky_eri_b(mol, erifile, auxbasis='weigend+etb', dataname='eri_mo',
 
     if aosym == 's1':
         nao_pair = nao * nao
-        buflen = min(max(int(ioblk_size*1e6/8/naoaux/comp), 1), nao_pair)
+        buflen = min(max(int(ioblk_size*1e6/8/naoaux/comp/5), 1), nao_pair)
         shranges = _guess_shell_ranges(mol, buflen, 's1')
     else:
         nao_pair = nao * (nao+1) // 2
-        buflen = min(max(int(ioblk_size*1e6/8/naoaux/comp), 1), nao_pair)
+        buflen = min(max(int(ioblk_size*1e6/8/naoaux/comp/5), 1), nao_pair)
         shranges = _guess_shell_ranges(mol, buflen, 's2ij')
     log.debug('erifile %.8g MB, IO buf size %.8g MB',
               naoaux*nao_pair*8/1e6, comp*buflen*naoaux*8/1e6)
     if log.verbose >= logger.DEBUG1:
         log.debug1('shranges = %s', shranges)
     cintopt = _vhf.make_cintopt(c_atm, c_bas, c_env, int3c)
-    bufs1 = numpy.empty((comp*max([x[2] for x in shranges]),naoaux))
-    for istep, sh_range in enumerate(shranges):
-        log.debug('int3c2e [%d/%d], AO [%d:%d], nrow = %d', \
-                  istep+1, len(shranges), *sh_range)
-        bstart, bend, nrow = sh_range
-        basrange = (bstart, bend-bstart, 0, mol.nbas, mol.nbas, auxmol.nbas)
-        buf = bufs1[:comp*nrow].reshape(comp,nrow,naoaux)
-        if 's1' in aosym:
-            ijkoff = ao_loc[bstart] * nao * naoaux
-        else:
-            ijkoff = ao_loc[bstart] * (ao_loc[bstart]+1) // 2 * naoaux
-        _ri.nr_auxe2(int3c, basrange,
-                     atm, bas, env, aosym, comp, cintopt, buf, ijkoff,
-                     ao_loc[bend]-ao_loc[bstart],
-                     nao, naoaux, ao_loc[bstart:bend+1], ao_loc, kloc)
-        for icomp in range(comp):
-            if comp == 1:
-                label = '%s/%d'%(dataname,istep)
+
+# A three-stage pipeline: the 3c2e slabs are generated in a background thread
+# (libcint is OpenMP-parallel over the shell pairs), the triangular solve runs
+# in the main thread, and the solved slabs are written to erifile by another
+# background thread.  Up to 5 slabs are held in memory, so each slab takes
+# 1/5 of ioblk_size.
+    def gen_int3c():
+        for istep, sh_range in enumerate(shranges):
+            log.debug('int3c2e [%d/%d], AO [%d:%d], nrow = %d', \
+                      istep+1, len(shranges), *sh_range)
+            bstart, bend, nrow = sh_range
+            basrange = (bstart, bend-bstart, 0, mol.nbas, mol.nbas, auxmol.nbas)
+            buf = numpy.empty((comp,nrow,naoaux))
+            if 's1' in aosym:
+                ijkoff = ao_loc[bstart] * nao * naoaux
             else:
-                label = '%s/%d/%d'%(dataname,icomp,istep)
-            cderi = scipy.linalg.solve_triangular(low, buf[icomp].T,
-                                                  lower=True, overwrite_b=True)
-            feri[label] = cderi
-        time1 = log.timer('gen CD eri [%d/%d]' % (istep+1,len(shranges)), *time1)
-    buf = bufs1 = None
+                ijkoff = ao_loc[bstart] * (ao_loc[bstart]+1) // 2 * naoaux
+            _ri.nr_auxe2(int3c, basrange,
+                         atm, bas, env, aosym, comp, cintopt, buf, ijkoff,
+                         ao_loc[bend]-ao_loc[bstart],
+                         nao, naoaux, ao_loc[bstart:bend+1], ao_loc, kloc)
+            yield istep, buf
+
+    with pyscf.lib.background_writer() as writer:
+        for istep, buf in pyscf.lib.background_iter(gen_int3c()):
+            for icomp in range(comp):
+                if comp == 1:
+                    label = '%s/%d'%(dataname,istep)
+                else:
+                    label = '%s/%d/%d'%(dataname,icomp,istep)
+                cderi = scipy.linalg.solve_triangular(low, buf[icomp].T,
+                                                      lower=True, overwrite_b=True)
+                writer.submit(feri.__setitem__, label, cderi)
+            buf = cderi = None
+            time1 = log.timer('gen CD eri [%d/%d]' % (istep+1,len(shranges)), *time1)
 
     feri.close()
     _ri.libri.CINTdel_optimizer(ctypes.byref(cintopt))
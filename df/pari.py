@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Pair-atomic resolution of identity (local density fitting)
+
+The product of the AO functions mu on atom A and nu on atom B is fitted with
+the auxiliary functions of atoms A and B (and of the atoms within the given
+radius of A or B) only
+
+    |mu nu) ~ sum_{P in AB} C^P_{mu nu} |P),   C^{AB} = (P|Q)_{AB}^{-1} (Q|mu nu)
+
+The 2-electron integrals are approximated as
+
+    (mu nu|ka la) ~ sum_{PQ} C^P_{mu nu} (P|Q) C^Q_{ka la}
+
+The fitting coefficients are stored block by block for the atom pairs which
+have significant overlap.  The memory grows with the number of significant
+atom pairs, instead of the O(N^3) of the dense Cholesky integrals (L|mu nu).
+When the radius covers all atoms, the results are identical to the standard
+density fitting.
+'''
+
+import time
+import ctypes
+import numpy
+import scipy.linalg
+import pyscf.lib
+from pyscf.lib import logger
+from pyscf import gto
+from pyscf.scf import _vhf
+from pyscf.df import incore
+from pyscf.df import _ri
+
+
+def pari_coeff(mol, auxbasis='weigend+etb', radius=0, pair_cutoff=1e-10,
+               max_memory=2000, verbose=0):
+    '''Pair-atomic fitting coefficients
+
+    Kwargs:
+        radius : float
+            The AO pair of atoms A and B is fitted with the auxiliary
+            functions of the atoms which are closer than radius (in Bohr) to
+            A or B.  0 means the auxiliary functions of A and B only.
+        pair_cutoff : float
+            Atom pairs are skipped if the overlap integrals between their AO
+            functions are all smaller than pair_cutoff.
+        max_memory : float or int
+            Memory (in MB) of the intermediates to build the K matrix
+
+    Returns:
+        A :class:`PARI` object
+    '''
+    t0 = (time.clock(), time.time())
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(mol.stdout, verbose)
+    auxmol = incore.format_aux_basis(mol, auxbasis)
+    j2c = incore.fill_2c2e(mol, auxmol)
+    t1 = log.timer('2c2e', *t0)
+
+    atm, bas, env = gto.mole.conc_env(mol._atm, mol._bas, mol._env,
+                                      auxmol._atm, auxmol._bas, auxmol._env)
+    c_atm = numpy.asarray(atm, dtype=numpy.int32, order='C')
+    c_bas = numpy.asarray(bas, dtype=numpy.int32, order='C')
+    c_env = numpy.asarray(env, dtype=numpy.double, order='C')
+    cintopt = _vhf.make_cintopt(c_atm, c_bas, c_env, 'cint3c2e_sph')
+
+    aoslice = _aoslice_by_atom(mol)
+    auxslice = _aoslice_by_atom(auxmol)
+    coords = numpy.array([mol.atom_coord(i) for i in range(mol.natm)])
+    rr = numpy.linalg.norm(coords.reshape(-1,1,3) - coords, axis=2)
+    s = mol.intor_symmetric('cint1e_ovlp_sph')
+
+    pari = PARI(mol, auxmol, j2c)
+    pari.auxbasis = auxbasis
+    pari.radius = radius
+    pari.max_memory = max_memory
+    for ia in range(mol.natm):
+        ish0, ish1, i0, i1 = aoslice[ia]
+        for ja in range(ia+1):
+            jsh0, jsh1, j0, j1 = aoslice[ja]
+            if i0 == i1 or j0 == j1:
+                continue
+            if ia != ja and abs(s[i0:i1,j0:j1]).max() < pair_cutoff:
+                continue
+            katms = numpy.where((rr[ia] <= radius) | (rr[ja] <= radius))[0]
+            katms = [ka for ka in katms if auxslice[ka,2] < auxslice[ka,3]]
+            idx = numpy.hstack([numpy.arange(auxslice[ka,2], auxslice[ka,3])
+                                for ka in katms])
+            int3c = numpy.empty((i1-i0,j1-j0,idx.size))
+            k0 = 0
+            for ka in katms:
+                ksh0, ksh1, p0, p1 = auxslice[ka]
+                basrange = (ish0, ish1-ish0, jsh0, jsh1-jsh0,
+                            mol.nbas+ksh0, ksh1-ksh0)
+                int3c[:,:,k0:k0+p1-p0] = _ri.nr_auxe2(
+                    'cint3c2e_sph', basrange, c_atm, c_bas, c_env, 's1', 1,
+                    cintopt, iloc=_ri.make_loc(ish0, ish1-ish0, c_bas),
+                    jloc=_ri.make_loc(jsh0, jsh1-jsh0, c_bas),
+                    kloc=_ri.make_loc(mol.nbas+ksh0, ksh1-ksh0, c_bas)
+                ).reshape(i1-i0,j1-j0,p1-p0)
+                k0 += p1 - p0
+            cd = scipy.linalg.cho_factor(j2c[idx[:,None],idx])
+            c = scipy.linalg.cho_solve(cd, int3c.reshape(-1,idx.size).T)
+            pari.pairs.append((ia, ja))
+            pari.aux_idx.append(idx)
+            pari.coeff.append(c.reshape(idx.size,i1-i0,j1-j0))
+    _ri.libri.CINTdel_optimizer(ctypes.byref(cintopt))
+
+    log.debug('PARI: %d atom pairs, coefficients %.8g MB', len(pari.pairs),
+              sum([c.size for c in pari.coeff])*8/1e6)
+    log.timer('PARI fitting coefficients', *t1)
+    return pari
+
+
+class PARI(object):
+    '''Fitting coefficients in the block-compressed format.  The block of atom
+    pair (ia, ja) (ia >= ja) has the shape (naux_ab, nao_ia, nao_ja).
+
+    Attributes:
+        pairs : list of (ia, ja)
+            The atom pairs of the non-zero blocks
+        aux_idx : list of 1D int arrays
+            (Sorted) indices of the auxiliary functions of each block
+        coeff : list of 3D arrays
+            Fitting coefficients of each block
+        j2c : 2D array
+            The metric (P|Q) of the auxiliary basis
+        auxbasis, radius :
+            The arguments of :func:`pari_coeff`
+    '''
+    def __init__(self, mol, auxmol, j2c):
+        self.mol = mol
+        self.auxmol = auxmol
+        self.j2c = j2c
+        self.auxbasis = None
+        self.radius = None
+        self.max_memory = 2000
+        self.aoslice = _aoslice_by_atom(mol)
+        self.pairs = []
+        self.aux_idx = []
+        self.coeff = []
+
+    def get_jk(self, dms, hermi=1, with_j=True, with_k=True):
+        '''J and K matrices of the approximated 2-electron integrals.  The
+        density matrices are not required to be hermitian.
+        '''
+        nao = self.mol.nao_nr()
+        dms = numpy.asarray(dms)
+        dm_shape = dms.shape
+        dms = dms.reshape(-1,nao,nao)
+        nset = len(dms)
+        vj = numpy.zeros((nset,nao,nao))
+        vk = numpy.zeros((nset,nao,nao))
+        if with_j:
+            vj = self._get_j(dms, vj)
+        if with_k:
+            vk = self._get_k(dms, vk)
+        return vj.reshape(dm_shape), vk.reshape(dm_shape)
+
+    def _get_j(self, dms, vj):
+        nset = len(dms)
+        naux = self.j2c.shape[0]
+        rho = numpy.zeros((nset,naux))
+        for (ia, ja), idx, c in zip(self.pairs, self.aux_idx, self.coeff):
+            i0, i1 = self.aoslice[ia,2:]
+            j0, j1 = self.aoslice[ja,2:]
+            dab = dms[:,i0:i1,j0:j1]
+            if ia != ja:
+                dab = dab + dms[:,j0:j1,i0:i1].transpose(0,2,1)
+            rho[:,idx] += pyscf.lib.dot(dab.reshape(nset,-1),
+                                        c.reshape(idx.size,-1).T)
+        rho = pyscf.lib.dot(rho, self.j2c)
+        for (ia, ja), idx, c in zip(self.pairs, self.aux_idx, self.coeff):
+            i0, i1 = self.aoslice[ia,2:]
+            j0, j1 = self.aoslice[ja,2:]
+            vab = pyscf.lib.dot(rho[:,idx], c.reshape(idx.size,-1))
+            vab = vab.reshape(nset,i1-i0,j1-j0)
+            vj[:,i0:i1,j0:j1] += vab
+            if ia != ja:
+                vj[:,j0:j1,i0:i1] += vab.transpose(0,2,1)
+        return vj
+
+    def _get_k(self, dms, vk):
+# K_{mu nu} = sum_P sum_{la si} C^P_{mu la} D_{la si} X^P_{nu si}
+# with X^P = sum_Q (P|Q) C^Q.  C^P and X^P are unpacked to dense matrices for
+# a block of P at a time.
+        nset, nao = dms.shape[:2]
+        naux = self.j2c.shape[0]
+        blksize = max(1, int(self.max_memory*1e6/8/(nao*nao*3)))
+        for p0, p1 in prange(0, naux, blksize):
+            cp = numpy.zeros((p1-p0,nao,nao))
+            xp = numpy.zeros((p1-p0,nao,nao))
+            for (ia, ja), idx, c in zip(self.pairs, self.aux_idx, self.coeff):
+                i0, i1 = self.aoslice[ia,2:]
+                j0, j1 = self.aoslice[ja,2:]
+                x = pyscf.lib.dot(self.j2c[p0:p1,idx], c.reshape(idx.size,-1))
+                x = x.reshape(p1-p0,i1-i0,j1-j0)
+                xp[:,i0:i1,j0:j1] += x
+                k0, k1 = numpy.searchsorted(idx, (p0, p1))
+                if k0 < k1:
+                    cp[idx[k0:k1]-p0,i0:i1,j0:j1] = c[k0:k1]
+                if ia != ja:
+                    xp[:,j0:j1,i0:i1] += x.transpose(0,2,1)
+                    if k0 < k1:
+                        cp[idx[k0:k1]-p0,j0:j1,i0:i1] = c[k0:k1].transpose(0,2,1)
+            xp = xp.transpose(1,0,2).reshape(nao,-1)
+            for k in range(nset):
+                tmp = pyscf.lib.dot(cp.reshape(-1,nao), dms[k])
+                tmp = tmp.reshape(p1-p0,nao,nao).transpose(1,0,2)
+                vk[k] += pyscf.lib.dot(tmp.reshape(nao,-1), xp.T)
+        return vk
+
+
+def _aoslice_by_atom(mol):
+    '''(shell-start, shell-stop, AO-start, AO-stop) for each atom.  Atoms
+    without basis functions have empty ranges.
+    '''
+    dims = (mol._bas[:,gto.ANG_OF]*2+1) * mol._bas[:,gto.NCTR_OF]
+    ao_loc = numpy.append(0, numpy.cumsum(dims))
+    bas_atom = mol._bas[:,gto.ATOM_OF]
+    sh0 = numpy.searchsorted(bas_atom, numpy.arange(mol.natm))
+    sh1 = numpy.searchsorted(bas_atom, numpy.arange(mol.natm), side='right')
+    return numpy.vstack((sh0, sh1, ao_loc[sh0], ao_loc[sh1])).T
+
+def prange(start, end, step):
+    for i in range(start, end, step):
+        yield i, min(i+step, end)
+
+
+if __name__ == '__main__':
+    from pyscf import scf
+    mol = gto.M(atom='O 0 0 0; H 0 -0.757 0.587; H 0 0.757 0.587',
+                basis='ccpvdz')
+    nao = mol.nao_nr()
+    dm = scf.RHF(mol).get_init_guess()
+    cderi = incore.cholesky_eri(mol)
+    eri = numpy.dot(cderi.T, cderi)
+    vj0, vk0 = scf.hf.dot_eri_dm(eri, dm)
+    vj1, vk1 = pari_coeff(mol, radius=numpy.inf).get_jk(dm)
+    print(abs(vj0-vj1).max(), abs(vk0-vk1).max())
+    vj1, vk1 = pari_coeff(mol).get_jk(dm)
+    print(abs(vj0-vj1).max(), abs(vk0-vk1).max())
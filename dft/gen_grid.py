@@ -53,6 +53,9 @@ LEBEDEV_ORDER = {
     125: 5294,
     131: 5810
 }
+# Size of the boxes (in Bohr) to group the grids, see arg_group_grids
+BOX_SIZE = 1.2
+
 LEBEDEV_NGRID = numpy.asarray((
     1   , 6   , 14  , 26  , 38  , 50  , 74  , 86  , 110 , 146 ,
     170 , 194 , 230 , 266 , 302 , 350 , 434 , 590 , 770 , 974 ,
@@ -273,6 +276,11 @@ def gen_partition(mol, atom_grids_tab,
     '''Generate the mesh grid coordinates and weights for DFT numerical integration.
     We can change radii_adjust, becke_scheme functions to generate different meshgrid.
 
+    The Becke cell functions are evaluated for a batch of grids at once.  If
+    the cell function has a compact support (e.g. the stratmann scheme), the
+    atoms which do not affect the weights of the batch are screened exactly
+    by a neighbor list.
+
     Returns:
         grid_coord and grid_weight arrays.  grid_coord array has shape (N,3);
         weight 1D array has N elements.
@@ -281,35 +289,154 @@ def gen_partition(mol, atom_grids_tab,
         atomic_radii_adjust = radii_adjust(mol, atomic_radii)
     atm_coords = numpy.array([mol.atom_coord(i) for i in range(mol.natm)])
     atm_dist = radi._inter_distance(mol)
-    def gen_grid_partition(coords):
-        ngrid = coords.shape[0]
-        grid_dist = numpy.empty((mol.natm,ngrid))
-        for ia in range(mol.natm):
-            dc = coords - atm_coords[ia]
-            grid_dist[ia] = numpy.sqrt(numpy.einsum('ij,ij->i',dc,dc))
-        pbecke = numpy.ones((mol.natm,ngrid))
-        for i in range(mol.natm):
-            for j in range(i):
-                g = 1/atm_dist[i,j] * (grid_dist[i]-grid_dist[j])
-                if radii_adjust is not None:
-                    g = atomic_radii_adjust(i, j, g)
-                g = becke_scheme(g)
-                pbecke[i] *= .5 * (1-g)
-                pbecke[j] *= .5 * (1+g)
-
+    mu_cutoff = _becke_cutoff(becke_scheme, radii_adjust)
+
+    def neighbor_atoms(grid_dist):
+        '''Atoms whose cell functions may differ from 0 or 1 on the grids'''
+        ngrid = grid_dist.shape[1]
+        nearest = grid_dist.argmin(axis=0)
+        r_near = grid_dist[nearest,numpy.arange(ngrid)]
+        r_atm = atm_dist[:,nearest]
+        r_atm[r_atm==0] = 1
+# mu[m] = (r_m - r_n) / R_mn where n is the nearest atom.  P_m = 0 if mu[m]
+# is larger than the cutoff
+        in_cell = (grid_dist - r_near) / r_atm < mu_cutoff
+        atoms = in_cell.any(axis=1)
+# Atom k can be dropped if s_km = 0 for all atoms m which have P_m != 0
+        for m in numpy.where(atoms)[0]:
+            r_atm = atm_dist[:,m].copy()
+            r_atm[m] = 1
+            mu = (grid_dist - grid_dist[m]) / r_atm.reshape(-1,1)
+            atoms |= ((mu < mu_cutoff) & in_cell[m]).any(axis=1)
+        return numpy.where(atoms)[0]
+
+    def gen_grid_partition(grid_dist, atoms):
+        pbecke = numpy.ones((len(atoms),grid_dist.shape[1]))
+        for i in range(1, len(atoms)):
+            ai = atoms[i]
+            aj = atoms[:i]
+            g = grid_dist[ai] - grid_dist[aj]
+            g /= atm_dist[ai,aj].reshape(-1,1)
+            if radii_adjust is not None:
+                g = atomic_radii_adjust(ai, aj.reshape(-1,1), g)
+            g = becke_scheme(g)
+            pbecke[i] *= numpy.prod(.5 * (1-g), axis=0)
+            pbecke[:i] *= .5 * (1+g)
         return pbecke
 
+    if mu_cutoff < 1:
+# Small batches to make the neighbor lists short
+        blksize = 1024
+    else:
+        blksize = max(int(4e6/mol.natm), 1)
     coords_all = []
     weights_all = []
     for ia in range(mol.natm):
         coords, vol = atom_grids_tab[mol.atom_symbol(ia)]
         coords = coords + atm_coords[ia]
-        pbecke = gen_grid_partition(coords)
-        weights = vol * pbecke[ia] / pbecke.sum(axis=0)
+        weights = numpy.zeros_like(vol)
+        if mu_cutoff < 1:
+# Group the grids of the same radial shell
+            dc = coords - atm_coords[ia]
+            idx = numpy.argsort(numpy.einsum('ij,ij->i', dc, dc))
+        else:
+            idx = numpy.arange(vol.size)
+        for p0, p1 in prange(0, vol.size, blksize):
+            grid_dist = numpy.empty((mol.natm,p1-p0))
+            for ja in range(mol.natm):
+                dc = coords[idx[p0:p1]] - atm_coords[ja]
+                grid_dist[ja] = numpy.sqrt(numpy.einsum('ij,ij->i',dc,dc))
+            if mu_cutoff < 1:
+                atoms = neighbor_atoms(grid_dist)
+            else:
+                atoms = numpy.arange(mol.natm)
+            if ia in atoms:
+                pbecke = gen_grid_partition(grid_dist, atoms)
+                i = numpy.where(atoms==ia)[0][0]
+                weights[idx[p0:p1]] = (vol[idx[p0:p1]] * pbecke[i] /
+                                       pbecke.sum(axis=0))
         coords_all.append(coords)
         weights_all.append(weights)
     return numpy.vstack(coords_all), numpy.hstack(weights_all)
 
+def prune_grids(mol, coords, weights, weight_cutoff=None,
+                density_cutoff=None, verbose=None):
+    '''Remove the grids of negligible weights and the grids on which the AO
+    values (thus the electron density) are negligible.
+
+    Kwargs:
+        weight_cutoff : float
+            Grids with abs(weight) < weight_cutoff are removed.
+        density_cutoff : float
+            Grids where max(AO_value**2) < density_cutoff are removed.
+
+    Returns:
+        coords and weights of the remaining grids.
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        if verbose is None: verbose = mol.verbose
+        log = logger.Logger(mol.stdout, verbose)
+    ngrids = weights.size
+    if weight_cutoff is not None:
+        idx = abs(weights) >= weight_cutoff
+        coords = coords[idx]
+        weights = weights[idx]
+        log.info('Remove %d grids with weight < %g', ngrids-weights.size,
+                 weight_cutoff)
+    if density_cutoff is not None:
+        from pyscf.dft import numint
+        idx = numpy.empty(weights.size, dtype=bool)
+        blksize = numint.BLKSIZE * 64
+        for p0, p1 in prange(0, weights.size, blksize):
+            ao = numint.eval_ao(mol, coords[p0:p1])
+            idx[p0:p1] = abs(ao).max(axis=1)**2 >= density_cutoff
+        nleft = idx.sum()
+        log.info('Remove %d grids with density < %g', weights.size-nleft,
+                 density_cutoff)
+        coords = coords[idx]
+        weights = weights[idx]
+    if weights.size < ngrids:
+        log.info('%d of %d grids (%.1f%%) are removed', ngrids-weights.size,
+                 ngrids, (ngrids-weights.size)*100./ngrids)
+    return coords, weights
+
+def arg_group_grids(mol, coords, box_size=BOX_SIZE):
+    '''Order of the grids which groups the grids in cubic boxes.  The boxes
+    are ordered along the Morton (Z-order) curve, i.e. the depth-first order
+    of the leaves of an octree.  The consecutive grids (and therefore the
+    blocks of numint.block_loop) are in the same box or the nearby boxes.
+    '''
+    boxes = numpy.floor((coords - coords.min(axis=0)) / box_size)
+    box_id = _morton_index(boxes.astype(numpy.int64))
+    return numpy.argsort(box_id, kind='mergesort')
+
+def _morton_index(boxes):
+    '''Interleave the bits of the (x,y,z) box indices'''
+    idx = numpy.zeros(len(boxes), dtype=numpy.int64)
+    for b in range(21):
+        for k in range(3):
+            idx |= ((boxes[:,k] >> b) & 1) << (3*b+2-k)
+    return idx
+
+def _becke_cutoff(becke_scheme, radii_adjust=None):
+    '''The value of mu = (r_i-r_j)/R_ij beyond which the cell function s_ij
+    is exactly 0.  1 if the becke_scheme has no compact support.
+    '''
+    x = numpy.linspace(0, 1, 101)
+    idx = numpy.where(becke_scheme(x) < 1)[0]
+    if len(idx) == 0:
+        nu = 0.
+    elif idx[-1]+1 < x.size:
+        nu = x[idx[-1]+1]
+    else:
+        return 1.
+    if radii_adjust is not None:
+# nu = mu + a*(1-mu^2) for the adjusted radii, |a| <= .5
+        nu = numpy.sqrt(2+2*nu) - 1
+    return min(nu, 1.)
+
 
 
 class Grids(pyscf.lib.StreamObject):
@@ -355,6 +482,22 @@ class Grids(pyscf.lib.StreamObject):
             Eg, grids.atom_grid = {'H': (20,110)} will generate 20 radial
             grids and 110 angular grids for H atom.
 
+        weight_cutoff : float or None
+            Remove the grids whose absolute weights are smaller than this
+            value.  None (default) to keep all grids.
+
+        density_cutoff : float or None
+            Remove the grids where the square of the largest AO value is
+            smaller than this value, i.e. the grids on which the electron
+            density is negligible for any reasonable density matrix.  None
+            (default) to keep all grids.
+
+        sort_grids : bool
+            Whether to sort the grids spatially (in boxes of box_size Bohr,
+            ordered along the Morton curve) so that each BLKSIZE block of
+            grids covers a small region and the AO screening mask of numint
+            is sparse.
+
         level : int
             To control the number of radial and angular grids.  The default
             level 3 corresponds to
@@ -386,6 +529,10 @@ class Grids(pyscf.lib.StreamObject):
         self.prune = nwchem_prune
         self.symmetry = mol.symmetry
         self.atom_grid = {}
+        self.weight_cutoff = None
+        self.density_cutoff = None
+        self.sort_grids = False
+        self.box_size = BOX_SIZE
 
 ##################################################
 # don't modify the following attributes, they are not input options
@@ -404,6 +551,12 @@ class Grids(pyscf.lib.StreamObject):
                         self.radii_adjust.__doc__)
         if self.atom_grid:
             logger.info(self, 'User specified grid scheme %s', str(self.atom_grid))
+        if self.weight_cutoff is not None:
+            logger.info(self, 'weight cutoff: %g', self.weight_cutoff)
+        if self.density_cutoff is not None:
+            logger.info(self, 'density cutoff: %g', self.density_cutoff)
+        if self.sort_grids:
+            logger.info(self, 'sort grids in boxes of %g Bohr', self.box_size)
         return self
 
     def build(self, mol=None):
@@ -416,10 +569,18 @@ class Grids(pyscf.lib.StreamObject):
                                                radi_method=self.radi_method,
                                                level=self.level,
                                                prune=self.prune)
-        self.coords, self.weights = \
-                self.gen_partition(mol, atom_grids_tab,
-                                   self.radii_adjust, self.atomic_radii,
-                                   self.becke_scheme)
+        coords, weights = self.gen_partition(mol, atom_grids_tab,
+                                             self.radii_adjust,
+                                             self.atomic_radii,
+                                             self.becke_scheme)
+        coords, weights = prune_grids(mol, coords, weights, self.weight_cutoff,
+                                      self.density_cutoff,
+                                      logger.Logger(self.stdout, self.verbose))
+        if self.sort_grids:
+            idx = arg_group_grids(mol, coords, self.box_size)
+            coords = coords[idx]
+            weights = weights[idx]
+        self.coords, self.weights = coords, weights
         pyscf.lib.logger.info(self, 'tot grids = %d', len(self.weights))
         return self.coords, self.weights
     setup_grids = build
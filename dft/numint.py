@@ -4,6 +4,7 @@
 #
 
 import ctypes
+import threading
 import numpy
 import scipy.linalg
 import pyscf.lib
@@ -501,8 +502,7 @@ def nr_rks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
     vmat = numpy.zeros((nset,nao,nao))
     if xctype == 'LDA':
         ao_deriv = 0
-        for ao, mask, weight, coords \
-                in ni.block_loop(mol, grids, nao, ao_deriv, max_memory, non0tab):
+        def block_vxc(ao, mask, weight, coords, nelec, excsum, vmat):
             for idm in range(nset):
                 rho = make_rho(idm, ao, mask, 'LDA')
                 exc, vxc = ni.eval_xc(xc_code, rho, 0, relativity, 1, verbose)[:2]
@@ -516,8 +516,7 @@ def nr_rks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
                 rho = exc = vxc = vrho = aow = None
     elif xctype == 'GGA':
         ao_deriv = 1
-        for ao, mask, weight, coords \
-                in ni.block_loop(mol, grids, nao, ao_deriv, max_memory, non0tab):
+        def block_vxc(ao, mask, weight, coords, nelec, excsum, vmat):
             for idm in range(nset):
                 rho = make_rho(idm, ao, mask, 'GGA')
                 exc, vxc = ni.eval_xc(xc_code, rho, 0, relativity, 1, verbose)[:2]
@@ -534,6 +533,8 @@ def nr_rks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
                 rho = exc = vxc = vrho = vsigma = wv = aow = None
     else:
         raise NotImplementedError('meta-GGA')
+    ni.block_reduce(mol, grids, nao, ao_deriv, max_memory, non0tab,
+                    block_vxc, (nelec, excsum, vmat))
 
     for i in range(nset):
         vmat[i] = vmat[i] + vmat[i].T
@@ -601,8 +602,7 @@ def nr_uks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
     vmat = numpy.zeros((2,nset,nao,nao))
     if xctype == 'LDA':
         ao_deriv = 0
-        for ao, mask, weight, coords \
-                in ni.block_loop(mol, grids, nao, ao_deriv, max_memory, non0tab):
+        def block_vxc(ao, mask, weight, coords, nelec, excsum, vmat):
             for idm in range(nset):
                 rho_a = make_rhoa(idm, ao, mask, xctype)
                 rho_b = make_rhob(idm, ao, mask, xctype)
@@ -623,8 +623,7 @@ def nr_uks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
                 rho_a = rho_b = exc = vxc = vrho = aow = None
     elif xctype == 'GGA':
         ao_deriv = 1
-        for ao, mask, weight, coords \
-                in ni.block_loop(mol, grids, nao, ao_deriv, max_memory, non0tab):
+        def block_vxc(ao, mask, weight, coords, nelec, excsum, vmat):
             for idm in range(nset):
                 rho_a = make_rhoa(idm, ao, mask, xctype)
                 rho_b = make_rhob(idm, ao, mask, xctype)
@@ -652,6 +651,8 @@ def nr_uks(ni, mol, grids, xc_code, dms, relativity=0, hermi=1,
                 rho_a = rho_b = exc = vxc = vrho = vsigma = wv = aow = None
     else:
         raise NotImplementedError('meta-GGA')
+    ni.block_reduce(mol, grids, nao, ao_deriv, max_memory, non0tab,
+                    block_vxc, (nelec, excsum, vmat))
 
     for i in range(nset):
         vmat[0,i] = vmat[0,i] + vmat[0,i].T
@@ -666,6 +667,14 @@ nr_rks_vxc = nr_rks
 nr_uks_vxc = nr_uks
 
 
+class _AOCache(dict):
+    '''AO values of grid blocks, indexed by the first grid of the block'''
+    def __init__(self, key):
+        dict.__init__(self)
+        self.key = key
+        self.size = 0  # MB
+
+
 class _NumInt(object):
     '''libxc is the default xc functional evaluator.  Change the default one
     by setting
@@ -675,6 +684,17 @@ class _NumInt(object):
 
     def __init__(self):
         self.non0tab = None
+# Number of Python threads to evaluate the grid blocks in nr_rks/nr_uks.
+# The AO evaluation and the matrix multiplication are parallelized with
+# OpenMP inside each block, but the XC functional (libxc/xcfun) is evaluated
+# in one thread.  Setting nthreads > 1 evaluates several blocks concurrently.
+# It is recommended to reduce OMP_NUM_THREADS accordingly.
+        self.nthreads = 1
+# Max memory (in MB) to hold the AO values on grids between the calls of
+# nr_rks/nr_uks, e.g. in the SCF iterations.  The AO values of the blocks
+# which do not fit in the cache are recomputed in every call.
+        self.ao_cache_size = 0
+        self._ao_cache = None
 
     def nr_vxc_(self, mol, grids, xc_code, dms, spin=0, relativity=0, hermi=1,
                 max_memory=2000, verbose=None):
@@ -751,6 +771,96 @@ class _NumInt(object):
             ao = self.eval_ao(mol, coords, deriv, non0tab=non0, out=buf)
             yield ao, non0, weight, coords
 
+    def block_reduce(self, mol, grids, nao, deriv, max_memory, non0tab,
+                     fblock, out):
+        '''Call fblock(ao, mask, weight, coords, *out) for all grid blocks
+        and accumulate the results in the arrays of out.  The blocks are
+        distributed over self.nthreads threads.  Each thread has its own AO
+        buffer and a private copy of the arrays of out, which are summed up
+        at the end.  If self.ao_cache_size is set, the AO values are kept in
+        memory and reused in the next call.
+        '''
+        ngrids = grids.weights.size
+        nthreads = max(1, min(self.nthreads, (ngrids+BLKSIZE-1)//BLKSIZE))
+        comp = (deriv+1)*(deriv+2)*(deriv+3)//6
+        blksize = int(max_memory*1e6/(comp*2*nao*8*BLKSIZE*nthreads))*BLKSIZE
+        if nthreads > 1:
+# Small blocks for load balance, at least 4 blocks for each thread
+            nblk = (ngrids+BLKSIZE*nthreads*4-1) // (BLKSIZE*nthreads*4)
+            blksize = min(blksize, nblk*BLKSIZE)
+        blksize = max(min(blksize, ngrids), BLKSIZE)
+        if non0tab is None:
+            non0tab = numpy.ones(((ngrids+BLKSIZE-1)//BLKSIZE,mol.nbas),
+                                 dtype=numpy.int8)
+        ao_cache = self._get_ao_cache(mol, grids, deriv, blksize)
+
+        tasks = iter(range(0, ngrids, blksize))
+        lock = threading.Lock()
+        errors = []
+        def run(v):
+            buf = None
+            while not errors:
+                with lock:
+                    ip0 = next(tasks, None)
+                if ip0 is None:
+                    break
+                ip1 = min(ngrids, ip0+blksize)
+                coords = grids.coords[ip0:ip1]
+                weight = grids.weights[ip0:ip1]
+                non0 = non0tab[ip0//BLKSIZE:]
+                if ao_cache is not None and ip0 in ao_cache:
+                    ao = ao_cache[ip0]
+                else:
+                    if buf is None:
+                        buf = numpy.empty((comp,blksize,nao))
+                    ao = self.eval_ao(mol, coords, deriv, non0tab=non0, out=buf)
+                    if ao_cache is not None:
+                        with lock:
+                            if ao_cache.size+ao.nbytes/1e6 < self.ao_cache_size:
+                                ao = ao_cache[ip0] = ao.copy()
+                                ao_cache.size += ao.nbytes/1e6
+                fblock(ao, non0, weight, coords, *v)
+            return v
+
+        if nthreads == 1:
+            run(out)
+            return out
+
+        results = []
+        def worker():
+            try:
+                results.append(run([numpy.zeros_like(x) for x in out]))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker) for i in range(nthreads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        for v in results:
+            for x, y in zip(out, v):
+                x += y
+        return out
+
+    def _get_ao_cache(self, mol, grids, deriv, blksize):
+        '''The cached AO values of the grid blocks.  The cache is discarded
+        when the molecule, the grids or the block partition are changed.
+        '''
+        if not self.ao_cache_size:
+            self._ao_cache = None
+            return None
+        key = (deriv, blksize, grids.coords, mol._atm, mol._bas, mol._env)
+        cache = self._ao_cache
+        if (cache is None or cache.key[:2] != key[:2] or
+            cache.key[2] is not grids.coords or
+            any([not numpy.array_equal(x, y)
+                 for x, y in zip(cache.key[3:], key[3:])])):
+            self._ao_cache = cache = _AOCache(
+                key[:3] + tuple([x.copy() for x in key[3:]]))
+        return cache
+
     def _gen_rho_evaluator(self, mol, dms, hermi=1):
         if hermi == 1:
             natocc = []
@@ -55,6 +55,7 @@ def get_veff_(ks, mol=None, dm=None, dm_last=0, vhf_last=0, hermi=1):
     t0 = (time.clock(), time.time())
     if ks.grids.coords is None:
         ks.grids.build_()
+        ks._numint.non0tab = None  # mask of the old grids
         t0 = logger.timer(ks, 'seting up grids', *t0)
 
     hyb = ks._numint.hybrid_coeff(ks.xc, spin=(mol.spin>0)+1)
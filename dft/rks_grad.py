@@ -25,6 +25,7 @@ def get_veff_(ks_grad, mol=None, dm=None):
     mf = ks_grad._scf
     if mf.grids.coords is None:
         mf.grids.build_()
+        mf._numint.non0tab = None  # mask of the old grids
     grids = mf.grids
     if mf._numint.non0tab is None:
         mf._numint.non0tab = mf._numint.make_mask(mol, mf.grids.coords)
@@ -3,6 +3,7 @@
 import unittest
 import numpy
 from pyscf import gto
+from pyscf import scf
 from pyscf import dft
 from pyscf.dft import gen_grid
 from pyscf.dft import radi
@@ -36,6 +37,47 @@ class KnowValues(unittest.TestCase):
         coord, weight = grid.setup_grids()
         self.assertAlmostEqual(numpy.linalg.norm(weight), 1730.3692983091271, 8)
 
+    def test_becke_screening(self):
+        mol = gto.M(atom=[['H', (0, 0, i*2.)] for i in range(8)], basis='sto3g')
+        atom_grids_tab = gen_grid.gen_atomic_grids(mol, {'H': (20, 50)})
+        self.assertTrue(gen_grid._becke_cutoff(gen_grid.stratmann) < 1)
+        coord, w0 = gen_grid.gen_partition(mol, atom_grids_tab,
+                                           radi.treutler_atomic_radii_adjust,
+                                           radi.BRAGG_RADII, gen_grid.stratmann)
+        # a cell function without compact support switches off the screening
+        no_screen = lambda g: numpy.minimum(gen_grid.stratmann(g), 1-1e-15)
+        self.assertEqual(gen_grid._becke_cutoff(no_screen), 1)
+        coord, w1 = gen_grid.gen_partition(mol, atom_grids_tab,
+                                           radi.treutler_atomic_radii_adjust,
+                                           radi.BRAGG_RADII, no_screen)
+        self.assertTrue(numpy.allclose(w0, w1))
+
+    def test_prune_grids(self):
+        grid = gen_grid.Grids(h2o)
+        grid.atom_grid = {"H": (20, 110), "O": (20, 110),}
+        coords0, w0 = grid.build()
+        grid.weight_cutoff = 1e-12
+        grid.density_cutoff = 1e-14
+        grid.sort_grids = True
+        coords1, w1 = grid.build()
+        self.assertTrue(w1.size < w0.size)
+        dm = scf.RHF(h2o).get_init_guess()
+        rho0 = dft.numint.eval_rho(h2o, dft.numint.eval_ao(h2o, coords0), dm)
+        rho1 = dft.numint.eval_rho(h2o, dft.numint.eval_ao(h2o, coords1), dm)
+        self.assertAlmostEqual(numpy.dot(rho0, w0), numpy.dot(rho1, w1), 9)
+
+    def test_sort_grids(self):
+        mol = gto.M(atom=[['H', (0, 0, i*2.)] for i in range(8)], basis='sto3g')
+        grid = gen_grid.Grids(mol)
+        grid.atom_grid = {"H": (20, 50)}
+        coords0, w0 = grid.build()
+        grid.sort_grids = True
+        coords1, w1 = grid.build()
+        self.assertAlmostEqual(abs(numpy.sort(w0) - numpy.sort(w1)).max(), 0, 14)
+        non0tab0 = dft.numint.make_mask(mol, coords0)
+        non0tab1 = dft.numint.make_mask(mol, coords1)
+        self.assertTrue(non0tab1.sum() <= non0tab0.sum())
+
     def test_radi(self):
         grid = gen_grid.Grids(h2o)
         grid.prune = None
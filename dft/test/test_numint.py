@@ -51,6 +51,37 @@ class KnowValues(unittest.TestCase):
                                      mf.grids.weights.size, non0tab)
         self.assertTrue(numpy.allclose(res0, res1))
 
+    def test_nr_vxc_threads(self):
+        numpy.random.seed(1)
+        dm = numpy.random.random((nao,nao))
+        dm = dm + dm.T
+        ni = dft.numint._NumInt()
+        ni.non0tab = ni.make_mask(mol, mf.grids.coords)
+        for xc in ('lda,vwn', 'b88,p86'):
+            ni.nthreads = 1
+            ref = ni.nr_rks(mol, mf.grids, xc, dm)
+            refu = ni.nr_uks(mol, mf.grids, xc, (dm,dm*.5))
+            ni.nthreads = 3
+            res = ni.nr_rks(mol, mf.grids, xc, dm)
+            resu = ni.nr_uks(mol, mf.grids, xc, (dm,dm*.5))
+            for x, y in zip(ref+refu, res+resu):
+                self.assertTrue(numpy.allclose(x, y))
+
+    def test_nr_vxc_ao_cache(self):
+        numpy.random.seed(1)
+        dm = numpy.random.random((nao,nao))
+        dm = dm + dm.T
+        ni = dft.numint._NumInt()
+        ni.non0tab = ni.make_mask(mol, mf.grids.coords)
+        ref = ni.nr_rks(mol, mf.grids, 'lda,vwn', dm)
+        ni.ao_cache_size = 50
+        res1 = ni.nr_rks(mol, mf.grids, 'lda,vwn', dm)
+        self.assertTrue(0 < ni._ao_cache.size < 50)
+        res2 = ni.nr_rks(mol, mf.grids, 'lda,vwn', dm)
+        for x, y, z in zip(ref, res1, res2):
+            self.assertTrue(numpy.allclose(x, y))
+            self.assertTrue(numpy.allclose(x, z))
+
 if __name__ == "__main__":
     print("Test numint")
     unittest.main()
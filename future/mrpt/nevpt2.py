@@ -835,8 +835,8 @@ def trans_e1_incore(mc, mo):
     nav = nmo - ncore
     eri1 = pyscf.ao2mo.incore.half_e1(eri_ao, (mo[:,:nocc],mo[:,ncore:]),
                                       compact=False)
-    load_buf = lambda r0,r1: eri1[r0*nav:r1*nav]
-    ppaa, papa, pacv, cvcv = _trans(mo, ncore, ncas, load_buf)
+    bufs = (eri1[i*nav:(i+1)*nav] for i in range(nocc))
+    ppaa, papa, pacv, cvcv = _trans(mo, ncore, ncas, bufs)
     return ppaa, papa, pacv, cvcv
 
 def trans_e1_outcore(mc, mo, max_memory=None, ioblk_size=256, tmpdir=None,
@@ -852,39 +852,29 @@ def trans_e1_outcore(mc, mo, max_memory=None, ioblk_size=256, tmpdir=None,
     nvir = nmo - nocc
     nav = nmo - ncore
 
-    swapfile = tempfile.NamedTemporaryFile(dir=tmpdir)
-    pyscf.ao2mo.outcore.half_e1(mol, (mo[:,:nocc],mo[:,ncore:]), swapfile.name,
+    fswap = pyscf.lib.scratch.open_scratch(dir=tmpdir)
+    pyscf.ao2mo.outcore.half_e1(mol, (mo[:,:nocc],mo[:,ncore:]), fswap,
                                 max_memory=max_memory, ioblk_size=ioblk_size,
                                 verbose=log, compact=False)
 
-    fswap = h5py.File(swapfile.name, 'r')
     klaoblks = len(fswap['0'])
-    def load_buf(r0,r1):
-        if mol.verbose >= pyscf.lib.logger.DEBUG1:
-            time1[:] = pyscf.lib.logger.timer(mol, 'between load_buf',
-                                              *tuple(time1))
-        buf = numpy.empty(((r1-r0)*nav,nao_pair))
-        col0 = 0
-        for ic in range(klaoblks):
-            dat = fswap['0/%d'%ic]
-            col1 = col0 + dat.shape[1]
-            buf[:,col0:col1] = dat[r0*nav:r1*nav]
-            col0 = col1
-        if mol.verbose >= pyscf.lib.logger.DEBUG1:
-            time1[:] = pyscf.lib.logger.timer(mol, 'load_buf', *tuple(time1))
-        return buf
+# The block of the next orbital is read in the background while the current
+# one is transformed
+    bufs = pyscf.lib.prefetch_h5([(fswap['0/%d'%ic], numpy.s_[i*nav:(i+1)*nav])
+                                  for ic in range(klaoblks)]
+                                 for i in range(nocc))
     time0 = pyscf.lib.logger.timer(mol, 'halfe1', *time0)
-    time1 = [time.clock(), time.time()]
     ao_loc = numpy.array(mol.ao_loc_nr(), dtype=numpy.int32)
     cvcvfile = tempfile.NamedTemporaryFile()
     with h5py.File(cvcvfile.name) as f5:
         cvcv = f5.create_dataset('eri_mo', (ncore*nvir,ncore*nvir), 'f8')
-        ppaa, papa, pacv = _trans(mo, ncore, ncas, load_buf, cvcv, ao_loc)[:3]
+        ppaa, papa, pacv = _trans(mo, ncore, ncas, bufs, cvcv, ao_loc)[:3]
     time0 = pyscf.lib.logger.timer(mol, 'trans_cvcv', *time0)
     fswap.close()
     return ppaa, papa, pacv, cvcvfile
 
-def _trans(mo, ncore, ncas, fload, cvcv=None, ao_loc=None):
+# bufs: the half-transformed integrals of each occupied orbital in order
+def _trans(mo, ncore, ncas, bufs, cvcv=None, ao_loc=None):
     nao, nmo = mo.shape
     nocc = ncore + ncas
     nvir = nmo - nocc
@@ -899,8 +889,9 @@ def _trans(mo, ncore, ncas, fload, cvcv=None, ao_loc=None):
     apa = numpy.empty((ncas,nmo*ncas))
     vpa = numpy.empty((nav,nmo*ncas))
     app = numpy.empty((ncas,nmo*nmo))
+    bufs = iter(bufs)
     for i in range(ncore):
-        buf = fload(i, i+1)
+        buf = next(bufs)
         klshape = (0, ncore, nocc, nvir)
         _ao2mo.nr_e2_(buf, mo, klshape,
                       aosym='s4', mosym='s1', out=vcv, ao_loc=ao_loc)
@@ -912,7 +903,7 @@ def _trans(mo, ncore, ncas, fload, cvcv=None, ao_loc=None):
                       aosym='s4', mosym='s1', out=apa, ao_loc=ao_loc)
         papa[i] = apa
     for i in range(ncas):
-        buf = fload(ncore+i, ncore+i+1)
+        buf = next(bufs)
         klshape = (0, ncore, nocc, nvir)
         _ao2mo.nr_e2_(buf, mo, klshape,
                       aosym='s4', mosym='s1', out=vcv, ao_loc=ao_loc)
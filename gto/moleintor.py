@@ -157,7 +157,11 @@ def getints(intor_name, atm, bas, env, bras=None, kets=None, comp=1, hermi=0,
       [-0.48176097 -0.10289944]]]
     '''
     if intor_name.startswith('cint1e') or intor_name.startswith('ECP'):
-        return getints1e(intor_name, atm, bas, env, bras, kets, comp, hermi)
+        def fbuild():
+            return getints1e(intor_name, atm, bas, env, bras, kets, comp, hermi)
+        return pyscf.lib.intcache.load_or_build(
+            fbuild, intor_name, (atm, bas, env, bras, kets, comp, hermi),
+            mmap_mode=None)
     elif intor_name.startswith('cint2e'):
         return getints2e(intor_name, atm, bas, env, bras, kets, comp,
                          aosym, out)
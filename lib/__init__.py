@@ -11,6 +11,8 @@ from pyscf.lib.numpy_helper import *
 from pyscf.lib.linalg_helper import *
 from pyscf.lib import chkfile
 from pyscf.lib import diis
+from pyscf.lib import intcache
+from pyscf.lib import scratch
 from pyscf.lib.misc import StreamObject
 
 '''
@@ -12,6 +12,30 @@
 #define BOXSIZE         64
 #define MIN(X,Y)        ((X)>(Y)?(Y):(X))
 
+/*
+ * Collect the indices of the AOs which are not screened on the grid block.
+ * The AO values of the screened shells are zero (see GTOeval_sph_iter), the
+ * matrix multiplications below are carried out on the compacted sub-matrix
+ * of the significant AOs.
+ */
+static int nonzero_ao_idx(int *ao_idx, char *non0table, int *bas, int nbas)
+{
+        int bas_id, i, nd;
+        int ao_id = 0;
+        int n = 0;
+        for (bas_id = 0; bas_id < nbas; bas_id++) {
+                nd = (bas[ANG_OF] * 2 + 1) * bas[NCTR_OF];
+                if (non0table[bas_id]) {
+                        for (i = 0; i < nd; i++, n++) {
+                                ao_idx[n] = ao_id + i;
+                        }
+                }
+                ao_id += nd;
+                bas += BAS_SLOTS;
+        }
+        return n;
+}
+
 static void dot_ao_dm(double *vm, double *ao, double *dm,
                       int nao, int nocc, int ngrids, char *non0table,
                       int *atm, int natm, int *bas, int nbas, double *env)
@@ -26,43 +50,32 @@ static void dot_ao_dm(double *vm, double *ao, double *dm,
                 return;
         }
 
-        char empty[nbas];
-        int nbox = (int)((nao-1)/BOXSIZE) + 1;
-        int box_id, bas_id, nd, b0, blen;
-        int ao_id = 0;
-        for (box_id = 0; box_id < nbox; box_id++) {
-                empty[box_id] = 1;
+        int ao_idx[nao];
+        int n = nonzero_ao_idx(ao_idx, non0table, bas, nbas);
+        if (n == 0) {
+                memset(vm, 0, sizeof(double) * ngrids * nocc);
+                return;
+        } else if (n == nao) {
+                dgemm_(&TRANS_N, &TRANS_N, &nocc, &ngrids, &nao,
+                       &D1, dm, &nocc, ao, &nao, &D0, vm, &nocc);
+                return;
         }
 
-        box_id = 0;
-        b0 = BOXSIZE;
-        for (bas_id = 0; bas_id < nbas; bas_id++) {
-                nd = (bas[ANG_OF] * 2 + 1) * bas[NCTR_OF];
-                assert(nd < BOXSIZE);
-                ao_id += nd;
-                empty[box_id] &= !non0table[bas_id];
-                if (ao_id == b0) {
-                        box_id++;
-                        b0 += BOXSIZE;
-                } else if (ao_id > b0) {
-                        box_id++;
-                        b0 += BOXSIZE;
-                        empty[box_id] = !non0table[bas_id];
+        int i, ig;
+        double *aobuf = malloc(sizeof(double) * ngrids * n);
+        double *dmbuf = malloc(sizeof(double) * n * nocc);
+        for (ig = 0; ig < ngrids; ig++) {
+                for (i = 0; i < n; i++) {
+                        aobuf[ig*n+i] = ao[ig*nao+ao_idx[i]];
                 }
-                bas += BAS_SLOTS;
         }
-
-        memset(vm, 0, sizeof(double) * ngrids * nocc);
-
-        for (box_id = 0; box_id < nbox; box_id++) {
-                if (!empty[box_id]) {
-                        b0 = box_id * BOXSIZE;
-                        blen = MIN(nao-b0, BOXSIZE);
-                        dgemm_(&TRANS_N, &TRANS_N, &nocc, &ngrids, &blen,
-                               &D1, dm+b0*nocc, &nocc, ao+b0, &nao,
-                               &D1, vm, &nocc);
-                }
+        for (i = 0; i < n; i++) {
+                memcpy(dmbuf+i*nocc, dm+ao_idx[i]*nocc, sizeof(double)*nocc);
         }
+        dgemm_(&TRANS_N, &TRANS_N, &nocc, &ngrids, &n,
+               &D1, dmbuf, &nocc, aobuf, &n, &D0, vm, &nocc);
+        free(aobuf);
+        free(dmbuf);
 }
 
 
@@ -96,6 +109,7 @@ static void dot_ao_ao(double *vv, double *ao1, double *ao2,
 {
         const char TRANS_T = 'T';
         const char TRANS_N = 'N';
+        const double D0 = 0;
         const double D1 = 1;
 
         if (nao <= BOXSIZE) {
@@ -104,50 +118,34 @@ static void dot_ao_ao(double *vv, double *ao1, double *ao2,
                 return;
         }
 
-        char empty[nbas];
-        int nbox = (int)((nao-1)/BOXSIZE) + 1;
-        int box_id, bas_id, nd, b0;
-        int ao_id = 0;
-        for (box_id = 0; box_id < nbox; box_id++) {
-                empty[box_id] = 1;
+        int ao_idx[nao];
+        int n = nonzero_ao_idx(ao_idx, non0table, bas, nbas);
+        if (n == 0) {
+                return;
+        } else if (n == nao) {
+                dgemm_(&TRANS_N, &TRANS_T, &nao, &nao, &ngrids,
+                       &D1, ao2, &nao, ao1, &nao, &D1, vv, &nao);
+                return;
         }
 
-        box_id = 0;
-        b0 = BOXSIZE;
-        for (bas_id = 0; bas_id < nbas; bas_id++) {
-                nd = (bas[ANG_OF] * 2 + 1) * bas[NCTR_OF];
-                assert(nd < BOXSIZE);
-                ao_id += nd;
-                empty[box_id] &= !non0table[bas_id];
-                if (ao_id == b0) {
-                        box_id++;
-                        b0 += BOXSIZE;
-                } else if (ao_id > b0) {
-                        box_id++;
-                        b0 += BOXSIZE;
-                        empty[box_id] = !non0table[bas_id];
+        int i, j, ig;
+        double *buf1 = malloc(sizeof(double) * (ngrids*n*2+n*n));
+        double *buf2 = buf1 + ngrids * n;
+        double *vbuf = buf2 + ngrids * n;
+        for (ig = 0; ig < ngrids; ig++) {
+                for (i = 0; i < n; i++) {
+                        buf1[ig*n+i] = ao1[ig*nao+ao_idx[i]];
+                        buf2[ig*n+i] = ao2[ig*nao+ao_idx[i]];
                 }
-                bas += BAS_SLOTS;
         }
-
-        int ib, jb, b0i, b0j, leni, lenj;
-
-        for (ib = 0; ib < nbox; ib++) {
-                if (!empty[ib]) {
-                        b0i = ib * BOXSIZE;
-                        leni = MIN(nao-b0i, BOXSIZE);
-                        for (jb = 0; jb < nbox; jb++) {
-                                if (!empty[jb]) {
-                                        b0j = jb * BOXSIZE;
-                                        lenj = MIN(nao-b0j, BOXSIZE);
-                                        dgemm_(&TRANS_N, &TRANS_T,
-                                               &lenj, &leni, &ngrids,
-                                               &D1, ao2+b0j, &nao, ao1+b0i, &nao,
-                                               &D1, vv+b0i*nao+b0j, &nao);
-                                }
-                        }
+        dgemm_(&TRANS_N, &TRANS_T, &n, &n, &ngrids,
+               &D1, buf2, &n, buf1, &n, &D0, vbuf, &n);
+        for (i = 0; i < n; i++) {
+                for (j = 0; j < n; j++) {
+                        vv[ao_idx[i]*nao+ao_idx[j]] += vbuf[i*n+j];
                 }
         }
+        free(buf1);
 }
 
 
@@ -8,11 +8,11 @@ DIIS
 """
 
 import sys
-import tempfile
 import numpy
 import scipy.linalg
 import h5py
 from pyscf.lib import logger
+from pyscf.lib import scratch
 
 
 INCORE_SIZE = 1e7
@@ -98,8 +98,7 @@ class DIIS(object):
         if isinstance(filename, str):
             self._diisfile = h5py.File(filename, 'w')
         else:
-            self._tmpfile = tempfile.NamedTemporaryFile()
-            self._diisfile = h5py.File(self._tmpfile.name, 'w')
+            self._diisfile = scratch.open_scratch()
         self._buffer = {}
         self._bookkeep = [] # keep the ordering of input vectors
         self._head = 0
@@ -109,7 +108,6 @@ class DIIS(object):
 
     def __del__(self):
         self._diisfile.close()
-        self._tmpfile = None
 
     def _store(self, key, value):
         if value.size < INCORE_SIZE:
@@ -186,6 +184,40 @@ class DIIS(object):
     def get_num_vec(self):
         return len(self._bookkeep)
 
+    def dump(self, h5grp):
+        '''Save the DIIS vectors and the DIIS state in the HDF5 group'''
+        keys = set(self._buffer.keys()).union(self._diisfile.keys())
+        for key in keys:
+            if key in self._buffer:
+                h5grp[key] = self._buffer[key]
+            else:
+                val = self._diisfile[key]
+                dset = h5grp.create_dataset(key, val.shape, val.dtype)
+                for p0,p1 in prange(0, val.shape[0], BLOCK_SIZE):
+                    dset[p0:p1] = val[p0:p1]
+        h5grp['bookkeep'] = numpy.asarray(self._bookkeep, dtype=int)
+        h5grp['head'] = self._head
+        h5grp['err_vec_touched'] = int(self._err_vec_touched)
+        if self._H is not None:
+            h5grp['H'] = self._H
+        if self._xprev is not None:
+            h5grp['xprev'] = self._xprev
+
+    def restore(self, h5grp):
+        '''Restore the DIIS state saved by :func:`dump`'''
+        for key in h5grp:
+            if key[0] in ('x', 'e') and key[1:].isdigit():
+                self._store(key, numpy.asarray(h5grp[key]))
+        self._bookkeep = [int(x) for x in h5grp['bookkeep'].value]
+        self._head = int(h5grp['head'].value)
+        self._err_vec_touched = bool(h5grp['err_vec_touched'].value)
+        if 'H' in h5grp:
+            self._H = h5grp['H'].value
+            self.space = self._H.shape[0] - 1
+        if 'xprev' in h5grp:
+            self._xprev = h5grp['xprev'].value
+        return self
+
     def update(self, x, xerr=None):
         '''Extrapolate vector 
 
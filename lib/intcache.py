@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Persistent on-disk cache for AO integrals
+
+The cache is content-addressed.  The key is the SHA1 hash of the integral
+name and the libcint arguments (atm, bas, env), so the integrals are reused
+by any calculation of the same geometry and basis, in the same process or in
+later processes.  Arrays are stored as .npy files and loaded as
+memory-mapped (copy-on-write) arrays.  When the total size of the cache
+exceeds the size limit, the least recently used files are removed.
+
+The cache is disabled by default.  It is enabled by setting the environment
+variable ``PYSCF_INTCACHE_DIR`` or :attr:`lib.parameters.INTCACHE_DIR` to the
+cache directory.  The size limit (in MB) is controlled by
+:attr:`lib.parameters.INTCACHE_MAX_SIZE`.
+
+:func:`load_or_build_shared` provides the integrals to the concurrent
+processes on the same node.  The integrals are computed by one process and
+saved in a node-local directory (``PYSCF_SHM_DIR`` or
+:attr:`lib.parameters.SHM_DIR`, e.g. /dev/shm).  All processes map the same
+file read-only.  The file is removed when the last process releases it.
+
+Examples:
+
+>>> from pyscf import lib, gto, scf
+>>> lib.parameters.INTCACHE_DIR = '/scratch/intcache'
+>>> mol = gto.M(atom='H 0 0 0; F 0 0 1.1', basis='ccpvdz')
+>>> scf.RHF(mol).run()  # ERIs are computed and saved in /scratch/intcache
+>>> scf.RHF(mol).run()  # ERIs are loaded from /scratch/intcache
+'''
+
+import os
+import time
+import errno
+import hashlib
+import tempfile
+import itertools
+import numpy
+from pyscf.lib import parameters as param
+
+
+class IntCache(object):
+    '''Directory of .npy files with LRU eviction
+
+    Attributes:
+        directory : str
+            Where the integral files are stored.
+        max_size : float or int
+            Size limit (in MB) of all files in the directory.
+    '''
+    def __init__(self, directory, max_size=param.INTCACHE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, tag, *args):
+        '''Hash key of the integral name tag and the arguments.  Arrays are
+        hashed by their dtype, shape and content.
+        '''
+        h = hashlib.sha1(str(tag).encode())
+        for x in args:
+            if isinstance(x, numpy.ndarray):
+                x = numpy.ascontiguousarray(x)
+                h.update(str((x.dtype.str, x.shape)).encode())
+                h.update(x)
+            else:
+                h.update(repr(x).encode())
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key+'.npy')
+
+    def load(self, key, mmap_mode='c'):
+        '''Load the array of the given key.  Return None if it is not cached.
+        '''
+        filename = self.path(key)
+        try:
+            dat = numpy.load(filename, mmap_mode=mmap_mode)
+        except (IOError, OSError, ValueError):
+            return None
+        try:
+            os.utime(filename, None)  # mark as the most recently used
+        except OSError:
+            pass
+        return dat
+
+    def save(self, key, array):
+        '''Save the array then remove the least recently used files if the
+        cache is over the size limit.
+        '''
+        array = numpy.asarray(array)
+        if array.nbytes/1e6 > self.max_size:
+            return self
+# Write to a temporary file then rename it, so that other processes never
+# see a partially written file
+        fd, tmpname = tempfile.mkstemp(suffix='.npy.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                numpy.save(f, array)
+            os.rename(tmpname, self.path(key))
+        except (IOError, OSError):
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+            raise
+        self.evict_(keep=key)
+        return self
+
+    def evict_(self, keep=None):
+        '''Remove the least recently used files until the total size is
+        smaller than max_size.
+        '''
+        files = []
+        for f in os.listdir(self.directory):
+            if f.endswith('.npy'):
+                filename = os.path.join(self.directory, f)
+                try:
+                    st = os.stat(filename)
+                except OSError:  # removed by another process
+                    continue
+                files.append((st.st_mtime, st.st_size, filename))
+        total = sum([x[1] for x in files]) / 1e6
+        keep = None if keep is None else self.path(keep)
+        for mtime, size, filename in sorted(files):
+            if total <= self.max_size:
+                break
+            if filename != keep:
+                try:
+                    os.remove(filename)
+                except OSError:
+                    pass
+                total -= size / 1e6
+        return self
+
+    def clear(self):
+        for f in os.listdir(self.directory):
+            if f.endswith('.npy') or f.endswith('.npy.tmp'):
+                os.remove(os.path.join(self.directory, f))
+        return self
+
+
+def get_cache():
+    '''The IntCache object of the directory given by the environment variable
+    PYSCF_INTCACHE_DIR or lib.parameters.INTCACHE_DIR.  None if the cache is
+    disabled.
+    '''
+    directory = os.environ.get('PYSCF_INTCACHE_DIR', param.INTCACHE_DIR)
+    if directory:
+        return IntCache(directory, param.INTCACHE_MAX_SIZE)
+    else:
+        return None
+
+def load_or_build(fbuild, tag, args, mmap_mode='c'):
+    '''Look up the integrals identified by tag and args in the cache.  If not
+    found, call fbuild() to compute the integrals and save them in the cache.
+
+    Args:
+        fbuild : function() => ndarray
+            To compute the integrals
+        tag : str
+            Name of the integrals
+        args : tuple
+            Arrays and parameters which determine the integrals, e.g.
+            (atm, bas, env)
+
+    Kwargs:
+        mmap_mode : str
+            How to load the cached array, see numpy.load.  The default 'c'
+            (copy-on-write) returns a memory-mapped array which can be
+            modified in memory without changing the file.  None to load the
+            array in memory.
+    '''
+    cache = get_cache()
+    if cache is None:
+        return fbuild()
+
+    key = cache.key(tag, *args)
+    dat = cache.load(key, mmap_mode)
+    if dat is None:
+        dat = fbuild()
+        cache.save(key, dat)
+    return dat
+
+
+def get_shm_dir():
+    '''The node-local directory given by the environment variable
+    PYSCF_SHM_DIR or lib.parameters.SHM_DIR.  None if sharing is disabled.
+    '''
+    return os.environ.get('PYSCF_SHM_DIR', param.SHM_DIR)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+class SharedRef(object):
+    '''A reference to the shared file.  The reference is a file
+    <key>.ref.<pid>.<n> next to the data file.  When the last reference is
+    released, the data file is removed.
+    '''
+    _count = itertools.count()
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.refname = '%s.ref.%d.%d' % (cache.path(key)[:-4], os.getpid(),
+                                         next(self._count))
+        open(self.refname, 'w').close()
+
+    def refs(self):
+        '''Reference files of the live processes'''
+        prefix = self.key + '.ref.'
+        refs = []
+        for f in os.listdir(self.cache.directory):
+            if f.startswith(prefix):
+                pid = int(f[len(prefix):].split('.')[0])
+                filename = os.path.join(self.cache.directory, f)
+                if _pid_alive(pid):
+                    refs.append(filename)
+                else:  # left by a killed process
+                    _remove(filename)
+        return refs
+
+    def release(self):
+        if self.refname is None:
+            return
+        _remove(self.refname)
+        self.refname = None
+        if not self.refs():
+            _remove(self.cache.path(self.key))
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+def _remove(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+def load_or_build_shared(fbuild, tag, args, directory=None, wait=.5):
+    '''Same to :func:`load_or_build`, but the integrals are shared by the
+    processes on the same node.  The first process computes the integrals
+    while the others wait.  All processes get the read-only memory-mapped
+    array of the same file.  The returned array holds a reference to the
+    file (the attribute _shm_ref).  The file is removed when the arrays of
+    all processes are released.
+
+    Kwargs:
+        directory : str
+            The node-local directory.  Default is :func:`get_shm_dir`.
+        wait : float
+            Time (in seconds) between polls while another process is
+            computing the integrals.
+    '''
+    if directory is None:
+        directory = get_shm_dir()
+    if not directory:
+        return fbuild()
+
+    cache = IntCache(directory, max_size=numpy.inf)
+    key = cache.key(tag, *args)
+    lockname = cache.path(key)[:-4] + '.lock'
+# Register the reference before the file is created, so that the file is
+# kept for the processes that are waiting for it.
+    ref = SharedRef(cache, key)
+    while True:
+        dat = cache.load(key, mmap_mode='r')
+        if dat is not None:
+            dat._shm_ref = ref
+            return dat
+
+        try:
+            fd = os.open(lockname, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            try:
+                with open(lockname) as f:
+                    pid = int(f.read() or 0)
+            except (IOError, OSError, ValueError):
+                pid = 0
+            if pid > 0 and not _pid_alive(pid):  # builder was killed
+                _remove(lockname)
+            else:
+                time.sleep(wait)
+            continue
+
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            cache.save(key, fbuild())
+        finally:
+            _remove(lockname)
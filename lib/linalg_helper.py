@@ -8,13 +8,12 @@ Extension to scipy.linalg module
 '''
 
 import sys
-import tempfile
 from functools import reduce
 import numpy
 import scipy.linalg
-import h5py
 from pyscf.lib import logger
 from pyscf.lib import numpy_helper
+from pyscf.lib import scratch
 
 def safe_eigh(h, s, lindep=1e-15):
     '''Solve generalized eigenvalue problem  h v = w s v.
@@ -492,15 +491,14 @@ def cho_solve(a, b):
 
 class _Xlist(list):
     def __init__(self):
-        self._fd = tempfile.NamedTemporaryFile()
-        self.scr_h5 = h5py.File(self._fd.name, 'w')
+        self.scr_h5 = scratch.open_scratch()
         self.index = []
     def __del__(self):
         self.scr_h5.close()
 
     def __getitem__(self, n):
         key = self.index[n]
-        return self.scr_h5[key].value
+        return numpy.asarray(self.scr_h5[key][:])
 
     def append(self, x):
         key = str(len(self.index) + 1)
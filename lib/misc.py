@@ -52,6 +52,16 @@ def current_memory():
     else:
         return 0, 0
 
+def num_threads():
+    '''Number of threads used by the OpenMP parallel C library.  It is
+    controlled by the environment variable OMP_NUM_THREADS.
+    '''
+    if os.environ.get('OMP_NUM_THREADS', '').isdigit():
+        return max(1, int(os.environ['OMP_NUM_THREADS']))
+    else:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+
 def c_int_arr(m):
     npm = numpy.array(m).flatten('C')
     arr = (ctypes.c_int * npm.size)(*npm)
@@ -318,6 +328,234 @@ def with_doc(doc):
         return fn
     return make_fn
 
+def run_threads(fn, args_list):
+    '''Call fn(*args) for each args in args_list concurrently, one thread for
+    each call.  The first exception raised in the threads is re-raised.
+    '''
+    import threading
+    errors = []
+    def wrap(args):
+        try:
+            fn(*args)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=wrap, args=(args,))
+               for args in args_list]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+
+class background_iter(object):
+    '''Iterate the generator in a background thread.  The next items (e.g.
+    the blocks of integrals read from disk) are prepared while the current
+    item is processed in the main thread.
+
+    Args:
+        iterable : an iterable object or a generator
+
+    Kwargs:
+        depth : int
+            Max number of items to prefetch.
+
+    Examples:
+
+    >>> with h5py.File('eri.h5', 'r') as f:
+    ...     for blk in background_iter((f['eri'][i:i+100] for i in range(0, n, 100))):
+    ...         print(blk.shape)
+    '''
+    _end = object()
+
+    def __init__(self, iterable, depth=1):
+        import threading
+        try:
+            import Queue as queue
+        except ImportError:
+            import queue
+        self._queue = queue.Queue(max(1, depth))
+        self._thread = threading.Thread(target=self._fill, args=(iterable,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _fill(self, iterable):
+        try:
+            for x in iterable:
+                self._queue.put((x, None))
+        except Exception as e:
+            self._queue.put((None, e))
+        self._queue.put((self._end, None))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._thread is None:
+            raise StopIteration
+        x, error = self._queue.get()
+        if error is not None:
+            self._thread = None
+            raise error
+        elif x is self._end:
+            self._thread.join()
+            self._thread = None
+            raise StopIteration
+        return x
+    next = __next__  # Python 2
+
+class prefetch_h5(object):
+    '''Read blocks of HDF5 datasets in a background thread.  While the caller
+    works on the current block, the next block is read into another buffer
+    (double buffering by default).
+
+    Args:
+        requests : iterable
+            Each request is (dataset, selection), or a list of (dataset,
+            selection) whose blocks are concatenated along the last axis.
+            The dataset can be an h5py dataset or a numpy array.  The
+            selection is an index or a tuple of slices, e.g. numpy.s_[0:100].
+
+    Kwargs:
+        nbuf : int
+            Number of buffers.
+
+    The returned block is overwritten by the later iterations.  It needs to be
+    copied if it is used after the next iteration.
+
+    Examples:
+
+    >>> with h5py.File('eri.h5', 'r') as f:
+    ...     for blk in prefetch_h5((f['eri'], numpy.s_[i:i+100]) for i in range(0, n, 100)):
+    ...         print(blk.shape)
+    '''
+    def __init__(self, requests, nbuf=2):
+        try:
+            import Queue as queue
+        except ImportError:
+            import queue
+        nbuf = max(2, nbuf)
+        self._free = queue.Queue()
+        for i in range(nbuf):
+            self._free.put(numpy.empty(0, dtype=numpy.uint8))
+        self._current = None
+        self._iter = background_iter(self._read(requests), depth=nbuf)
+
+    def _read(self, requests):
+        for req in requests:
+            if isinstance(req, tuple):
+                req = [req]
+            shapes = [_selection_shape(dset.shape, sel) for dset, sel in req]
+            shape = shapes[0][:-1] + (sum([s[-1] for s in shapes]),)
+            dtype = numpy.result_type(*[dset.dtype for dset, sel in req])
+            nbytes = int(numpy.prod(shape)) * dtype.itemsize
+            flat = self._free.get()
+            if flat.size < nbytes:
+                flat = numpy.empty(nbytes, dtype=numpy.uint8)
+            out = numpy.ndarray(shape, dtype, buffer=flat)
+            if len(req) == 1:
+                _read_block(req[0][0], req[0][1], out)
+            else:
+                col0 = 0
+                for (dset, sel), s in zip(req, shapes):
+                    col1 = col0 + s[-1]
+                    _read_block(dset, sel, out[...,col0:col1])
+                    col0 = col1
+            yield out, flat
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._current is not None:
+            self._free.put(self._current)
+            self._current = None
+        out, self._current = next(self._iter)
+        return out
+    next = __next__  # Python 2
+
+def _selection_shape(shape, sel):
+    if not isinstance(sel, tuple):
+        sel = (sel,)
+    out = []
+    for n, s in zip(shape, sel):
+        if isinstance(s, slice):
+            out.append(len(range(*s.indices(n))))
+    return tuple(out) + tuple(shape[len(sel):])
+
+def _read_block(dset, sel, out):
+    if hasattr(dset, 'read_direct') and out.flags.c_contiguous:
+        dset.read_direct(out, sel)
+    else:
+        out[:] = dset[sel]
+
+class background_writer(object):
+    '''Call the submitted functions (e.g. to write data to disk) in order in
+    a background thread.  The exception raised in the background thread is
+    re-raised in the main thread by :meth:`submit` or :meth:`close`.
+
+    Kwargs:
+        depth : int
+            Max number of the pending jobs.  :meth:`submit` blocks when the
+            queue is full.
+
+    Examples:
+
+    >>> with h5py.File('eri.h5', 'w') as f, background_writer() as writer:
+    ...     for i in range(10):
+    ...         writer.submit(f.__setitem__, 'eri/%d'%i, numpy.ones(100))
+    '''
+    def __init__(self, depth=1):
+        import threading
+        try:
+            import Queue as queue
+        except ImportError:
+            import queue
+        self._queue = queue.Queue(max(1, depth))
+        self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            if self._error is None:  # skip the remaining jobs after an error
+                try:
+                    job[0](*job[1], **job[2])
+                except Exception as e:
+                    self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, fn, *args, **kwargs):
+        self._check()
+        self._queue.put((fn, args, kwargs))
+
+    def close(self):
+        '''Wait for the pending jobs to finish'''
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._check()
+
+    def __enter__(self):
+        return self
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+        else:  # keep the original exception
+            try:
+                self.close()
+            except Exception:
+                pass
+
 
 if __name__ == '__main__':
     for i,j in tril_equal_pace(90, 30):
@@ -397,6 +397,25 @@ def prange(start, end, step):
     for i in range(start, end, step):
         yield i, min(i+step, end)
 
+class NPArrayWithTag(numpy.ndarray):
+    '''ndarray with extra attributes.  The attributes are not inherited by
+    the arrays derived from it (slices, sums, products ...).
+    '''
+    pass
+
+def tag_array(a, **kwargs):
+    '''Attach attributes to the array, e.g. the orbitals which generate the
+    density matrix
+
+    Examples:
+
+    >>> dm = tag_array(numpy.dot(c*occ, c.T), mo_coeff=c, mo_occ=occ)
+    >>> dm.mo_occ
+    '''
+    t = numpy.asarray(a).view(NPArrayWithTag)
+    t.__dict__.update(kwargs)
+    return t
+
 def norm(x, ord=None, axis=None):
     if axis is None:
         return numpy.linalg.norm(x, ord)
@@ -5,6 +5,18 @@
 L_MAX      = 8
 MEMORY_MAX = 4000 # MB
 
+# Directory of the persistent AO integral cache (see lib.intcache).  The cache
+# is disabled if it is None.
+INTCACHE_DIR = None
+INTCACHE_MAX_SIZE = 20000 # MB
+# Node-local directory (e.g. /dev/shm) to share the DF Cholesky vectors
+# between the processes running on the same node (see lib.intcache.
+# load_or_build_shared).  Sharing is disabled if it is None.
+SHM_DIR = None
+# Backend of the temporary files (see lib.scratch).  'h5py' or 'raw'.  It can
+# be overwritten by the environment variable PYSCF_SCRATCH_BACKEND.
+SCRATCH_BACKEND = 'h5py'
+
 #LIGHTSPEED = 137.035 999 679 94    #http://physics.nist.gov/cgi-bin/cuu/Value?alph
 LIGHTSPEED = 137.0359895
 # BOHR = .529 177 210 92(17) e-10m  #http://physics.nist.gov/cgi-bin/cuu/Value?bohrrada0
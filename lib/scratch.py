@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+'''
+Scratch storage for the temporary arrays
+
+The temporary arrays (the half-transformed integrals of ao2mo, the CCSD
+integrals, the DIIS vectors etc.) are never kept after the calculation.  Two
+backends with the same interface as h5py.File are available
+
+* 'h5py': a temporary HDF5 file.
+* 'raw': each dataset is a raw .npy file in a temporary directory, accessed
+  through numpy.memmap.  It avoids the HDF5 metadata and the HDF5 global
+  lock.  The data are cached by the OS page cache.
+
+Slicing a dataset returns a new array for both backends.  The zero-copy
+memory-mapped array of the raw backend is numpy.asarray(dataset).
+
+The backend is selected by the environment variable
+``PYSCF_SCRATCH_BACKEND`` or :attr:`lib.parameters.SCRATCH_BACKEND`.  The
+chkfiles and other persistent files are always saved in HDF5 format.
+
+Examples:
+
+>>> from pyscf import lib
+>>> f = lib.scratch.open_scratch(backend='raw')
+>>> f['a'] = numpy.ones((4,4))
+>>> f['a'][:2]
+array([[ 1.,  1.,  1.,  1.],
+       [ 1.,  1.,  1.,  1.]])
+>>> f.close()  # remove the scratch files
+'''
+
+import os
+import shutil
+import tempfile
+import numpy
+import h5py
+from pyscf.lib import parameters as param
+
+
+def get_backend():
+    return os.environ.get('PYSCF_SCRATCH_BACKEND', param.SCRATCH_BACKEND)
+
+def open_scratch(dir=None, backend=None):
+    '''A new scratch file which is removed when it is closed.
+
+    Kwargs:
+        dir : str
+            Where to create the scratch file.  By default, it's controlled by
+            shell environment variable ``TMPDIR``.
+        backend : str
+            'h5py' or 'raw'.  Default is :func:`get_backend`.
+    '''
+    if backend is None:
+        backend = get_backend()
+    if backend == 'raw':
+        return RawFile(dir=dir)
+    elif backend == 'h5py':
+        return H5TmpFile(dir=dir)
+    else:
+        raise ValueError('Unknown scratch backend %s' % backend)
+
+
+class H5TmpFile(h5py.File):
+    '''Temporary HDF5 file which is removed when it is closed'''
+    def __init__(self, dir=None):
+        self._tmpfile = tempfile.NamedTemporaryFile(dir=dir)
+        h5py.File.__init__(self, self._tmpfile.name, 'w')
+
+    def close(self):
+        if self.id:
+            h5py.File.close(self)
+        self._tmpfile = None
+
+
+class RawDataset(object):
+    '''A dataset of the raw backend.  The indexing follows h5py Dataset.'''
+    def __init__(self, filename):
+        self.filename = filename
+        self._mmap = numpy.load(filename, mmap_mode='r+')
+
+    shape = property(lambda self: self._mmap.shape)
+    dtype = property(lambda self: self._mmap.dtype)
+    size = property(lambda self: self._mmap.size)
+    ndim = property(lambda self: self._mmap.ndim)
+
+    def __len__(self):
+        return len(self._mmap)
+
+    def __getitem__(self, idx):
+        return numpy.array(self._mmap[idx])
+
+    def __setitem__(self, idx, value):
+        self._mmap[idx] = value
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self._mmap
+        else:
+            return numpy.asarray(self._mmap, dtype=dtype)
+
+    def read_direct(self, out, source_sel=None):
+        if source_sel is None:
+            out[:] = self._mmap
+        else:
+            out[:] = self._mmap[source_sel]
+
+    def flush(self):
+        self._mmap.flush()
+
+    @property
+    def value(self):
+        return numpy.array(self._mmap)
+
+
+class RawGroup(object):
+    '''A directory of the raw backend.  The keys of a group are the dataset
+    files (.npy) and the sub-directories.
+    '''
+    def __init__(self, root, path):
+        self._root = root
+        self.name = path
+
+    def _path(self, key):
+        return os.path.join(self.name, *str(key).strip('/').split('/'))
+
+    def create_group(self, key):
+        path = self._path(key)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        return RawGroup(self._root, path)
+
+    def create_dataset(self, key, shape=None, dtype=None, data=None, **kwargs):
+        '''The HDF5 options (chunks, compression etc.) are ignored'''
+        if data is not None:
+            data = numpy.asarray(data)
+            if shape is None:
+                shape = data.shape
+            if dtype is None:
+                dtype = data.dtype
+        if dtype is None:
+            dtype = numpy.double
+        path = self._path(key)
+        if key in self:
+            raise ValueError('Dataset %s exists' % key)
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        mm = numpy.lib.format.open_memmap(path+'.npy', mode='w+',
+                                          dtype=dtype, shape=tuple(shape))
+        if data is not None:
+            mm[...] = data
+        del(mm)
+        return self[key]
+
+    def __setitem__(self, key, data):
+        self.create_dataset(key, data=data)
+
+    def __getitem__(self, key):
+        path = self._path(key)
+        if os.path.isdir(path):
+            return RawGroup(self._root, path)
+        dsets = self._root._dsets
+        if path not in dsets:
+            if not os.path.isfile(path+'.npy'):
+                raise KeyError(key)
+            dsets[path] = RawDataset(path+'.npy')
+        return dsets[path]
+
+    def __contains__(self, key):
+        path = self._path(key)
+        return os.path.isdir(path) or os.path.isfile(path+'.npy')
+
+    def __delitem__(self, key):
+        path = self._path(key)
+        for p in list(self._root._dsets.keys()):
+            if p == path or p.startswith(path+os.sep):
+                del(self._root._dsets[p])
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.isfile(path+'.npy'):
+            os.remove(path+'.npy')
+        else:
+            raise KeyError(key)
+
+    def keys(self):
+        keys = []
+        for f in sorted(os.listdir(self.name)):
+            if f.endswith('.npy'):
+                keys.append(f[:-4])
+            elif os.path.isdir(os.path.join(self.name, f)):
+                keys.append(f)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+class RawFile(RawGroup):
+    '''Scratch file of the raw backend.  It is a temporary directory which is
+    removed when the file is closed.
+    '''
+    def __init__(self, dir=None):
+        self._dsets = {}
+        RawGroup.__init__(self, self, tempfile.mkdtemp(dir=dir))
+
+    def flush(self):
+        for dset in self._dsets.values():
+            dset.flush()
+
+    def close(self):
+        self._dsets = {}
+        if self.name is not None and os.path.isdir(self.name):
+            shutil.rmtree(self.name)
+        self.name = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+    def __exit__(self, type, value, traceback):
+        self.close()
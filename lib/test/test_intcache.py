@@ -0,0 +1,76 @@
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from pyscf import lib
+from pyscf import gto
+from pyscf import scf
+
+mol = gto.M(
+    verbose = 0,
+    atom = '''
+O     0    0        0
+H     0    -0.757   0.587
+H     0    0.757    0.587''',
+    basis = '631g',
+)
+
+class KnowValues(unittest.TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.dir_bak = lib.parameters.INTCACHE_DIR
+        lib.parameters.INTCACHE_DIR = self.cachedir
+
+    def tearDown(self):
+        lib.parameters.INTCACHE_DIR = self.dir_bak
+        shutil.rmtree(self.cachedir)
+
+    def test_int2e_cache(self):
+        eri0 = scf._vhf._int2e_sph(mol._atm, mol._bas, mol._env)
+        eri1 = scf._vhf.int2e_sph(mol._atm, mol._bas, mol._env)
+        self.assertEqual(len(os.listdir(self.cachedir)), 1)
+        eri2 = scf._vhf.int2e_sph(mol._atm, mol._bas, mol._env)
+        self.assertTrue(isinstance(eri2, numpy.memmap))
+        self.assertTrue(numpy.allclose(eri0, eri1))
+        self.assertTrue(numpy.allclose(eri0, eri2))
+        e1 = scf.RHF(mol).scf()
+        lib.parameters.INTCACHE_DIR = None
+        e0 = scf.RHF(mol).scf()
+        self.assertAlmostEqual(e0, e1, 12)
+
+    def test_int1e_cache(self):
+        s0 = mol.intor_symmetric('cint1e_ovlp_sph')
+        s1 = mol.intor_symmetric('cint1e_ovlp_sph')
+        self.assertTrue(numpy.allclose(s0, s1))
+        s1[:] = 0  # loaded in memory, modifying it does not affect the cache
+        s2 = mol.intor_symmetric('cint1e_ovlp_sph')
+        self.assertTrue(numpy.allclose(s0, s2))
+
+    def test_evict(self):
+        cache = lib.intcache.IntCache(self.cachedir, max_size=2e-3)
+        for i in range(4):
+            cache.save(cache.key('test', i), numpy.zeros(100))
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+        self.assertTrue(cache.load(cache.key('test', 3)) is not None)
+
+    def test_shared(self):
+        shmdir = os.path.join(self.cachedir, 'shm')
+        fbuild = lambda: numpy.arange(10.)
+        a = lib.intcache.load_or_build_shared(fbuild, 'test', (1,), shmdir)
+        b = lib.intcache.load_or_build_shared(lambda: None, 'test', (1,), shmdir)
+        self.assertTrue(numpy.allclose(a, b))
+        self.assertFalse(b.flags.writeable)
+        a._shm_ref.release()
+        self.assertTrue(b._shm_ref.cache.load(b._shm_ref.key) is not None)
+        b._shm_ref.release()
+        self.assertEqual(os.listdir(shmdir), [])
+
+
+if __name__ == "__main__":
+    print("Full Tests for intcache")
+    unittest.main()
@@ -0,0 +1,43 @@
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+import tempfile
+import unittest
+import numpy
+import h5py
+from pyscf import lib
+
+class KnowValues(unittest.TestCase):
+    def test_prefetch_h5(self):
+        a = numpy.random.random((100,10))
+        ftmp = tempfile.NamedTemporaryFile()
+        with h5py.File(ftmp.name, 'w') as f:
+            f['a'] = a
+            f['b'] = a[:,4:]
+            blks = [x.copy() for x in
+                    lib.prefetch_h5((f['a'], numpy.s_[i:i+7])
+                                    for i in range(0, 100, 7))]
+            self.assertTrue(numpy.allclose(numpy.vstack(blks), a))
+            blks = [x.copy() for x in
+                    lib.prefetch_h5([(f['a'], numpy.s_[i:i+7,:4]),
+                                     (f['b'], numpy.s_[i:i+7])]
+                                    for i in range(0, 100, 7))]
+            self.assertTrue(numpy.allclose(numpy.vstack(blks), a))
+
+    def test_background_writer(self):
+        out = []
+        with lib.background_writer() as writer:
+            for i in range(10):
+                writer.submit(out.append, i)
+        self.assertEqual(out, list(range(10)))
+        def fail():
+            raise KeyError
+        writer = lib.background_writer()
+        writer.submit(fail)
+        self.assertRaises(KeyError, writer.close)
+
+
+if __name__ == "__main__":
+    print("Full Tests for lib.misc")
+    unittest.main()
@@ -0,0 +1,57 @@
+#
+# Author: Qiming Sun <osirpt.sun@gmail.com>
+#
+
+import os
+import unittest
+import numpy
+from pyscf import lib
+from pyscf import gto
+from pyscf import ao2mo
+
+mol = gto.M(
+    verbose = 0,
+    atom = '''
+O     0    0        0
+H     0    -0.757   0.587
+H     0    0.757    0.587''',
+    basis = '631g',
+)
+
+class KnowValues(unittest.TestCase):
+    def test_raw_file(self):
+        f = lib.scratch.open_scratch(backend='raw')
+        a = numpy.random.random((5,4))
+        f['a'] = a
+        dset = f.create_group('g').create_dataset('b', (3,4), 'f8')
+        dset[1:] = a[:2]
+        self.assertTrue('g/b' in f)
+        self.assertEqual(len(f['g']), 1)
+        self.assertTrue(numpy.allclose(f['a'][2:4], a[2:4]))
+        self.assertTrue(numpy.allclose(f['g/b'][1:], a[:2]))
+        out = numpy.empty((2,4))
+        f['a'].read_direct(out, numpy.s_[1:3])
+        self.assertTrue(numpy.allclose(out, a[1:3]))
+        del(f['a'])
+        self.assertEqual(f.keys(), ['g'])
+        path = f.name
+        f.close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_ao2mo_raw_backend(self):
+        numpy.random.seed(1)
+        mo = numpy.random.random((mol.nao_nr(),6))
+        ref = ao2mo.outcore.full_iofree(mol, mo)
+        backend = lib.parameters.SCRATCH_BACKEND
+        lib.parameters.SCRATCH_BACKEND = 'raw'
+        try:
+            with lib.scratch.open_scratch() as f:
+                ao2mo.outcore.full(mol, mo, f, max_memory=.1, ioblk_size=.01)
+                self.assertTrue(numpy.allclose(f['eri_mo'][:], ref))
+        finally:
+            lib.parameters.SCRATCH_BACKEND = backend
+
+
+if __name__ == "__main__":
+    print("Full Tests for scratch")
+    unittest.main()
@@ -6,6 +6,7 @@
 #include <string.h>
 #include <math.h>
 #include <assert.h>
+#include "config.h"
 #include "cint.h"
 #include "cvhf.h"
 #include "optimizer.h"
@@ -196,6 +197,47 @@ void CVHFsetnr_direct_scf_dm(CVHFOpt *opt, double *dm, int nset,
 
 
 
+/*
+ * Count the shell quartets (ij|kl) with 8-fold symmetry (i>=j, k>=l, ij>=kl)
+ * and the quartets which are skipped by opt->fprescreen.
+ * counts[0] = num. quartets, counts[1] = num. skipped quartets
+ */
+void CVHFnrs8_prescreen_count(CVHFOpt *opt, size_t *counts,
+                              int *atm, int natm, int *bas, int nbas, double *env)
+{
+        size_t ntot = 0;
+        size_t nskip = 0;
+#pragma omp parallel default(none) \
+        shared(opt, atm, bas, env, nbas) \
+        reduction(+:ntot, nskip)
+        {
+                int ish, jsh, ksh, lsh;
+                int shls[4];
+#pragma omp for schedule(dynamic, 1)
+                for (ish = 0; ish < nbas; ish++) {
+                        shls[0] = ish;
+                        for (jsh = 0; jsh <= ish; jsh++) {
+                                shls[1] = jsh;
+                                for (ksh = 0; ksh <= ish; ksh++) {
+                                for (lsh = 0; lsh <= ksh; lsh++) {
+                                        if ((ksh == ish) && (lsh > jsh)) {
+                                                break;
+                                        }
+                                        shls[2] = ksh;
+                                        shls[3] = lsh;
+                                        ntot++;
+                                        if (!(*opt->fprescreen)(shls, opt, atm, bas, env)) {
+                                                nskip++;
+                                        }
+                                } }
+                        }
+                }
+        }
+        counts[0] = ntot;
+        counts[1] = nskip;
+}
+
+
 /*
  *************************************************
  */
@@ -2,6 +2,8 @@
  *
  */
 
+#include <stddef.h>
+
 #if !defined(HAVE_DEFINED_CVHFOPT_H)
 #define HAVE_DEFINED_CVHFOPT_H
 typedef struct CVHFOpt_struct {
@@ -39,5 +41,8 @@ void CVHFsetnr_direct_scf(CVHFOpt *opt, int *atm, int natm,
 void CVHFsetnr_direct_scf_dm(CVHFOpt *opt, double *dm, int nset,
                              int *atm, int natm, int *bas, int nbas, double *env);
 
+void CVHFnrs8_prescreen_count(CVHFOpt *opt, size_t *counts,
+                              int *atm, int natm, int *bas, int nbas, double *env);
+
 void CVHFnr_optimizer(CVHFOpt **vhfopt, int *atm, int natm,
                       int *bas, int nbas, double *env);
@@ -7,6 +7,7 @@ import numpy
 from pyscf.lib import logger
 import pyscf.symm
 import pyscf.scf
+import pyscf.ao2mo
 from pyscf.mcscf import casci
 from pyscf import fci
 
@@ -31,6 +32,32 @@ class CASCI(casci.CASCI):
         label_symmetry_(self, self.mo_coeff)
         return casci.CASCI.kernel(self, mo_coeff, ci0)
 
+    def ao2mo(self, mo_coeff=None):
+        ncore = self.ncore
+        nocc = ncore + self.ncas
+        if mo_coeff is None:
+            mo_coeff = self.mo_coeff[:,ncore:nocc]
+            orbsym = self.orbsym[ncore:nocc]
+        else:
+            try:
+                orbsym = pyscf.symm.label_orb_symm(self.mol, self.mol.irrep_id,
+                                                   self.mol.symm_orb, mo_coeff,
+                                                   s=self._scf.get_ovlp())
+            except ValueError:
+                orbsym = []
+        if len(orbsym) != mo_coeff.shape[1]:
+            return casci.CASCI.ao2mo(self, mo_coeff)
+
+# Only the symmetry-allowed blocks of the active space integrals are computed
+        log = logger.Logger(self.stdout, self.verbose)
+        if self._scf._eri is not None:
+            eri = pyscf.ao2mo.symm_blocks.full(self._scf._eri, mo_coeff, orbsym,
+                                               self.max_memory, log)
+        else:
+            eri = pyscf.ao2mo.symm_blocks.full(self.mol, mo_coeff, orbsym,
+                                               self.max_memory, log)
+        return pyscf.ao2mo.symm_blocks.unpack(eri, orbsym)
+
     def _eig(self, mat, b0, b1):
         return eig(mat, numpy.array(self.orbsym[b0:b1]))
 
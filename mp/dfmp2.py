@@ -12,6 +12,7 @@ import numpy
 from pyscf import lib
 from pyscf.lib import logger
 from pyscf import df
+from pyscf.ao2mo import _ao2mo
 
 
 # the MO integral for MP2 is (ov|ov). The most efficient integral
@@ -19,30 +20,80 @@ from pyscf import df
 # (ij|kl) => (ij|ol) => (ol|ij) => (ol|oj) => (ol|ov) => (ov|ov)
 #   or    => (ij|ol) => (oj|ol) => (oj|ov) => (ov|ov)
 
-def kernel(mp, mo_energy, mo_coeff, nocc, ioblk=256, verbose=None):
+# Number of the threads to evaluate the blocks of occupied orbitals
+NTHREADS = 1
+# DF-MP2 computes the energy only by default, t2 = None
+WITH_T2 = False
+
+def kernel(mp, mo_energy, mo_coeff, nocc, ioblk=256, verbose=None,
+           with_t2=WITH_T2, nthreads=None):
     nmo = mo_coeff.shape[1]
     nvir = nmo - nocc
     auxmol = df.incore.format_aux_basis(mp.mol, mp.auxbasis)
     naoaux = auxmol.nao_nr()
-
-    iolen = max(int(ioblk*1e6/8/(nvir*nocc)), 160)
+    if nthreads is None: nthreads = NTHREADS
+    nthreads = max(1, nthreads)
 
     eia = lib.direct_sum('i-a->ia', mo_energy[:nocc], mo_energy[nocc:])
-    t2 = None
-    emp2 = 0
+    if with_t2:
+        t2 = numpy.empty((nocc,nocc,nvir,nvir))
+    else:
+        t2 = None
+
+# The (L|ov) slabs are read in iolen rows.  Two slabs (the one in use and the
+# one being prefetched), (ia|jb) of an occupied block and the denominators
+# (overwritten by t2) are held by each thread.  The untouched pages of t2 are
+# not counted by current_memory.
+    iolen = min(naoaux, max(int(ioblk*1e6/8/(nocc*nvir)), 160))
+    mem_now = lib.current_memory()[0]
+    max_memory = mp.max_memory - mem_now - nthreads*iolen*nocc*nvir*2*8/1e6
+    if with_t2:
+        max_memory -= nocc**2*nvir**2*8/1e6
+    max_memory = max(0, max_memory)
+    blksize = int(max_memory*1e6/8 / (nthreads*nocc*nvir**2*2))
+    blksize = min(nocc, max(1, blksize))
+    logger.debug1(mp, 'DF-MP2 occ block size %d, nthreads %d', blksize, nthreads)
+
     with mp.ao2mo(mo_coeff, nocc) as fov:
-        for p0, p1 in prange(0, naoaux, iolen):
-            logger.debug(mp, 'Load cderi block %d:%d', p0, p1)
-            qov = numpy.array(fov[p0:p1], copy=False)
-            for i in range(nocc):
-                buf = numpy.dot(qov[:,i*nvir:(i+1)*nvir].T,
-                                qov).reshape(nvir,nocc,nvir)
-                gi = numpy.array(buf, copy=False)
-                gi = gi.reshape(nvir,nocc,nvir).transpose(1,2,0)
-                t2i = gi/lib.direct_sum('jb+a->jba', eia, eia[i])
-                # 2*ijab-ijba
-                theta = gi*2 - gi.transpose(0,2,1)
-                emp2 += numpy.einsum('jab,jab', t2i, theta)
+        def get_ovov(i0, i1):
+            #: g[ia,jb] = (L|ia) (L|jb) for all j < i1
+            g = numpy.zeros(((i1-i0)*nvir,i1*nvir))
+            qovs = lib.prefetch_h5((fov, numpy.s_[p0:p1,:i1*nvir])
+                                   for p0, p1 in prange(0, naoaux, iolen))
+            for p0, p1 in prange(0, naoaux, iolen):
+                qov = next(qovs)
+                qi = numpy.asarray(qov[:,i0*nvir:i1*nvir], order='C')
+                lib.dot(qi.T, qov, 1, g, 1)
+            return g.reshape(i1-i0,nvir,i1,nvir)
+
+        def energy(t2ij, g):
+            # 2*ijab-ijba
+            return (numpy.einsum('iajb,iajb', t2ij, g) * 2 -
+                    numpy.einsum('iajb,ibja', t2ij, g))
+
+        def contract(tasks, e_out):
+            emp2 = 0
+            for i0, i1 in tasks:
+                g = get_ovov(i0, i1)
+                t2ij = lib.direct_sum('ia+jb->iajb', eia[i0:i1], eia[:i1])
+                t2ij = numpy.divide(g, t2ij, out=t2ij)
+                # (jb|ia) = (ia|jb) for j < i0
+                emp2 += energy(t2ij[:,:,i0:], g[:,:,i0:])
+                emp2 += energy(t2ij[:,:,:i0], g[:,:,:i0]) * 2
+                if t2 is not None:
+                    t2[i0:i1,:i1] = t2ij.transpose(0,2,1,3)
+                    t2[:i0,i0:i1] = t2ij[:,:,:i0].transpose(2,0,3,1)
+                logger.debug1(mp, 'DF-MP2 occ block [%d:%d]', i0, i1)
+            e_out.append(emp2)
+
+        tasks = list(prange(0, nocc, blksize))
+        e_out = []
+        if nthreads == 1:
+            contract(tasks, e_out)
+        else:
+            lib.run_threads(contract, [(tasks[p::nthreads], e_out)
+                                       for p in range(nthreads)])
+    emp2 = sum(e_out)
 
     return emp2, t2
 
@@ -64,7 +115,7 @@ class MP2(object):
         self.emp2 = None
         self.t2 = None
 
-    def kernel(self, mo_energy=None, mo_coeff=None, nocc=None):
+    def kernel(self, mo_energy=None, mo_coeff=None, nocc=None, with_t2=WITH_T2):
         if mo_coeff is None:
             mo_coeff = self._scf.mo_coeff
         if mo_energy is None:
@@ -74,7 +125,7 @@ class MP2(object):
 
         self.emp2, self.t2 = \
                 kernel(self, mo_energy, mo_coeff, nocc, self.ioblk,
-                       verbose=self.verbose)
+                       verbose=self.verbose, with_t2=with_t2)
         logger.log(self, 'RMP2 energy = %.15g', self.emp2)
         return self.emp2, self.t2
 
@@ -82,12 +133,43 @@ class MP2(object):
     def ao2mo(self, mo_coeff, nocc):
         time0 = (time.clock(), time.time())
         log = logger.Logger(self.stdout, self.verbose)
+        cderi = self._cderi
+        if (cderi is None and getattr(self._scf, '_cderi', None) is not None and
+            getattr(self._scf, 'auxbasis', None) == self.auxbasis):
+# Reuse the AO Cholesky vectors of the DF-SCF object (which may be shared
+# with the other processes, see lib.intcache.load_or_build_shared)
+            cderi = self._scf._cderi
+        if cderi is not None:
+            nao, nmo = mo_coeff.shape
+            nvir = nmo - nocc
+            with df.load(cderi) as feri:
+                naoaux = feri.shape[0]
+                mem_now = lib.current_memory()[0]
+                if naoaux*nocc*nvir*8/1e6 < self.max_memory - mem_now:
+                    fov = _cderi_to_ov(feri, mo_coeff, nocc, self.max_memory-mem_now)
+                    log.timer('Integral transformation (P|ia)', *time0)
+                    return df.load(fov)
+
         cderi_file = tempfile.NamedTemporaryFile()
         df.outcore.general(self.mol, (mo_coeff[:,:nocc], mo_coeff[:,nocc:]),
                            cderi_file.name, auxbasis=self.auxbasis, verbose=log)
         time1 = log.timer('Integral transformation (P|ia)', *time0)
         return df.load(cderi_file)
 
+def _cderi_to_ov(feri, mo_coeff, nocc, max_memory):
+    '''Transform the AO Cholesky vectors (L|pq) to (L|ia) in memory'''
+    nao, nmo = mo_coeff.shape
+    nvir = nmo - nocc
+    naoaux = feri.shape[0]
+    nao_pair = nao*(nao+1)//2
+    fov = numpy.empty((naoaux,nocc*nvir))
+    blksize = max(4, int(max_memory*.3e6/8/(nao_pair+nao*nmo)))
+    for p0, p1 in prange(0, naoaux, blksize):
+        eri1 = numpy.asarray(feri[p0:p1], order='C')
+        _ao2mo.nr_e2_(eri1, mo_coeff, (0,nocc,nocc,nvir), aosym='s2kl',
+                      mosym='s1', out=fov[p0:p1])
+    return fov
+
 def prange(start, end, step):
     for i in range(start, end, step):
         yield i, min(i+step, end)
@@ -22,21 +22,60 @@ t2[i,j,a,b] = (ia|jb) / D_ij^ab
 # (ij|kl) => (ij|ol) => (ol|ij) => (ol|oj) => (ol|ov) => (ov|ov)
 #   or    => (ij|ol) => (oj|ol) => (oj|ov) => (ov|ov)
 
-def kernel(mp, mo_energy, mo_coeff, verbose=logger.NOTE):
+# Number of the threads to evaluate the blocks of occupied orbitals.  The
+# default is one thread, which leaves the parallelism to BLAS and numpy.
+NTHREADS = 1
+# Whether to keep the t2 amplitudes.  Energy-only calculations can skip the
+# (nocc,nocc,nvir,nvir) array.
+WITH_T2 = True
+
+def kernel(mp, mo_energy, mo_coeff, verbose=logger.NOTE, with_t2=WITH_T2,
+           nthreads=None):
     nocc = mp.nocc
     nvir = mp.nmo - nocc
+    if nthreads is None: nthreads = NTHREADS
+    nthreads = max(1, nthreads)
     eia = pyscf.lib.direct_sum('i-a->ia', mo_energy[:nocc], mo_energy[nocc:])
-    t2 = numpy.empty((nocc,nocc,nvir,nvir))
-    emp2 = 0
+    if with_t2:
+        t2 = numpy.empty((nocc,nocc,nvir,nvir))
+    else:
+        t2 = None
+
+# gi and the denominators (overwritten by t2i) of each thread.  The untouched
+# pages of t2 are not counted by current_memory.
+    mem_now = pyscf.lib.current_memory()[0]
+    max_memory = mp.max_memory - mem_now
+    if with_t2:
+        max_memory -= nocc**2*nvir**2*8/1e6
+    max_memory = max(0, max_memory)
+    blksize = int(max_memory*1e6/8 / (nthreads*nocc*nvir**2*2))
+    blksize = min(nocc, max(1, blksize))
+    logger.debug1(mp, 'MP2 occ block size %d, nthreads %d', blksize, nthreads)
 
     with mp.ao2mo(mo_coeff) as ovov:
-        for i in range(nocc):
-            gi = numpy.asarray(ovov[i*nvir:(i+1)*nvir])
-            gi = gi.reshape(nvir,nocc,nvir).transpose(1,0,2)
-            t2[i] = gi/pyscf.lib.direct_sum('jb+a->jba', eia, eia[i])
-            # 2*ijab-ijba
-            theta = gi*2 - gi.transpose(0,2,1)
-            emp2 += numpy.einsum('jab,jab', t2[i], theta)
+        def contract(tasks, e_out):
+            emp2 = 0
+            for i0, i1 in tasks:
+                gi = numpy.asarray(ovov[i0*nvir:i1*nvir])
+                gi = gi.reshape(i1-i0,nvir,nocc,nvir)
+                t2i = pyscf.lib.direct_sum('ia+jb->iajb', eia[i0:i1], eia)
+                t2i = numpy.divide(gi, t2i, out=t2i)
+                # 2*ijab-ijba
+                #: emp2 += numpy.einsum('iajb,iajb', t2i, gi*2-gi.transpose(0,3,2,1))
+                emp2 += numpy.dot(t2i.ravel(), gi.ravel()) * 2
+                emp2 -= numpy.einsum('iajb,ibja', t2i, gi)
+                if t2 is not None:
+                    t2[i0:i1] = t2i.transpose(0,2,1,3)
+            e_out.append(emp2)
+
+        tasks = list(pyscf.lib.prange(0, nocc, blksize))
+        e_out = []
+        if nthreads == 1:
+            contract(tasks, e_out)
+        else:
+            pyscf.lib.run_threads(contract, [(tasks[p::nthreads], e_out)
+                                             for p in range(nthreads)])
+    emp2 = sum(e_out)
 
     return emp2, t2
 
@@ -128,7 +167,7 @@ class MP2(pyscf.lib.StreamObject):
         self.e_corr = None
         self.t2 = None
 
-    def kernel(self, mo_energy=None, mo_coeff=None):
+    def kernel(self, mo_energy=None, mo_coeff=None, with_t2=WITH_T2):
         if mo_coeff is None:
             mo_coeff = self._scf.mo_coeff
         if mo_energy is None:
@@ -139,7 +178,8 @@ class MP2(pyscf.lib.StreamObject):
             raise RuntimeError
 
         self.emp2, self.t2 = \
-                kernel(self, mo_energy, mo_coeff, verbose=self.verbose)
+                kernel(self, mo_energy, mo_coeff, verbose=self.verbose,
+                       with_t2=with_t2)
         logger.log(self, 'RMP2 energy = %.15g', self.emp2)
         self.e_corr = self.emp2
         return self.emp2, self.t2
@@ -6,6 +6,7 @@ from pyscf import scf
 from pyscf import gto
 from pyscf import ao2mo
 from pyscf import mp
+from pyscf.mp import dfmp2
 
 mol = gto.Mole()
 mol.verbose = 0
@@ -48,6 +49,17 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(e, -0.20401996728747132, 11)
         self.assertAlmostEqual(numpy.linalg.norm(t2), 0.19379397642098622, 9)
 
+    def test_mp2_blocked(self):
+        pt = mp.mp2.MP2(mf)
+        e0, t2ref = pt.kernel()
+        pt.max_memory = 1
+        e1, t2 = mp.mp2.kernel(pt, mf.mo_energy, mf.mo_coeff, nthreads=3)
+        self.assertAlmostEqual(e1, e0, 11)
+        self.assertTrue(numpy.allclose(t2, t2ref))
+        e1, t2 = pt.kernel(with_t2=False)
+        self.assertAlmostEqual(e1, e0, 11)
+        self.assertTrue(t2 is None)
+
     def test_mp2_dm(self):
         nocc = mol.nelectron//2
         nmo = mf.mo_energy.size
@@ -89,6 +101,32 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(numpy.einsum('iajb,iajb', eris, dm2ref)*.5, emp2, 9)
         self.assertTrue(numpy.allclose(pt.make_rdm2(), dm2ref))
 
+    def test_dfmp2_reuse_cderi(self):
+        mf1 = scf.density_fit(scf.RHF(mol))
+        mf1.conv_tol = 1e-12
+        mf1.scf()
+        pt = dfmp2.MP2(mf1)
+        e1 = pt.kernel()[0]
+        pt.max_memory = 0  # recompute (P|ia) in outcore.general
+        e0 = pt.kernel()[0]
+        self.assertAlmostEqual(e0, e1, 11)
+        self.assertAlmostEqual(e1, -0.203986171133, 8)
+
+    def test_dfmp2_blocked(self):
+        mf1 = scf.density_fit(scf.RHF(mol))
+        mf1.scf()
+        pt = dfmp2.MP2(mf1)
+        e0, t2ref = pt.kernel(with_t2=True)
+        pt.max_memory = 0
+        pt.ioblk = .05
+        nocc = mol.nelectron // 2
+        e1, t2 = dfmp2.kernel(pt, mf1.mo_energy, mf1.mo_coeff, nocc,
+                              pt.ioblk, with_t2=True, nthreads=3)
+        self.assertAlmostEqual(e1, e0, 11)
+        self.assertTrue(numpy.allclose(t2, t2ref))
+        e1, t2 = pt.kernel()
+        self.assertAlmostEqual(e1, e0, 11)
+        self.assertTrue(t2 is None)
 
 
 if __name__ == "__main__":
@@ -41,6 +41,12 @@ to control the SCF method.
         Direct SCF is used by default.
     direct_scf_tol : float
         Direct SCF cutoff threshold.  Default is 1e-13.
+    direct_scf_rebuild : int
+        Rebuild the incremental HF potential of direct SCF from scratch
+        every N cycles.  Default is 8.
+    direct_scf_stall_ratio : float
+        Rebuild the HF potential from scratch if |ddm| shrinks by less than
+        this factor.  Default is 1.
     callback : function
         callback function takes one dict as the argument which is
         generated by the builtin function :func:`locals`, so that the
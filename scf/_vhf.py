@@ -76,6 +76,24 @@ class VHFOpt(object):
                    c_bas.ctypes.data_as(ctypes.c_void_p), nbas,
                    c_env.ctypes.data_as(ctypes.c_void_p))
 
+    def count_prescreen(self, atm, bas, env):
+        '''Number of shell quartets (8-fold symmetry) and the number of
+        quartets which are skipped by the prescreen function for the
+        density matrices given in the last call of :func:`set_dm_`.
+        '''
+        c_atm = numpy.asarray(atm, dtype=numpy.int32, order='C')
+        c_bas = numpy.asarray(bas, dtype=numpy.int32, order='C')
+        c_env = numpy.asarray(env, dtype=numpy.double, order='C')
+        natm = ctypes.c_int(c_atm.shape[0])
+        nbas = ctypes.c_int(c_bas.shape[0])
+        counts = numpy.zeros(2, dtype=numpy.uint64)
+        libcvhf.CVHFnrs8_prescreen_count(self._this,
+                                         counts.ctypes.data_as(ctypes.c_void_p),
+                                         c_atm.ctypes.data_as(ctypes.c_void_p), natm,
+                                         c_bas.ctypes.data_as(ctypes.c_void_p), nbas,
+                                         c_env.ctypes.data_as(ctypes.c_void_p))
+        return int(counts[0]), int(counts[1])
+
 class _CVHFOpt(ctypes.Structure):
     _fields_ = [('nbas', ctypes.c_int),
                 ('_padding', ctypes.c_int),
@@ -390,6 +408,12 @@ def direct_bindm(intor, aosym, jkdescript,
 
 # 8-fold permutation symmetry
 def int2e_sph(atm, bas, env):
+    '''8-fold symmetry packed ERIs.  The ERIs are read from the persistent
+    integral cache (see :mod:`lib.intcache`) if it is enabled.
+    '''
+    return pyscf.lib.intcache.load_or_build(lambda: _int2e_sph(atm, bas, env),
+                                            'int2e_sph', (atm, bas, env))
+def _int2e_sph(atm, bas, env):
     c_atm = numpy.asarray(atm, dtype=numpy.int32, order='C')
     c_bas = numpy.asarray(bas, dtype=numpy.int32, order='C')
     c_env = numpy.asarray(env, dtype=numpy.double, order='C')
@@ -58,7 +58,11 @@ def density_fit(mf, auxbasis='weigend+etb'):
             self._cderi = None
             self._naoaux = None
             self._tag_df = True
-            self._keys = self._keys.union(['auxbasis'])
+# Set pari_radius (in Bohr) to fit the AO pairs with the auxiliary functions
+# of the nearby atoms only (see df.pari).  None for the standard DF.
+            self.pari_radius = None
+            self._pari = None
+            self._keys = self._keys.union(['auxbasis', 'pari_radius'])
 
         def get_jk(self, mol=None, dm=None, hermi=1):
             if mol is None: mol = self.mol
@@ -90,6 +94,17 @@ def density_fit(mf, auxbasis='weigend+etb'):
 def get_jk_(mf, mol, dms, hermi=1, with_j=True, with_k=True):
     t0 = (time.clock(), time.time())
     log = logger.Logger(mf.stdout, mf.verbose)
+    if getattr(mf, 'pari_radius', None) is not None and len(dms) > 0:
+        pari = getattr(mf, '_pari', None)
+# Rebuild the fitting coefficients if mol, auxbasis or pari_radius changed
+        if (pari is None or pari.mol is not mol or
+            pari.auxbasis != mf.auxbasis or pari.radius != mf.pari_radius):
+            mf._pari = df.pari.pari_coeff(mol, mf.auxbasis, mf.pari_radius,
+                                          max_memory=mf.max_memory, verbose=log)
+        vj, vk = mf._pari.get_jk(dms, hermi, with_j, with_k)
+        logger.timer(mf, 'vj and vk', *t0)
+        return vj, vk
+
     if not hasattr(mf, '_cderi') or mf._cderi is None:
         nao = mol.nao_nr()
         nao_pair = nao*(nao+1)//2
@@ -121,9 +136,17 @@ def get_jk_(mf, mol, dms, hermi=1, with_j=True, with_k=True):
     fdrv = _ao2mo.libao2mo.AO2MOnr_e2_drv
     ftrans = _ao2mo._fpointer('AO2MOtranse2_nr_s2')
 
+# The orbitals attached to the density matrices by make_rdm1 (see
+# hf.make_rdm1).  They are not available for the density matrix difference
+# or an arbitrary density matrix.
+    mo_coeff = getattr(dms, 'mo_coeff', None)
+    mo_occ = getattr(dms, 'mo_occ', None)
     if isinstance(dms, numpy.ndarray) and dms.ndim == 2:
         dms = [dms]
         nset = 1
+        if mo_coeff is not None:
+            mo_coeff = [mo_coeff]
+            mo_occ = [mo_occ]
     else:
         nset = len(dms)
     vj = numpy.zeros((nset,nao,nao))
@@ -143,7 +166,16 @@ def get_jk_(mf, mol, dms, hermi=1, with_j=True, with_k=True):
                 for i in range(nao):
                     dmtril[k][i*(i+1)//2+i] *= .5
 
-            if with_k:
+            if with_k and mo_coeff is not None:
+                c = numpy.asarray(mo_coeff[k])
+                e = numpy.asarray(mo_occ[k])
+                pos = e > OCCDROP
+                neg = e < -OCCDROP
+                tmp = numpy.einsum('ij,j->ij', c[:,pos], numpy.sqrt(e[pos]))
+                cpos.append(numpy.asarray(tmp, order='F'))
+                tmp = numpy.einsum('ij,j->ij', c[:,neg], numpy.sqrt(-e[neg]))
+                cneg.append(numpy.asarray(tmp, order='F'))
+            elif with_k:
                 e, c = scipy.linalg.eigh(dm)
                 pos = e > OCCDROP
                 neg = e < -OCCDROP
@@ -158,8 +190,7 @@ def get_jk_(mf, mol, dms, hermi=1, with_j=True, with_k=True):
             t1 = log.timer('Initialization', *t0)
         with df.load(cderi) as feri:
             buf = numpy.empty((BLOCKDIM*nao,nao))
-            for b0, b1 in prange(0, mf._naoaux, BLOCKDIM):
-                eri1 = numpy.array(feri[b0:b1], copy=False)
+            for b0, b1, eri1 in _iter_cderi(feri, mf._naoaux, BLOCKDIM):
                 if mf.verbose >= logger.DEBUG1:
                     t1 = log.timer('load buf %d:%d'%(b0,b1), *t1)
                 for k in range(nset):
@@ -200,8 +231,7 @@ def get_jk_(mf, mol, dms, hermi=1, with_j=True, with_k=True):
             t1 = log.timer('Initialization', *t0)
         with df.load(cderi) as feri:
             buf = numpy.empty((2,BLOCKDIM,nao,nao))
-            for b0, b1 in prange(0, mf._naoaux, BLOCKDIM):
-                eri1 = numpy.array(feri[b0:b1], copy=False)
+            for b0, b1, eri1 in _iter_cderi(feri, mf._naoaux, BLOCKDIM):
                 if mf.verbose >= logger.DEBUG1:
                     t1 = log.timer('load buf %d:%d'%(b0,b1), *t1)
                 for k in range(nset):
@@ -340,6 +370,19 @@ def r_get_jk_(mf, mol, dms, hermi=1):
     return vj, vk
 
 
+def _iter_cderi(feri, naoaux, blksize):
+    '''Loop over the blocks of the Cholesky vectors (L|ij).  If the vectors
+    are stored on disk, the next block is read in a background thread while
+    the current block is being contracted.
+    '''
+    def load():
+        for b0, b1 in prange(0, naoaux, blksize):
+            yield b0, b1, numpy.array(feri[b0:b1], copy=False)
+    if isinstance(feri, numpy.ndarray):
+        return load()
+    else:
+        return pyscf.lib.background_iter(load())
+
 _call_count = 0
 def prange(start, end, step):
     global _call_count
@@ -123,20 +123,33 @@ Keyword argument "init_dm" is replaced by "dm0"''')
 
     scf_conv = False
     cycle = 0
+    norm_ddm = 1e99
+    incfock_cycle = 0  # cycles since the last full build of the HF potential
     cput1 = logger.timer(mf, 'initialize scf', *cput0)
     while not scf_conv and cycle < max(1, mf.max_cycle):
         dm_last = dm
         last_hf_e = e_tot
+        norm_ddm_last = norm_ddm
 
         fock = mf.get_fock(h1e, s1e, vhf, dm, cycle, adiis)
         mo_energy, mo_coeff = mf.eig(fock, s1e)
         mo_occ = mf.get_occ(mo_energy, mo_coeff)
         dm = mf.make_rdm1(mo_coeff, mo_occ)
-        vhf = mf.get_veff(mol, dm, dm_last, vhf)
+        norm_ddm = numpy.linalg.norm(dm-dm_last)
+# Incremental Fock build accumulates the errors of the screened integrals.
+# Rebuild the HF potential periodically or when |ddm| stops decreasing.
+        incfock_cycle += 1
+        if (mf.direct_scf and
+            ((mf.direct_scf_rebuild and incfock_cycle >= mf.direct_scf_rebuild) or
+             norm_ddm > norm_ddm_last * mf.direct_scf_stall_ratio)):
+            logger.debug(mf, 'Rebuild HF potential from scratch')
+            incfock_cycle = 0
+            vhf = mf.get_veff(mol, dm)
+        else:
+            vhf = mf.get_veff(mol, dm, dm_last, vhf)
         e_tot = mf.energy_tot(dm, h1e, vhf)
 
         norm_gorb = numpy.linalg.norm(mf.get_grad(mo_coeff, mo_occ, h1e+vhf))
-        norm_ddm = numpy.linalg.norm(dm-dm_last)
         logger.info(mf, 'cycle= %d E= %.15g  delta_E= %4.3g  |g|= %4.3g  |ddm|= %4.3g',
                     cycle+1, e_tot, e_tot-last_hf_e, norm_gorb, norm_ddm)
 
@@ -445,7 +458,10 @@ def make_rdm1(mo_coeff, mo_occ):
             Occupancy
     '''
     mocc = mo_coeff[:,mo_occ>0]
-    return numpy.dot(mocc*mo_occ[mo_occ>0], mocc.T.conj())
+    dm = numpy.dot(mocc*mo_occ[mo_occ>0], mocc.T.conj())
+# The orbitals are attached to the density matrix so that the J/K builder can
+# use them instead of diagonalizing the density matrix (see dfhf.get_jk_)
+    return pyscf.lib.tag_array(dm, mo_coeff=mo_coeff, mo_occ=mo_occ)
 
 
 ################################################
@@ -497,8 +513,10 @@ def dot_eri_dm(eri, dm, hermi=0):
     return vj, vk
 
 
-def get_jk(mol, dm, hermi=1, vhfopt=None):
-    '''Compute J, K matrices for the given density matrix
+def get_jk(mol, dm, hermi=1, vhfopt=None, max_memory=None):
+    '''Compute J, K matrices for the given density matrix.  For a list of
+    density matrices, the AO integrals are evaluated once and contracted with
+    all density matrices (in blocks if max_memory is given).
 
     Args:
         mol : an instance of :class:`Mole`
@@ -517,6 +535,12 @@ def get_jk(mol, dm, hermi=1, vhfopt=None):
         vhfopt :
             A class which holds precomputed quantities to optimize the
             computation of J, K matrices
+        max_memory : float or int
+            Memory (in MB) available for the J, K matrices.  If given, the
+            density matrices are divided into blocks and each block takes one
+            pass of the AO integrals.  The block size is determined by
+            max_memory.  By default, all density matrices are handled in one
+            pass.
 
     Returns:
         Depending on the given dm, the function returns one J and one K matrix,
@@ -533,11 +557,35 @@ def get_jk(mol, dm, hermi=1, vhfopt=None):
     >>> print(j.shape)
     (3, 2, 2)
     '''
-    vj, vk = _vhf.direct(numpy.array(dm, copy=False),
-                         mol._atm, mol._bas, mol._env,
-                         vhfopt=vhfopt, hermi=hermi)
+    dm = numpy.asarray(dm, order='C')
+    nao = dm.shape[-1]
+    ndm = dm.size // (nao*nao)
+    blksize = _jk_blksize(nao, ndm, max_memory)
+    if dm.ndim == 2 or blksize >= ndm:
+        vj, vk = _vhf.direct(dm, mol._atm, mol._bas, mol._env,
+                             vhfopt=vhfopt, hermi=hermi)
+    else:
+        dms = dm.reshape(ndm,nao,nao)
+        vj = numpy.empty((ndm,nao,nao))
+        vk = numpy.empty((ndm,nao,nao))
+        for p0, p1 in pyscf.lib.prange(0, ndm, blksize):
+            vj[p0:p1], vk[p0:p1] = _vhf.direct(dms[p0:p1],
+                                               mol._atm, mol._bas, mol._env,
+                                               vhfopt=vhfopt, hermi=hermi)
+        vj = vj.reshape(dm.shape)
+        vk = vk.reshape(dm.shape)
     return vj, vk
 
+def _jk_blksize(nao, ndm, max_memory=None):
+    '''Number of density matrices which can be contracted in one integral
+    pass.  Each density matrix needs the output J, K matrices and one
+    thread-private copy of J, K for each OpenMP thread.
+    '''
+    if max_memory is None:
+        return ndm
+    unit = nao**2*2 * (pyscf.lib.num_threads()+1) * 8/1e6
+    return max(1, min(ndm, int(max_memory/unit)))
+
 
 def get_veff(mol, dm, dm_last=None, vhf_last=None, hermi=1, vhfopt=None):
     '''Hartree-Fock potential matrix for the given density matrix
@@ -800,6 +848,16 @@ def unpack_uniq_var(dx, mo_occ):
     return x1 - x1.T
 
 
+def _dump_prescreen_stat(mf, mol):
+    '''Print the fraction of shell quartets skipped by the direct SCF
+    prescreen for the density matrix (difference) of the last J/K build.
+    '''
+    if (mf.verbose >= logger.DEBUG and
+        isinstance(mf.opt, _vhf.VHFOpt) and mf.opt._dmcondname is not None):
+        ntot, nskip = mf.opt.count_prescreen(mol._atm, mol._bas, mol._env)
+        logger.debug(mf, 'direct SCF skipped %d of %d shell quartets (%.1f%%)',
+                     nskip, ntot, nskip*100./max(1, ntot))
+
 
 class SCF(pyscf.lib.StreamObject):
     '''SCF base class.   non-relativistic RHF.
@@ -836,6 +894,15 @@ class SCF(pyscf.lib.StreamObject):
             Direct SCF is used by default.
         direct_scf_tol : float
             Direct SCF cutoff threshold.  Default is 1e-13.
+        direct_scf_rebuild : int
+            In direct SCF, the HF potential is built incrementally from the
+            density matrix difference.  It is rebuilt from scratch every
+            direct_scf_rebuild cycles.  Set it to 0 to turn off the periodic
+            rebuild.  Default is 8.
+        direct_scf_stall_ratio : float
+            Rebuild the HF potential from scratch if the norm of the density
+            matrix difference is larger than direct_scf_stall_ratio times the
+            norm of the previous cycle.  Default is 1.
         callback : function(envs_dict) => None
             callback function takes one dict as the argument which is
             generated by the builtin function :func:`locals`, so that the
@@ -892,6 +959,8 @@ class SCF(pyscf.lib.StreamObject):
         self.level_shift = 0
         self.direct_scf = True
         self.direct_scf_tol = 1e-13
+        self.direct_scf_rebuild = 8
+        self.direct_scf_stall_ratio = 1.
 ##################################################
 # don't modify the following attributes, they are not input options
         self.mo_energy = None
@@ -932,6 +1001,9 @@ class SCF(pyscf.lib.StreamObject):
         logger.info(self, 'direct_scf = %s', self.direct_scf)
         if self.direct_scf:
             logger.info(self, 'direct_scf_tol = %g', self.direct_scf_tol)
+            logger.info(self, 'direct_scf_rebuild = %d', self.direct_scf_rebuild)
+            logger.info(self, 'direct_scf_stall_ratio = %g',
+                        self.direct_scf_stall_ratio)
         if self.chkfile:
             logger.info(self, 'chkfile to save SCF result = %s', self.chkfile)
         logger.info(self, 'max_memory %d MB (current use %d MB)',
@@ -1136,7 +1208,8 @@ class SCF(pyscf.lib.StreamObject):
         cpu0 = (time.clock(), time.time())
         if self.direct_scf and self.opt is None:
             self.opt = self.init_direct_scf(mol)
-        vj, vk = get_jk(mol, dm, hermi, self.opt)
+        max_memory = self.max_memory - pyscf.lib.current_memory()[0]
+        vj, vk = get_jk(mol, dm, hermi, self.opt, max_memory)
         logger.timer(self, 'vj and vk', *cpu0)
         return vj, vk
     def get_jk(self, mol=None, dm=None, hermi=1):
@@ -1161,6 +1234,7 @@ class SCF(pyscf.lib.StreamObject):
         if self.direct_scf:
             ddm = numpy.asarray(dm) - numpy.asarray(dm_last)
             vj, vk = self.get_jk(mol, ddm, hermi=hermi)
+            _dump_prescreen_stat(self, mol)
             return numpy.array(vhf_last, copy=False) + vj - vk * .5
         else:
             vj, vk = self.get_jk(mol, dm, hermi=hermi)
@@ -1275,9 +1349,10 @@ class RHF(SCF):
                 self._eri = _vhf.int2e_sph(mol._atm, mol._bas, mol._env)
             vj, vk = dot_eri_dm(self._eri, dm, hermi)
         else:
-            if self.direct_scf:
+            if self.direct_scf and self.opt is None:
                 self.opt = self.init_direct_scf(mol)
-            vj, vk = get_jk(mol, dm, hermi, self.opt)
+            max_memory = self.max_memory - pyscf.lib.current_memory()[0]
+            vj, vk = get_jk(mol, dm, hermi, self.opt, max_memory)
         logger.timer(self, 'vj and vk', *cpu0)
         return vj, vk
 
@@ -137,7 +137,10 @@ def make_rdm1(mo_coeff, mo_occ):
     mo_b = mo_coeff[:,mo_occ==2]
     dm_a = numpy.dot(mo_a, mo_a.T)
     dm_b = numpy.dot(mo_b, mo_b.T)
-    return numpy.array((dm_a, dm_b))
+    occ_a = (mo_occ > 0).astype(numpy.double)
+    occ_b = (mo_occ ==2).astype(numpy.double)
+    return pyscf.lib.tag_array((dm_a, dm_b), mo_coeff=(mo_coeff,mo_coeff),
+                               mo_occ=(occ_a,occ_b))
 
 def energy_elec(mf, dm=None, h1e=None, vhf=None):
     if dm is None: dm = mf.make_rdm1()
@@ -35,6 +35,46 @@ class KnowValues(unittest.TestCase):
         mf = scf.density_fit(scf.RHF(mol))
         self.assertAlmostEqual(mf.scf(), -76.025936299702536, 9)
 
+    def test_rhf_outcore(self):
+        mf = scf.density_fit(scf.RHF(mol))
+        mf.max_memory = 0  # stream the Cholesky vectors from disk
+        self.assertAlmostEqual(mf.scf(), -76.025936299702536, 9)
+
+    def test_get_jk_with_mo(self):
+        mf = scf.density_fit(scf.RHF(mol))
+        e, c = mf.eig(mf.get_hcore(), mf.get_ovlp())
+        occ = mf.get_occ(e, c)
+        dm = mf.make_rdm1(c, occ)
+        self.assertTrue(hasattr(dm, 'mo_coeff'))
+        vj0, vk0 = mf.get_jk(mol, dm)
+        vj1, vk1 = mf.get_jk(mol, numpy.array(dm))
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+
+        mf = scf.density_fit(scf.UHF(mol))
+        dm = mf.make_rdm1((c,c), (occ*.5,occ*.5))
+        vj0, vk0 = mf.get_jk(mol, dm)
+        vj1, vk1 = mf.get_jk(mol, numpy.array(dm))
+        self.assertTrue(numpy.allclose(vj0, vj1))
+        self.assertTrue(numpy.allclose(vk0, vk1))
+
+    def test_pari(self):
+        edf = -76.025936299702536
+        mf = scf.density_fit(scf.RHF(mol))
+        mf.pari_radius = 1e9  # all auxiliary functions, same to the dense DF
+        self.assertAlmostEqual(mf.scf(), edf, 8)
+# The fitting error decreases when the auxiliary functions of more atoms are
+# included.  _pari is rebuilt when pari_radius is changed.
+        mf.pari_radius = 0
+        err0 = abs(mf.scf() - edf)
+        mf.pari_radius = 1.9  # the fitting of H-H and O-H pairs includes O
+        err1 = abs(mf.scf() - edf)
+        self.assertTrue(err0 < 1e-2)
+        self.assertTrue(err1 < 1e-4)
+        self.assertTrue(err1 < err0 * .01)
+        mf.pari_radius = 1e9
+        self.assertAlmostEqual(mf.scf(), edf, 8)
+
     def test_uhf(self):
         mf = scf.density_fit(scf.UHF(mol))
         self.assertAlmostEqual(mf.scf(), -76.025936299702536, 9)
@@ -176,6 +176,18 @@ class KnowValues(unittest.TestCase):
         self.assertAlmostEqual(numpy.linalg.norm(j1), 77.035779188661465, 9)
         self.assertAlmostEqual(numpy.linalg.norm(k1), 46.253491700647963, 9)
 
+    def test_direct_scf_rebuild(self):
+        mf1 = scf.RHF(mol)
+        mf1.max_memory = 0
+        mf1.conv_tol = 1e-10
+        mf1.direct_scf_rebuild = 3
+        self.assertAlmostEqual(mf1.scf(), mf.e_tot, 9)
+        ntot, nskip = mf1.opt.count_prescreen(mol._atm, mol._bas, mol._env)
+        nbas = mol.nbas
+        npair = nbas*(nbas+1)//2
+        self.assertEqual(ntot, npair*(npair+1)//2)
+        self.assertTrue(0 <= nskip <= ntot)
+
     def test_ghost_atm_meta_lowdin(self):
         mol = gto.Mole()
         mol.atom = [["O" , (0. , 0.     , 0.)],
@@ -4,6 +4,7 @@
 
 import numpy
 import unittest
+from pyscf import lib
 from pyscf import gto
 from pyscf import scf
 from pyscf import ao2mo
@@ -34,6 +35,18 @@ class KnowValues(unittest.TestCase):
         self.assertTrue(numpy.allclose(vj0,vj1))
         self.assertTrue(numpy.allclose(vk0,vk1))
 
+    def test_get_jk_blocks(self):
+        numpy.random.seed(1)
+        dms = numpy.random.random((5,nao,nao))
+        vj0, vk0 = scf.hf.dot_eri_dm(mf._eri, dms, hermi=0)
+        vj1, vk1 = scf.hf.get_jk(mol, dms, hermi=0)
+        unit = nao**2*2 * (lib.num_threads()+1) * 8/1e6
+        vj2, vk2 = scf.hf.get_jk(mol, dms, hermi=0, max_memory=unit*2)
+        self.assertTrue(numpy.allclose(vj0,vj1))
+        self.assertTrue(numpy.allclose(vk0,vk1))
+        self.assertTrue(numpy.allclose(vj0,vj2))
+        self.assertTrue(numpy.allclose(vk0,vk2))
+
     def test_direct_mapdm(self):
         numpy.random.seed(1)
         dm = numpy.random.random((nao,nao))
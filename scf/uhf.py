@@ -77,7 +77,7 @@ def make_rdm1(mo_coeff, mo_occ):
     mo_b = mo_coeff[1]
     dm_a = numpy.dot(mo_a*mo_occ[0], mo_a.T.conj())
     dm_b = numpy.dot(mo_b*mo_occ[1], mo_b.T.conj())
-    return numpy.array((dm_a,dm_b))
+    return pyscf.lib.tag_array((dm_a,dm_b), mo_coeff=mo_coeff, mo_occ=mo_occ)
 
 def get_veff(mol, dm, dm_last=0, vhf_last=0, hermi=1, vhfopt=None):
     r'''Unrestricted Hartree-Fock potential matrix of alpha and beta spins,
@@ -543,9 +543,11 @@ class UHF(hf.SCF):
                 self._eri = _vhf.int2e_sph(mol._atm, mol._bas, mol._env)
             vj, vk = hf.dot_eri_dm(self._eri, dm.reshape(-1,nao,nao), hermi)
         else:
-            if self.direct_scf:
+            if self.direct_scf and self.opt is None:
                 self.opt = self.init_direct_scf(mol)
-            vj, vk = hf.get_jk(mol, dm.reshape(-1,nao,nao), hermi, self.opt)
+            max_memory = self.max_memory - pyscf.lib.current_memory()[0]
+            vj, vk = hf.get_jk(mol, dm.reshape(-1,nao,nao), hermi, self.opt,
+                               max_memory)
         logger.timer(self, 'vj and vk', *cpu0)
         return vj.reshape(dm.shape), vk.reshape(dm.shape)
 
@@ -563,6 +565,7 @@ class UHF(hf.SCF):
         else:
             ddm = numpy.array(dm, copy=False) - numpy.array(dm_last,copy=False)
             vj, vk = self.get_jk(mol, ddm, hermi)
+            hf._dump_prescreen_stat(self, mol)
             vhf = _makevhf(vj, vk, nset) + numpy.array(vhf_last, copy=False)
         return vhf
 
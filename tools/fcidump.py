@@ -63,9 +63,15 @@ def from_chkfile(output, chkfile, tol=1e-15):
         mo_coeff = numpy.array(scf_rec['mo_coeff'])
         nmo = mo_coeff.shape[1]
         if mol.symmetry:
-            orbsym = pyscf.symm.label_orb_symm(mol, mol.irrep_name,
-                                               mol.irrep_id, mo_coeff)
-            write_head(fout, nmo, mol.nelectron, mol.spin, orbsym)
+            orbsym = pyscf.symm.label_orb_symm(mol, mol.irrep_id,
+                                               mol.symm_orb, mo_coeff)
+            if mol.groupname in pyscf.symm.param.IRREP_ID_MOLPRO:
+                molpro_id = pyscf.symm.param.IRREP_ID_MOLPRO[mol.groupname]
+                write_head(fout, nmo, mol.nelectron, mol.spin,
+                           [molpro_id[ir] for ir in orbsym])
+            else:
+                write_head(fout, nmo, mol.nelectron, mol.spin,
+                           [ir+1 for ir in orbsym])
         else:
             write_head(fout, nmo, mol.nelectron, mol.spin)
 